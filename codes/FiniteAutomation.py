@@ -1,4 +1,7 @@
 from collections import defaultdict
+from copy import deepcopy
+from compiled_automaton import EPSILON, transition_targets
+from tracing import VerboseTracer, traced_phase
 
 class FiniteAutomation:
     def __init__(self, states, alphabet, transitions, start_state, final_states):
@@ -7,6 +10,8 @@ class FiniteAutomation:
         self.transitions = transitions
         self.start_state = start_state
         self.final_states = final_states
+        # (copy of the definition it was compiled from, CompiledNFA)
+        self._nfa = None
 
     def __repr__(self):
         return(f"Finite Automation:\n"
@@ -18,65 +23,236 @@ class FiniteAutomation:
                                               for state, transitions in self.transitions.items()
                                               for symbol, next_state in transitions.items()))
 
-    def string_belongs_to_language(self, input_string):
-        current_state = self.start_state
-        print(f"Starting state: {current_state}")
-    
-        for symbol in input_string:
-            if symbol not in self.alphabet:
-                print(f"Rejected: {symbol} is not in the alphabet")
-                return False
-        
-            if current_state not in self.transitions or symbol not in self.transitions[current_state]:
-                print(f"Rejected: No transition for {symbol} from state {current_state}")
-                return False
-
-            next_state = self.transitions[current_state][symbol]
-        
-            if isinstance(next_state, set):
-                next_state = next(iter(next_state))  # Choose a single state (assuming DFA)
-
-            current_state = next_state
-            print(f"Transitioned to: {current_state}")
-        return current_state in self.final_states
-
-    def to_regular_grammar(self):
-        from Grammar import Grammar  
+    def compile(self):
+        """Compile a deterministic automaton into a table-driven CompiledDFA."""
+        from compiled_automaton import compile_automaton
+        return compile_automaton(self)
+
+    def compile_nfa(self):
+        """Compile into a CompiledNFA that simulates all runs at once on bitsets."""
+        from compiled_nfa import compile_nfa
+        return compile_nfa(self)
+
+    def _cached_nfa(self):
+        """
+        The CompiledNFA used by string_belongs_to_language, epsilon_closures
+        and nfa_to_dfa. It is compiled again whenever the definition differs
+        from the copy it was compiled from, so changes made in place count too.
+        """
+        definition = (self.states, self.alphabet, self.transitions, self.start_state, self.final_states)
+        if self._nfa is None or self._nfa[0] != definition:
+            self._nfa = (deepcopy(definition), self.compile_nfa())
+        return self._nfa[1]
+
+    def lazy_dfa(self, max_states=4096):
+        """A LazyDFA that determinizes states only as inputs reach them."""
+        from lazy_dfa import LazyDFA
+        return LazyDFA(self.compile_nfa(), max_states)
+
+    def minimize(self, prune=True):
+        """
+        The minimal DFA for the same language as a new FiniteAutomation, by
+        Hopcroft's algorithm on the compiled form. Nondeterministic automata
+        are determinized first. With prune, unreachable states are dropped.
+        """
+        return self._as_dfa().minimize(prune).to_automaton()
+
+    def _as_dfa(self):
+        """The compiled DFA, determinized first if the automaton is nondeterministic."""
+        try:
+            return self.compile()
+        except ValueError:
+            return self.compile_nfa().determinize()
+
+    def is_deterministic(self):
+        """Whether no state has an ε-move or more than one target on a symbol."""
+        if self.has_epsilon_transitions():
+            return False
+        return all(len(transition_targets(target, self.states)) <= 1
+                   for transitions in self.transitions.values() for target in transitions.values())
+
+    def is_empty(self):
+        """Whether the automaton accepts no string."""
+        from analysis import is_empty
+        return is_empty(self._as_dfa())
+
+    def is_finite(self):
+        """Whether the automaton accepts finitely many strings."""
+        from analysis import is_finite
+        return is_finite(self._as_dfa())
+
+    def count_accepted(self, max_length):
+        """Number of distinct accepted strings of length at most max_length."""
+        from analysis import count_accepted
+        return count_accepted(self._as_dfa(), max_length)
+
+    def sampler(self, rng=None):
+        """A UniformSampler drawing accepted strings of a given length uniformly."""
+        from sampler import UniformSampler
+        return UniformSampler(self._as_dfa(), rng)
+
+    def matcher(self):
+        """A StreamMatcher that runs the automaton over input fed in chunks."""
+        from stream_matcher import StreamMatcher
+        return StreamMatcher(self._as_dfa())
+
+    def intersection(self, other):
+        """Automaton of the strings accepted by both automata."""
+        return self._product(other, "intersection")
+
+    def union(self, other):
+        """Automaton of the strings accepted by either automaton."""
+        return self._product(other, "union")
+
+    def difference(self, other):
+        """Automaton of the strings accepted by this automaton but not by other."""
+        return self._product(other, "difference")
+
+    def symmetric_difference(self, other):
+        """Automaton of the strings accepted by exactly one of the automata."""
+        return self._product(other, "symmetric_difference")
+
+    def _product(self, other, operation):
+        from product import product
+        return product(self._as_dfa(), other._as_dfa(), operation).to_automaton()
+
+    def equivalent(self, other):
+        """Whether both automata accept the same language."""
+        from product import equivalent
+        return equivalent(self._as_dfa(), other._as_dfa())
+
+    def counterexample(self, other):
+        """A shortest string accepted by exactly one of the automata, or None if they are equivalent."""
+        from product import counterexample
+        return counterexample(self._as_dfa(), other._as_dfa())
+
+    def accepts_many(self, strings):
+        """
+        Test many strings at once; returns a NumPy bool array (requires NumPy).
+        Nondeterministic automata are determinized first.
+        """
+        return self._as_dfa().accepts_many(strings)
+
+    def has_epsilon_transitions(self):
+        return any(transition_targets(transitions.get(EPSILON), self.states)
+                   for transitions in self.transitions.values())
+
+    def epsilon_closures(self):
+        """Map each state to the states reachable from it by ε-moves, itself included."""
+        nfa = self._cached_nfa()
+        if nfa.closures is None:
+            return {state: {state} for state in nfa.labels}
+        return {state: set(nfa.state_set(closure)) for state, closure in zip(nfa.labels, nfa.closures)}
+
+    def string_belongs_to_language(self, input_string, tracer=None):
+        """
+        Whether the automaton accepts input_string, by bitset simulation of
+        the cached CompiledNFA with its ε-closures folded in. A tracer (see
+        tracing) is told of every state visited and transition taken, gets a
+        message per step, and times the "compile_nfa" and "simulation" phases.
+        """
+        with traced_phase(tracer, "compile_nfa"):
+            nfa = self._cached_nfa()
+
+        with traced_phase(tracer, "simulation"):
+            if tracer is None:
+                return nfa.accepts(input_string)
+
+            # Follow every run at once, so nondeterministic choices are not lost
+            current_states = nfa.start
+            labels = nfa.state_set(current_states)
+            for state in labels:
+                tracer.visit(state)
+            tracer.message(f"Starting state: {self._describe(labels)}")
+
+            for symbol in input_string:
+                symbol_id = nfa.symbol_ids.get(symbol)
+                if symbol_id is None:
+                    tracer.message(f"Rejected: {symbol} is not in the alphabet")
+                    return False
+
+                next_states = nfa.step(current_states, symbol_id)
+                if not next_states:
+                    tracer.message(f"Rejected: No transition for {symbol} from state {self._describe(labels)}")
+                    return False
+                for state in labels:
+                    transitions = self.transitions.get(state)
+                    if transitions is not None and symbol in transitions:
+                        for next_state in transition_targets(transitions[symbol], self.states):
+                            tracer.transition(state, symbol, next_state)
+
+                current_states = next_states
+                labels = nfa.state_set(current_states)
+                for state in labels:
+                    tracer.visit(state)
+                tracer.message(f"Transitioned to: {self._describe(labels)}")
+            return bool(current_states & nfa.accepting)
+
+    @staticmethod
+    def _describe(states):
+        return next(iter(states)) if len(states) == 1 else states
+
+    def to_regular_grammar(self, tracer=None):
+        """The right-linear grammar of the automaton; a tracer gets each production as a message."""
+        from Grammar import Grammar
         rules = {state: [] for state in self.states}
         terminals = set()
+        message = tracer.message if tracer is not None else None
 
-    # Convert transitions to grammar rules and print them
-        print("\nRegular Grammar Productions:")
-        for state, transitions in self.transitions.items():
-            productions = []
-            for symbol, next_states in transitions.items():
-                terminals.add(symbol)
-                for next_state in next_states:
-                    productions.append(f"{symbol} {next_state}")
-                    print(f"{state} -> {symbol} {next_state}")
+        with traced_phase(tracer, "to_regular_grammar"):
+            # Convert transitions to grammar rules
+            if message:
+                message("\nRegular Grammar Productions:")
+            for state, transitions in self.transitions.items():
+                productions = []
+                for symbol, target in transitions.items():
+                    next_states = transition_targets(target, self.states)
+                    # An ε-move becomes a unit production
+                    if symbol == EPSILON:
+                        for next_state in next_states:
+                            productions.append(f"{next_state}")
+                            if message:
+                                message(f"{state} -> {next_state}")
+                        continue
+                    terminals.add(symbol)
+                    for next_state in next_states:
+                        productions.append(f"{symbol} {next_state}")
+                        if message:
+                            message(f"{state} -> {symbol} {next_state}")
 
-            rules[state] = productions
+                rules[state] = productions
 
-    # Add and print epsilon transitions for final states
-        for final_state in self.final_states:
-            rules[final_state].append("ε")
-            print(f"{final_state} -> ε")
+            # Add epsilon productions for final states
+            for final_state in self.final_states:
+                rules[final_state].append("ε")
+                if message:
+                    message(f"{final_state} -> ε")
 
-        print("\nGrammar Components:")
-        print(f"Non-terminals: {set(self.states)}")
-        print(f"Terminals: {terminals}")
-        print(f"Start symbol: {self.start_state}")
+            if message:
+                message("\nGrammar Components:")
+                message(f"Non-terminals: {set(self.states)}")
+                message(f"Terminals: {terminals}")
+                message(f"Start symbol: {self.start_state}")
 
         return Grammar(
             terminals=terminals,
             non_terminals=set(self.states),
             start_symbol=self.start_state,
             rules=rules
-    )
+        )
 
+    def check_type(self, tracer=None):
+        """Return "DFA" or "NFA"; a tracer gets each reason for nondeterminism as a message."""
+        with traced_phase(tracer, "check_type"):
+            reasons = self._nondeterminism_reasons()
+        if tracer is not None:
+            for reason in reasons:
+                tracer.message(f"\nThe FA is non-deterministic because {reason}")
+            tracer.message(f"\nThe FA is {'an NFA' if reasons else 'a DFA'}.")
+        return "NFA" if reasons else "DFA"
 
-    def check_type(self):
-        is_ndfa = False
+    def _nondeterminism_reasons(self):
+        reasons = []
         transition_map = {}
 
         for state, transitions in self.transitions.items():
@@ -87,7 +263,7 @@ class FiniteAutomation:
                 key = (state, symbol)
 
                 if key in transition_map:
-                    is_ndfa = True  # Multiple transitions for the same (state, symbol)
+                    # Multiple transitions for the same (state, symbol)
                     transition_map[key].update(next_states)
                 else:
                     transition_map[key] = next_states
@@ -95,76 +271,70 @@ class FiniteAutomation:
         # Check if any key has multiple transitions
         for (state, symbol), states in transition_map.items():
             if len(states) > 1:
-                is_ndfa = True
-                print(f"\nThe FA is non-deterministic because from state '{state}' on symbol '{symbol}', it can transition to multiple states: {states}")
+                reasons.append(f"from state '{state}' on symbol '{symbol}', "
+                               f"it can transition to multiple states: {states}")
+
+        if self.has_epsilon_transitions():
+            reasons.append("it has ε-transitions.")
 
         # Special case: If the start state has multiple transitions, it's immediately an NFA
         if len(self.transitions.get(self.start_state, {})) > 1:
-            is_ndfa = True
-            print("\nThe FA is non-deterministic because the start state has multiple outgoing transitions.")
-
-        if is_ndfa:
-            print("\nThe FA is an NFA.")
-            return "NFA"
-        else:
-            print("\nThe FA is a DFA.")
-            return "DFA"
+            reasons.append("the start state has multiple outgoing transitions.")
+        return reasons
 
     def nfa_to_dfa(self):
-        dfa_states = []
+        """
+        Subset construction on the cached CompiledNFA, whose successor sets
+        already include ε-closures. Each DFA state is the tuple of the NFA
+        states in its subset.
+        """
+        nfa = self._cached_nfa()
+        # Subsets as bitmasks, in discovery order, with the tuple naming each
+        names = {}
         dfa_transitions = defaultdict(dict)
-        dfa_final_states = set()
+        symbols = [(symbol, nfa.symbol_ids[symbol]) for symbol in nfa.symbols]
 
-        start_state = frozenset([self.start_state])  # Use frozenset for unique state combinations
-        unprocessed_states = [start_state]
-        dfa_states.append(start_state)
+        def name(states):
+            if states not in names:
+                names[states] = tuple(nfa.state_set(states))
+                unprocessed_states.append(states)
+            return names[states]
 
+        unprocessed_states = []
+        start_state = name(nfa.start)
         while unprocessed_states:
-            current_dfa_state = unprocessed_states.pop()
-            for symbol in self.alphabet:
-                next_state = set()
-                for nfa_state in current_dfa_state:
-                    if nfa_state in self.transitions and symbol in self.transitions[nfa_state]:
-                        next_state.update(self.transitions[nfa_state][symbol])
-
-                if next_state:
-                    next_state_frozen = frozenset(next_state)
-                    if next_state_frozen not in dfa_states:
-                        unprocessed_states.append(next_state_frozen)
-                        dfa_states.append(next_state_frozen)
-
-                    dfa_transitions[current_dfa_state][symbol] = next_state_frozen
-
-                    if any(state in self.final_states for state in next_state):
-                        dfa_final_states.add(next_state_frozen)
+            current = unprocessed_states.pop()
+            for symbol, symbol_id in symbols:
+                next_states = nfa.step(current, symbol_id)
+                if next_states:
+                    dfa_transitions[names[current]][symbol] = name(next_states)
 
         return FiniteAutomation(
-            states=[tuple(state) for state in dfa_states],
+            states=list(names.values()),
             alphabet=self.alphabet,
-            transitions={tuple(k): {sym: tuple(v) for sym, v in trans.items()} for k, trans in dfa_transitions.items()},
-            start_state=tuple(start_state),
-            final_states=[tuple(state) for state in dfa_final_states]
+            transitions=dict(dfa_transitions),
+            start_state=start_state,
+            final_states=[names[states] for states in names if states & nfa.accepting]
         )
 
-
 # Example Usage
-states = ['q0', 'q1', 'q2', 'q3']
-alphabets = ['a', 'b', 'c']
-start = 'q0'
-finals = ['q3']
-transitions = {
-    'q0': {'a': {'q1'}, 'b': {'q2'}},
-    'q1': {'b': {'q2', 'q1'}},  
-    'q2': {'c': {'q3'}},
-    'q3': {'a': {'q1'}}
-}
-
-nfa = FiniteAutomation(states, alphabets, transitions, start, finals)
-
-print("Original FA Type:", nfa.check_type())
-automaton_type = nfa.check_type()
-print("Original FA Type:", automaton_type)
-dfa = nfa.nfa_to_dfa()
-
-print("\nConverted DFA:")
-print(dfa)
+if __name__ == '__main__':
+    states = ['q0', 'q1', 'q2', 'q3']
+    alphabets = ['a', 'b', 'c']
+    start = 'q0'
+    finals = ['q3']
+    transitions = {
+        'q0': {'a': {'q1'}, 'b': {'q2'}},
+        'q1': {'b': {'q2', 'q1'}},
+        'q2': {'c': {'q3'}},
+        'q3': {'a': {'q1'}}
+    }
+
+    nfa = FiniteAutomation(states, alphabets, transitions, start, finals)
+
+    automaton_type = nfa.check_type(tracer=VerboseTracer())
+    print("Original FA Type:", automaton_type)
+    dfa = nfa.nfa_to_dfa()
+
+    print("\nConverted DFA:")
+    print(dfa)
@@ -1,13 +1,30 @@
 import random
 from FiniteAutomation import FiniteAutomation
 
+
 class Grammar:
+    """
+    A grammar whose rules map each left-hand side to a list of productions.
+    The rules are used as given, not copied, so changes the caller makes to
+    them afterwards are seen by the grammar.
+    """
+
     def __init__(self, non_terminals, terminals, start_symbol, rules):
         self.non_terminals = set(non_terminals)
         self.terminals = set(terminals)
         self.start_symbol = start_symbol
-        self.rules = rules 
-    
+        self.rules = rules
+        # (snapshot of the grammar it was computed for, ChomskyClassification)
+        self._classification = None
+
+    def _definition(self):
+        return self.non_terminals, self.terminals, self.start_symbol, self.rules
+
+    def _snapshot(self):
+        """A copy of _definition() that later changes to the grammar do not reach."""
+        return (set(self.non_terminals), set(self.terminals), self.start_symbol,
+                {lhs: [production[:] for production in productions] for lhs, productions in self.rules.items()})
+
     def is_terminal(self, symbol):
         return symbol in self.terminals
 
@@ -26,66 +43,34 @@ class Grammar:
         return "".join(self.generate_string(sym, depth + 1, max_depth) for sym in expansion)
 
     def find_Chomsky_type(self):
-        is_type3 = True
-        is_type2 = True
-        is_type1 = True
-        
-        for non_terminal, productions in self.rules.items():
-            if non_terminal not in self.non_terminals:
-                return "Type-0"  
-            
-            if len(non_terminal) != 1 or non_terminal not in self.non_terminals:
-                is_type2 = False  
-
-            for production in productions:
-                if production == "":  
-                    continue
-
-                if all(symbol in self.terminals for symbol in production):
-                    continue 
-                
-                if (len(production) >= 2 and 
-                    all(symbol in self.terminals for symbol in production[:-1]) and 
-                    production[-1] in self.non_terminals):
-                    continue  
-                
-                is_type3 = False 
-
-                lhs = non_terminal
-                rhs = production
-                if len(rhs) < len(lhs) or not any(symbol in self.non_terminals for symbol in rhs):
-                    is_type1 = False  
-
-        if is_type3:
-            return "Type-3"
-        if is_type2:
-            return "Type-2"
-        if is_type1:
-            return "Type-1"
-        return "Type-0"
-
-    # def toFiniteAutomaton(self):
-    #     states = self.non_terminals.copy()
-    #     states.add('F')  
-    #     alphabet = self.terminals
-    #     start_state = self.start_symbol
-    #     final_states = {'F'}  
-    #     transitions = {}
-
-    #     for non_terminal, productions in self.rules.items():
-    #         for production in productions:
-    #             if len(production) == 0:
-    #                 continue
-                
-    #             terminal = production[0]
+        """The grammar's type as "Type-3", "Type-2", "Type-1" or "Type-0"; see classify()."""
+        return self.classify().name
 
-    #             if non_terminal not in transitions:
-    #                 transitions[non_terminal] = {}
+    def classify(self):
+        """
+        The ChomskyClassification of the grammar, with a diagnostic for each
+        production that breaks a type. Computed in one pass on first use and
+        cached until the grammar changes, in place or by assignment.
+        """
+        if self._classification is None or self._classification[0] != self._definition():
+            from chomsky import classify
+            self._classification = (self._snapshot(), classify(self))
+        return self._classification[1]
 
-    #             if len(production) > 1:
-    #                 next_state = production[1]
-    #                 transitions[non_terminal][terminal] = next_state
-    #             else:
-    #                 transitions[non_terminal][terminal] = 'F'  
+    def compile(self):
+        """Compile the (right-linear) grammar into a CompiledNFA; see grammar_compiler."""
+        from grammar_compiler import compile_grammar
+        return compile_grammar(self)
 
-    #     return FiniteAutomation(states, alphabet, transitions, start_state, final_states)
+    def toFiniteAutomaton(self, determinize=False, minimize=False):
+        """
+        The finite automaton of a right-linear grammar: an NFA without
+        ε-moves by default, the DFA of the subset construction with
+        determinize, or the minimal DFA with minimize.
+        """
+        nfa = self.compile()
+        if minimize:
+            return nfa.determinize().minimize().to_automaton()
+        if determinize:
+            return nfa.determinize().to_automaton()
+        return nfa.to_automaton()
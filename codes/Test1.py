@@ -1,3 +1,4 @@
+import itertools
 import unittest
 from Grammar import Grammar
 from FiniteAutomation import FiniteAutomation
@@ -86,5 +87,112 @@ class Test1(unittest.TestCase):
         self.assertEqual(self.fa.final_states, {'q3'})
         self.assertEqual(len(self.fa.final_states), 1)
 
+class TestGrammarCompiler(unittest.TestCase):
+    def setUp(self):
+        # S -> ab S | ab T | ε ;  T -> c | T2 ;  T2 -> "c c"
+        self.grammar = Grammar(
+            non_terminals={'S', 'T', 'T2'},
+            terminals={'a', 'b', 'c'},
+            start_symbol='S',
+            rules={
+                'S': [['a', 'b', 'S'], ['a', 'b', 'T'], ['ε']],
+                'T': [['c'], ['T2']],
+                'T2': ["c c"],
+            }
+        )
+        self.language = lambda string: (string == "" or any(
+            string == "ab" * n + tail for n in range(1, len(string)) for tail in ("", "c", "cc")))
+
+    def test_nondeterministic_edges_are_kept(self):
+        fa = self.grammar.toFiniteAutomaton()
+        self.assertFalse(fa.has_epsilon_transitions())
+        # The shared prefix "ab" of two productions leads to both targets, and T's ε-closure
+        middle = fa.transitions['S']['a']
+        self.assertEqual(fa.transitions[middle]['b'], {'S', 'T', 'T2'})
+
+    def test_languages_agree(self):
+        automata = [self.grammar.compile(), self.grammar.toFiniteAutomaton(),
+                    self.grammar.toFiniteAutomaton(determinize=True), self.grammar.toFiniteAutomaton(minimize=True)]
+        self.assertTrue(automata[2].is_deterministic())
+        self.assertEqual(len(automata[3].states), 5)
+        for length in range(8):
+            for symbols in itertools.product('abc', repeat=length):
+                string = ''.join(symbols)
+                expected = self.language(string)
+                self.assertEqual(automata[0].accepts(string), expected, string)
+                for fa in automata[1:]:
+                    self.assertEqual(fa.string_belongs_to_language(string), expected, string)
+
+    def test_rejects_grammars_that_are_not_right_linear(self):
+        grammar = Grammar({'S'}, {'a'}, 'S', {'S': [['S', 'a']]})
+        with self.assertRaises(ValueError):
+            grammar.compile()
+
+
+class TestChomskyClassification(unittest.TestCase):
+    def setUp(self):
+        self.grammar = Grammar(
+            non_terminals={'S', 'A'},
+            terminals={'a', 'b'},
+            start_symbol='S',
+            rules={
+                'S': [['a', 'S'], ['A'], ['ε']],
+                'A': [['b']],
+            }
+        )
+
+    def test_types_and_diagnostics(self):
+        self.assertEqual(self.grammar.find_Chomsky_type(), "Type-3")
+        # Right-linear grammars may erase the start symbol wherever it appears
+        diagnostics = self.grammar.classify().diagnostics
+        self.assertEqual([(d.lhs, d.index, d.breaks) for d in diagnostics], [('S', 2, 1)])
+
+        grammar = Grammar({'S', 'A'}, {'a', 'b'}, 'S', {
+            'S': [['A', 'a'], ['a', 'A', 'b']],
+            'A': [['a'], ['ε']],
+            'A b': [['b', 'A']],
+        })
+        classification = grammar.classify()
+        self.assertEqual(classification.name, "Type-0")
+        self.assertEqual([(d.lhs, d.index) for d in classification.breaking(3)],
+                         [('S', 0), ('S', 1), ('A b', 0)])
+        self.assertEqual([(d.lhs, d.index) for d in classification.breaking(2)], [('A b', 0)])
+        self.assertEqual([(d.lhs, d.index) for d in classification.breaking(1)], [('A', 1)])
+        self.assertIn("not at the end", classification.breaking(3)[0].reason)
+
+        del grammar.rules['A'][1]
+        self.assertEqual(grammar.find_Chomsky_type(), "Type-1")
+
+    def test_unknown_left_hand_side(self):
+        self.grammar.rules['ab'] = [['b']]
+        classification = self.grammar.classify()
+        self.assertEqual(classification.name, "Type-0")
+        self.assertEqual(classification.breaking(0)[0].reason, "left-hand side 'ab' has no non-terminal")
+
+    def test_result_is_cached_until_a_mutation(self):
+        first = self.grammar.classify()
+        self.assertIs(self.grammar.classify(), first)
+
+        self.grammar.rules['S'].append(['S', 'S'])
+        second = self.grammar.classify()
+        self.assertIsNot(second, first)
+        self.assertEqual(second.name, "Type-2")
+
+        self.grammar.rules['S'] = [['a']]
+        self.assertEqual(self.grammar.find_Chomsky_type(), "Type-3")
+        self.grammar.rules.setdefault('A', []).insert(0, ['A', 'b'])
+        self.assertEqual(self.grammar.find_Chomsky_type(), "Type-2")
+        self.grammar.non_terminals.discard('A')
+        self.assertEqual(self.grammar.find_Chomsky_type(), "Type-0")
+
+    def test_rules_passed_in_are_shared(self):
+        rules = {'S': [['a']]}
+        grammar = Grammar({'S'}, {'a'}, 'S', rules)
+        self.assertIs(grammar.rules, rules)
+        self.assertEqual(grammar.find_Chomsky_type(), "Type-3")
+        rules['S'].append(['S', 'S'])
+        self.assertEqual(grammar.find_Chomsky_type(), "Type-2")
+
+
 if __name__ == "__main__":
     unittest.main()
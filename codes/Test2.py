@@ -1,7 +1,21 @@
+import contextlib
+import importlib.util
+import io
+import itertools
+import json
+import os
+import random
+import tempfile
 import unittest
 from collections import defaultdict
 from FiniteAutomation import FiniteAutomation  # Assuming class is in finite_automation.py
 from Grammar import Grammar
+import analysis
+from compiled_automaton import CompiledDFA
+from dfa_format import dfa_from_buffer, dfa_to_bytes
+from lazy_dfa import LazyDFA
+from stream_matcher import StreamMatcher
+from tracing import Stats, Tracers, VerboseTracer
 
 class TestFiniteAutomation(unittest.TestCase):
     def setUp(self):
@@ -74,5 +88,461 @@ class TestFiniteAutomation(unittest.TestCase):
         self.assertIn("States:", repr_str)
         self.assertIn("Transitions:", repr_str)
 
+
+class TestCompiledDFA(unittest.TestCase):
+    def setUp(self):
+        # Strings over {a, b} with an even number of a's and ending in b
+        self.dfa = FiniteAutomation(
+            states=['even', 'odd', 'even_b'],
+            alphabet=['a', 'b'],
+            transitions={
+                'even': {'a': 'odd', 'b': 'even_b'},
+                'odd': {'a': {'even'}, 'b': 'odd'},
+                'even_b': {'a': 'odd', 'b': 'even_b'},
+            },
+            start_state='even',
+            final_states=['even_b']
+        )
+
+    def test_accepts_matches_string_belongs_to_language(self):
+        compiled = self.dfa.compile()
+        self.assertEqual(compiled.n_states, 4)  # three states and the dead state
+        for string in ["", "b", "ab", "aab", "aabab", "abab", "ba", "aacb", "b\u00e9", b"aab"]:
+            expected = self.dfa.string_belongs_to_language(
+                string.decode() if isinstance(string, bytes) else string)
+            self.assertEqual(compiled.accepts(string), expected, string)
+        self.assertTrue(compiled.accepts(['a', 'a', 'b']))
+
+    def test_missing_transitions_lead_to_the_dead_state(self):
+        compiled = FiniteAutomation(['s', 't'], ['x'], {'s': {'x': 't'}, 't': {'x': None}}, 's', ['t']).compile()
+        self.assertTrue(compiled.accepts("x"))
+        self.assertFalse(compiled.accepts("xx"))
+
+    @unittest.skipUnless(importlib.util.find_spec("numpy"), "NumPy is not installed")
+    def test_accepts_many_matches_accepts(self):
+        strings = ["", "b", "ab", "aab", "aabab", "abab", "ba", "aacb", "b\u00e9", "ab" * 50]
+        compiled = self.dfa.compile()
+        for chunk_size in (3, 1 << 16):
+            result = compiled.accepts_many(strings, chunk_size=chunk_size)
+            self.assertEqual(result.tolist(), [compiled.accepts(string) for string in strings])
+        self.assertEqual(self.dfa.accepts_many([["a", "a", "b"], b"b"]).tolist(), [True, True])
+
+        nfa = FiniteAutomation(['q0', 'q1'], ['a'], {'q0': {'a': {'q0', 'q1'}}}, 'q0', ['q1'])
+        self.assertEqual(nfa.accepts_many(["", "a", "aaa", "b"]).tolist(), [False, True, True, False])
+
+    def test_compile_rejects_nondeterminism(self):
+        with self.assertRaises(ValueError):
+            FiniteAutomation(['q0', 'q1', 'q2', 'q3'], ['a', 'b', 'c'], {'q1': {'b': {'q2', 'q1'}}}, 'q0', ['q3']).compile()
+
+
+class TestCompiledNFA(unittest.TestCase):
+    def test_example_nfa(self):
+        nfa = FiniteAutomation(['q0', 'q1', 'q2', 'q3'], ['a', 'b', 'c'], {
+            'q0': {'a': {'q1'}, 'b': {'q2'}},
+            'q1': {'b': {'q2', 'q1'}},
+            'q2': {'c': {'q3'}},
+            'q3': {'a': {'q1'}}
+        }, 'q0', ['q3']).compile_nfa()
+        self.assertTrue(nfa.accepts("abc"))
+        self.assertTrue(nfa.accepts("abbbcabc"))
+        self.assertFalse(nfa.accepts("abb"))
+        self.assertFalse(nfa.accepts("acd"))
+        self.assertEqual(sorted(nfa.state_set(nfa.run("abb"))), ['q1', 'q2'])
+
+    def test_matches_set_simulation_across_chunks(self):
+        rng = random.Random(7)
+        states = list(range(40))
+        transitions = {state: {symbol: set(rng.sample(states, rng.randint(0, 3))) for symbol in 'ab'}
+                       for state in states}
+        fa = FiniteAutomation(states, ['a', 'b'], transitions, 0, states[30:])
+        nfa = fa.compile_nfa()
+        for _ in range(200):
+            string = ''.join(rng.choices('ab', k=rng.randint(0, 12)))
+            current = {0}
+            for symbol in string:
+                current = {target for state in current for target in transitions[state][symbol]}
+            self.assertEqual(nfa.accepts(string), bool(current & set(fa.final_states)), string)
+
+    def test_determinize(self):
+        # (a|b)*a(a|b)^k needs 2^(k+1) DFA states, plus the dead state
+        k = 10
+        transitions = {0: {'a': {0, 1}, 'b': {0}}}
+        transitions.update({i: {'a': {i + 1}, 'b': {i + 1}} for i in range(1, k + 1)})
+        nfa = FiniteAutomation(list(range(k + 2)), ['a', 'b'], transitions, 0, [k + 1]).compile_nfa()
+        dfa = nfa.determinize()
+        self.assertEqual(dfa.n_states, 2 ** (k + 1) + 1)
+        self.assertEqual(dfa.subsets[dfa.start], nfa.start)
+        self.assertEqual(dfa.labels[dfa.start], (0,))
+
+        rng = random.Random(5)
+        for _ in range(200):
+            string = ''.join(rng.choices('ab', k=rng.randint(0, 20)))
+            self.assertEqual(dfa.accepts(string), nfa.accepts(string), string)
+        with self.assertRaises(ValueError):
+            nfa.determinize(max_states=100)
+
+
+class TestEpsilonTransitions(unittest.TestCase):
+    def setUp(self):
+        # a*b* with an ε-cycle between the two halves and an ε-chain to the end
+        self.fa = FiniteAutomation(['s', 'a', 'b', 'c', 'end'], ['a', 'b'], {
+            's': {'ε': {'a'}},
+            'a': {'a': {'a'}, 'ε': {'b'}},
+            'b': {'b': {'b'}, 'ε': {'c'}},
+            'c': {'ε': {'end', 'b'}},
+        }, 's', ['end'])
+        self.cases = {"": True, "a": True, "aab": True, "abbb": True, "ba": False, "aba": False}
+
+    def test_closures(self):
+        closures = self.fa.epsilon_closures()
+        self.assertEqual(closures['s'], {'s', 'a', 'b', 'c', 'end'})
+        self.assertEqual(closures['b'], {'b', 'c', 'end'})
+        self.assertEqual(closures['end'], {'end'})
+
+    def test_simulation_and_subset_construction(self):
+        nfa = self.fa.compile_nfa()
+        dfa = nfa.determinize()
+        lazy = LazyDFA(nfa)
+        converted = self.fa.nfa_to_dfa()
+        for string, expected in self.cases.items():
+            self.assertEqual(nfa.accepts(string), expected, string)
+            self.assertEqual(dfa.accepts(string), expected, string)
+            self.assertEqual(lazy.accepts(string), expected, string)
+            self.assertEqual(self.fa.string_belongs_to_language(string), expected, string)
+            self.assertEqual(converted.string_belongs_to_language(string), expected, string)
+
+    def test_compiled_nfa_is_cached_until_changed(self):
+        self.fa.string_belongs_to_language("ab")
+        nfa = self.fa._cached_nfa()
+        self.assertTrue(self.fa.string_belongs_to_language("b"))
+        self.assertIs(self.fa._cached_nfa(), nfa)
+
+        self.fa.final_states = ['s']
+        self.assertFalse(self.fa.string_belongs_to_language("b"))
+        self.assertIsNot(self.fa._cached_nfa(), nfa)
+
+    def test_compiled_nfa_follows_changes_in_place(self):
+        fa = FiniteAutomation(['q0', 'q1'], ['a', 'b'], {'q0': {'a': 'q1'}}, 'q0', ['q1'])
+        self.assertFalse(fa.string_belongs_to_language("b"))
+        fa.transitions['q0']['b'] = 'q1'
+        self.assertTrue(fa.string_belongs_to_language("b"))
+        self.assertFalse(fa.string_belongs_to_language(""))
+        fa.final_states.append('q0')
+        self.assertTrue(fa.string_belongs_to_language(""))
+        self.assertEqual(fa.epsilon_closures(), {'q0': {'q0'}, 'q1': {'q1'}})
+
+    def test_single_state_targets_in_grammar(self):
+        fa = FiniteAutomation(['q0', 'q1'], ['a'], {'q0': {'ε': 'q1'}, 'q1': {'a': 'q1'}}, 'q0', ['q1'])
+        rules = fa.to_regular_grammar().rules
+        self.assertEqual(rules['q0'], ['q1'])
+        self.assertEqual(rules['q1'], ['a q1', 'ε'])
+
+    def test_epsilon_moves_are_not_deterministic(self):
+        self.assertEqual(self.fa.check_type(), "NFA")
+        with self.assertRaises(ValueError):
+            self.fa.compile()
+
+
+class TestLazyDFA(unittest.TestCase):
+    def setUp(self):
+        rng = random.Random(3)
+        states = list(range(30))
+        transitions = {state: {symbol: set(rng.sample(states, 2)) for symbol in 'ab'} for state in states}
+        self.nfa = FiniteAutomation(states, ['a', 'b'], transitions, 0, states[20:]).compile_nfa()
+        self.strings = [''.join(rng.choices('ab', k=rng.randint(0, 40))) for _ in range(100)]
+
+    def test_matches_nfa_and_counts_cache_use(self):
+        lazy = LazyDFA(self.nfa)
+        for _ in range(2):
+            for string in self.strings:
+                self.assertEqual(lazy.accepts(string), self.nfa.accepts(string), string)
+        self.assertEqual(lazy.hits + lazy.misses, 2 * sum(len(string) for string in self.strings))
+        self.assertGreater(lazy.hits, lazy.misses)
+        self.assertEqual(lazy.evictions, 0)
+
+    def test_small_cache_evicts_and_falls_back(self):
+        lazy = LazyDFA(self.nfa, max_states=2, thrash_window=8)
+        for string in self.strings:
+            self.assertEqual(lazy.accepts(string), self.nfa.accepts(string), string)
+        self.assertLessEqual(lazy.cache_size, 2)
+        self.assertGreater(lazy.evictions, 0)
+        self.assertGreater(lazy.fallbacks, 0)
+
+
+class TestMinimize(unittest.TestCase):
+    def setUp(self):
+        # Strings over {a, b} ending in "ab", with redundant states: p2 duplicates
+        # p0, p3 duplicates p1, and u and sink are unreachable or dead
+        self.fa = FiniteAutomation(['p0', 'p1', 'p2', 'p3', 'p4', 'u', 'sink'], ['a', 'b'], {
+            'p0': {'a': 'p1', 'b': 'p2'},
+            'p1': {'a': 'p3', 'b': 'p4'},
+            'p2': {'a': 'p3', 'b': 'p0'},
+            'p3': {'a': 'p1', 'b': 'p4'},
+            'p4': {'a': 'p1', 'b': 'p2'},
+            'u': {'a': 'p4', 'b': 'sink'},
+            'sink': {'a': 'sink', 'b': 'sink'},
+        }, 'p0', ['p4'])
+        rng = random.Random(4)
+        self.strings = [''.join(rng.choices('ab', k=rng.randint(0, 12))) for _ in range(200)]
+
+    def test_merges_equivalent_states(self):
+        minimal = self.fa.minimize()
+        self.assertEqual(minimal.states, ['p0', 'p1', 'p4'])
+        self.assertEqual(minimal.final_states, ['p4'])
+        compiled = self.fa.compile()
+        for string in self.strings:
+            self.assertEqual(minimal.compile().accepts(string), compiled.accepts(string), string)
+
+    def test_without_pruning_keeps_unreachable_states(self):
+        minimal = self.fa.compile().minimize(prune=False)
+        self.assertEqual(minimal.to_automaton().states, ['p0', 'p1', 'p4', 'u'])
+
+    def test_same_language_gives_same_table(self):
+        nfa = FiniteAutomation(['x', 'y', 'z'], ['a', 'b'], {
+            'x': {'a': {'x', 'y'}, 'b': {'x'}},
+            'y': {'b': {'z'}},
+        }, 'x', ['z'])
+        self.assertEqual(nfa.compile_nfa().determinize().minimize().table, self.fa.compile().minimize().table)
+
+    def test_empty_language(self):
+        fa = FiniteAutomation(['s', 't'], ['a'], {'s': {'a': 't'}}, 's', [])
+        minimal = fa.minimize()
+        self.assertEqual(minimal.states, ['s'])
+        self.assertEqual(minimal.transitions, {})
+        self.assertFalse(minimal.compile().accepts("a"))
+
+
+class TestProduct(unittest.TestCase):
+    def setUp(self):
+        # Strings with an even number of a's, and strings ending in b
+        self.even_a = FiniteAutomation(['e', 'o'], ['a', 'b'], {
+            'e': {'a': 'o', 'b': 'e'},
+            'o': {'a': 'e', 'b': 'o'},
+        }, 'e', ['e'])
+        self.ends_b = FiniteAutomation(['x', 'y'], ['a', 'b'], {
+            'x': {'a': {'x'}, 'b': {'x', 'y'}},
+        }, 'x', ['y'])
+        rng = random.Random(5)
+        self.strings = [''.join(rng.choices('ab', k=rng.randint(0, 10))) for _ in range(200)]
+
+    def test_operations(self):
+        expected = {
+            'intersection': lambda left, right: left and right,
+            'union': lambda left, right: left or right,
+            'difference': lambda left, right: left and not right,
+            'symmetric_difference': lambda left, right: left != right,
+        }
+        left, right = self.even_a.compile(), self.ends_b.compile_nfa()
+        for operation, accept in expected.items():
+            compiled = getattr(self.even_a, operation)(self.ends_b).compile()
+            for string in self.strings:
+                self.assertEqual(compiled.accepts(string), accept(left.accepts(string), right.accepts(string)),
+                                 (operation, string))
+
+    def test_equivalence_and_counterexample(self):
+        # The same languages, written differently
+        redundant = FiniteAutomation(['0', '1', '2', '3'], ['a', 'b'], {
+            '0': {'a': '1', 'b': '2'}, '1': {'a': '0', 'b': '3'},
+            '2': {'a': '3', 'b': '0'}, '3': {'a': '2', 'b': '1'},
+        }, '0', ['0', '2'])
+        self.assertTrue(self.even_a.equivalent(redundant))
+        self.assertIsNone(self.even_a.counterexample(redundant))
+
+        self.assertFalse(self.even_a.equivalent(self.ends_b))
+        self.assertEqual(self.even_a.counterexample(self.ends_b), "")
+        with_b = self.even_a.intersection(self.ends_b)
+        self.assertEqual(with_b.counterexample(self.ends_b), "ab")
+
+    def test_unknown_operation(self):
+        from product import product
+        with self.assertRaises(ValueError):
+            product(self.even_a.compile(), self.even_a.compile(), "concatenation")
+
+
+class TestDFAFormat(unittest.TestCase):
+    def setUp(self):
+        transitions = {'q0': {'a': {'q1'}, 'b': {'q2'}}, 'q1': {'b': {'q2', 'q1'}},
+                       'q2': {'c': {'q3'}}, 'q3': {'a': {'q1'}}}
+        fa = FiniteAutomation(['q0', 'q1', 'q2', 'q3'], ['a', 'b', 'c'], transitions, 'q0', ['q3'])
+        self.dfa = fa.compile_nfa().determinize()
+        self.strings = ["", "abc", "abbc", "abca", "abcabc", "ac", "abcd", "b c"]
+
+    def test_round_trip_through_a_mapped_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'automaton.dfa')
+            self.dfa.save(path)
+            loaded = CompiledDFA.load(path)
+            self.assertIsInstance(loaded.table, memoryview)
+            self.assertEqual(loaded.symbols, self.dfa.symbols)
+            self.assertEqual(list(loaded.table), list(self.dfa.table))
+            self.assertEqual(loaded.accepting, self.dfa.accepting)
+            for string in self.strings:
+                self.assertEqual(loaded.accepts(string), self.dfa.accepts(string), string)
+            del loaded
+
+    def test_rejects_other_data(self):
+        data = dfa_to_bytes(self.dfa)
+        with self.assertRaises(ValueError):
+            dfa_from_buffer(b'XDFA' + data[4:])
+        with self.assertRaises(ValueError):
+            dfa_from_buffer(data[:-1])
+        with self.assertRaises(ValueError):
+            dfa_to_bytes(CompiledDFA([1], self.dfa.table[:2], bytearray(2), 1))
+
+
+class TestStreamMatcher(unittest.TestCase):
+    def setUp(self):
+        # Strings over {a, b} ending in "ab"
+        self.fa = FiniteAutomation(['p0', 'p1', 'p2'], ['a', 'b'], {
+            'p0': {'a': 'p1', 'b': 'p0'},
+            'p1': {'a': 'p1', 'b': 'p2'},
+            'p2': {'a': 'p1', 'b': 'p0'},
+        }, 'p0', ['p2'])
+        self.text = "abbabaab" * 3
+
+    def expected_offsets(self, dfa, text):
+        return [end for end in range(1, len(text) + 1) if dfa.accepts(text[:end])]
+
+    def test_feed_keeps_state_between_chunks(self):
+        matcher = self.fa.matcher()
+        for chunk in ("ab", b"ba", "b", b"", "aa", "b"):
+            matcher.feed(chunk)
+        self.assertEqual(matcher.offset, 8)
+        self.assertTrue(matcher.accepted)
+        matcher.feed("x")
+        self.assertEqual(matcher.state, 0)
+        self.assertFalse(matcher.accepted)
+        matcher.reset()
+        self.assertEqual((matcher.offset, matcher.accepted), (0, False))
+
+    def test_scan_reports_accepting_offsets(self):
+        dfa = self.fa.compile()
+        expected = self.expected_offsets(dfa, self.text)
+        matcher = StreamMatcher(dfa)
+        offsets = []
+        for begin in range(0, len(self.text), 5):
+            offsets += matcher.scan(self.text[begin:begin + 5])
+        self.assertEqual(offsets, expected)
+
+        loaded = dfa_from_buffer(dfa_to_bytes(dfa))
+        stream = io.BytesIO(self.text.encode('ascii'))
+        self.assertEqual(list(StreamMatcher(loaded).scan_file(stream, buffer_size=3)), expected)
+
+    def test_file_reading_stops_at_the_dead_state(self):
+        stream = io.BytesIO(b"ab" + b"c" * 100)
+        matcher = self.fa.matcher()
+        self.assertFalse(matcher.feed_file(stream, buffer_size=4))
+        self.assertEqual(matcher.offset, 4)
+
+
+class TestTracing(unittest.TestCase):
+    def setUp(self):
+        transitions = {'q0': {'a': {'q1'}, 'b': {'q2'}}, 'q1': {'b': {'q2', 'q1'}},
+                       'q2': {'c': {'q3'}}, 'q3': {'a': {'q1'}}}
+        self.nfa = FiniteAutomation(['q0', 'q1', 'q2', 'q3'], ['a', 'b', 'c'], transitions, 'q0', ['q3'])
+
+    def test_silent_by_default(self):
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            self.assertTrue(self.nfa.string_belongs_to_language("abbc"))
+            self.assertEqual(self.nfa.check_type(), "NFA")
+            self.nfa.to_regular_grammar()
+        self.assertEqual(output.getvalue(), "")
+
+    def test_stats_count_transitions_visits_and_phases(self):
+        stats = Stats()
+        self.assertTrue(self.nfa.string_belongs_to_language("abbc", tracer=stats))
+        self.assertEqual(stats.transitions[('q1', 'b', 'q2')], 2)
+        self.assertEqual(stats.transitions_taken, 6)
+        self.assertEqual(stats.visits['q1'], 3)
+        self.assertEqual(stats.states_visited, 7)
+        self.assertEqual(stats.messages, 5)
+        self.assertEqual(stats.phase_calls['simulation'], 1)
+        exported = json.loads(stats.to_json())
+        self.assertEqual(exported['transitions_taken'], 6)
+        self.assertIn('simulation', exported['phases'])
+
+    def test_verbose_sink(self):
+        output = io.StringIO()
+        stats = Stats()
+        self.nfa.check_type(tracer=Tracers([VerboseTracer(output), stats]))
+        self.assertIn("it can transition to multiple states", output.getvalue())
+        self.assertTrue(output.getvalue().endswith("The FA is an NFA.\n"))
+        self.assertEqual(stats.phase_calls['check_type'], 1)
+
+
+class TestAnalysis(unittest.TestCase):
+    def setUp(self):
+        # a b* c, plus an unreachable state u and a state t that cannot accept
+        self.fa = FiniteAutomation(['s', 'm', 'f', 't', 'u'], ['a', 'b', 'c'], {
+            's': {'a': 'm', 'c': 't'},
+            'm': {'b': 'm', 'c': 'f'},
+            't': {'a': 't'},
+            'u': {'a': 'f'},
+        }, 's', ['f'])
+
+    def test_reachability(self):
+        dfa = self.fa.compile()
+        names = lambda flags: {dfa.labels[state] for state, flag in enumerate(flags) if flag}
+        self.assertEqual(names(analysis.reachable_states(dfa)), {None, 's', 'm', 'f', 't'})
+        self.assertEqual(names(analysis.coreachable_states(dfa)), {'s', 'm', 'f', 'u'})
+        self.assertEqual(names(analysis.live_states(dfa)), {'s', 'm', 'f'})
+
+    def test_emptiness_and_finiteness(self):
+        self.assertFalse(self.fa.is_empty())
+        self.assertFalse(self.fa.is_finite())
+        no_loop = FiniteAutomation(['s', 'f'], ['a', 'b'], {'s': {'a': 'f', 'b': 'f'}}, 's', ['f'])
+        self.assertTrue(no_loop.is_finite())
+        unreachable = FiniteAutomation(['s', 'f'], ['a'], {'s': {'a': 's'}, 'f': {'a': 'f'}}, 's', ['f'])
+        self.assertTrue(unreachable.is_empty())
+        self.assertTrue(unreachable.is_finite())
+
+    def test_counting(self):
+        dfa = self.fa.compile()
+        # a b^(n-2) c for every n >= 2
+        self.assertEqual(analysis.accepted_counts(dfa, 5), [0, 0, 1, 1, 1, 1])
+        everything = FiniteAutomation(['s'], ['a', 'b', 'c'], {'s': {'a': 's', 'b': 's', 'c': 's'}}, 's', ['s'])
+        self.assertEqual(everything.count_accepted(40), sum(3 ** n for n in range(41)))
+
+    def test_is_deterministic(self):
+        self.assertTrue(self.fa.is_deterministic())
+        self.assertFalse(FiniteAutomation(['s'], ['a'], {'s': {'a': {'s', 't'}}}, 's', []).is_deterministic())
+
+
+class TestUniformSampler(unittest.TestCase):
+    def setUp(self):
+        # Strings over {a, b} without two consecutive b's
+        self.fa = FiniteAutomation(['x', 'y'], ['a', 'b'], {
+            'x': {'a': 'x', 'b': 'y'},
+            'y': {'a': 'x'},
+        }, 'x', ['x', 'y'])
+
+    def test_counts_are_exact(self):
+        sampler = self.fa.sampler()
+        # Fibonacci numbers, far beyond the range of floats
+        fibonacci = [1, 2]
+        while len(fibonacci) <= 2000:
+            fibonacci.append(fibonacci[-1] + fibonacci[-2])
+        self.assertEqual(sampler.count(2000), fibonacci[2000])
+        self.assertEqual(sampler.count(-1), 0)
+
+    def test_samples_are_uniform_and_accepted(self):
+        sampler = self.fa.sampler(random.Random(6))
+        samples = sampler.samples(4, 8000)
+        self.assertEqual(set(samples), {string for string in map(''.join, itertools.product('ab', repeat=4))
+                                        if 'bb' not in string})
+        counts = defaultdict(int)
+        for string in samples:
+            counts[string] += 1
+        for count in counts.values():
+            self.assertAlmostEqual(count / len(samples), 1 / 8, delta=0.03)
+        self.assertEqual(len(sampler.sample(500)), 500)
+
+    def test_no_string_of_that_length(self):
+        fa = FiniteAutomation(['s', 'f'], ['a'], {'s': {'a': 'f'}}, 's', ['f'])
+        with self.assertRaises(ValueError):
+            fa.sampler().sample(2)
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,216 @@
+import io
+import mmap
+import os
+import tempfile
+import unittest
+from lexer import (Lexer, Tokenizer, MasterPatternTokenizer, TokenType, TokenBuffer, TokenIndex, LazyTokenIndex,
+                   DiagnosticMessage, TOKEN_CATEGORIES, IS_MESSAGE_OPERATOR, IS_TRIVIA, token_types_in)
+from incremental_lexer import IncrementalLexer
+from batch_lint import lint_files, find_diagram_files, report_order
+
+SAMPLE_DIAGRAM = """
+sequence "Sample Diagram" {
+    actor User;
+    boundary UI;
+    control System;
+    entity Database;
+    object log:Logger::infra;
+
+    User -> UI: "Login" <<call>>;
+    UI => System: "Validate credentials" << send >>;
+    System -x> Database: "Query user";
+    Database --> System: "User data";
+    System -o> UI: "Timeout";
+    UI <-> User: "Session";
+    Database |< System: "Bulk";
+    /* block comment */ // line comment
+    alt {
+        case ("valid") {
+            System --> UI: "Valid user";
+        }
+    }
+    User @#$ System: "bad token";
+}
+"""
+
+
+class TestTokenizerEngines(unittest.TestCase):
+    def test_master_engine_matches_default(self):
+        expected = Tokenizer().tokenize(SAMPLE_DIAGRAM)
+        actual = MasterPatternTokenizer().tokenize(SAMPLE_DIAGRAM)
+        self.assertEqual(actual, expected)
+
+    def test_master_engine_priority(self):
+        tokens, _ = MasterPatternTokenizer().tokenize("a --> b <<call>> sequence")
+        self.assertEqual(
+            [token.type for token in tokens],
+            [TokenType.IDENTIFIER, TokenType.RETURN_OPERATOR, TokenType.IDENTIFIER,
+             TokenType.STEREOTYPE_CALL, TokenType.DIAGRAM_KEYWORD]
+        )
+
+    def test_invalid_token_diagnostic(self):
+        _, diagnostics = MasterPatternTokenizer().tokenize("User @#$ System;")
+        self.assertEqual(len(diagnostics), 1)
+        self.assertEqual(diagnostics[0].message, "Invalid token: '@#$'")
+        self.assertEqual((diagnostics[0].line, diagnostics[0].column), (1, 6))
+
+    def test_positional_mode_matches_default(self):
+        expected = Tokenizer().tokenize(SAMPLE_DIAGRAM)
+        for tokenizer_class in (Tokenizer, MasterPatternTokenizer):
+            self.assertEqual(tokenizer_class(positional=True).tokenize(SAMPLE_DIAGRAM), expected)
+
+    def test_positional_mode_counts_newlines_in_strings(self):
+        tokens, _ = Tokenizer(positional=True).tokenize('a: "two\nlines";\n  b;')
+        self.assertEqual((tokens[-2].line, tokens[-2].column), (3, 3))
+
+    def test_iter_tokens_across_chunk_boundaries(self):
+        text = SAMPLE_DIAGRAM + 'a: "multi\nline"; << \n create >> /* open'
+        tokenizer = MasterPatternTokenizer(positional=True)
+        expected = tokenizer.tokenize(text)
+        for chunk_size in (1, 2, 3, 7, 64, 1 << 16):
+            diagnostics = []
+            tokens = list(tokenizer.iter_tokens(io.StringIO(text), chunk_size, diagnostics))
+            self.assertEqual((tokens, diagnostics), expected, f"chunk_size={chunk_size}")
+
+    def test_iter_tokens_from_mmap(self):
+        text = SAMPLE_DIAGRAM.replace("Login", "Login \u00e9")
+        with tempfile.TemporaryFile() as handle:
+            handle.write(text.encode('utf-8'))
+            handle.flush()
+            with mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                tokens = list(Tokenizer().iter_tokens(mapped, chunk_size=5))
+        self.assertEqual(tokens, Tokenizer(positional=True).tokenize(text)[0])
+
+    def test_token_buffer_matches_token_list(self):
+        tokenizer = MasterPatternTokenizer(positional=True)
+        tokens, diagnostics = tokenizer.tokenize(SAMPLE_DIAGRAM)
+        buffer, buffer_diagnostics = tokenizer.tokenize_to_buffer(SAMPLE_DIAGRAM)
+
+        self.assertIsInstance(buffer, TokenBuffer)
+        self.assertEqual(buffer_diagnostics, diagnostics)
+        self.assertEqual(len(buffer), len(tokens))
+        self.assertEqual(list(buffer), tokens)
+        self.assertEqual(buffer[3], tokens[3])
+        self.assertEqual(buffer[-2:], tokens[-2:])
+        self.assertEqual((buffer.type_at(0), buffer.value_at(0)), (TokenType.DIAGRAM_KEYWORD, "sequence"))
+
+        self.assertEqual(Lexer(compact=True).process(SAMPLE_DIAGRAM), Lexer(positional=True).process(SAMPLE_DIAGRAM))
+
+    def test_lexer_engine_selection(self):
+        self.assertIsInstance(Lexer(engine="master").tokenizer, MasterPatternTokenizer)
+        with self.assertRaises(ValueError):
+            Lexer(engine="unknown")
+
+        expected = Lexer().process(SAMPLE_DIAGRAM)
+        actual = Lexer(engine="master").process(SAMPLE_DIAGRAM)
+        self.assertEqual(actual, expected)
+
+    def test_token_index(self):
+        index = TokenIndex()
+        tokens, _ = MasterPatternTokenizer(positional=True).tokenize(SAMPLE_DIAGRAM + '( { ) }', index)
+        self.assertEqual(list(index.partners), list(TokenIndex(tokens).partners))
+
+        values = [token.value for token in tokens]
+        opening = values.index('alt') + 1
+        self.assertEqual(values[index.partner(opening)], '}')
+        self.assertEqual(index.partner(index.partner(opening)), opening)
+        self.assertEqual(values[index.next_semicolon(1)], ';')
+        self.assertEqual(index.next_semicolon(len(tokens) - 4), len(tokens))
+
+        lazy = LazyTokenIndex(tokens)
+        for i in reversed(range(len(tokens))):
+            self.assertEqual((lazy.partner(i), lazy.next_semicolon(i)), (index.partner(i), index.next_semicolon(i)))
+
+    def test_token_categories(self):
+        self.assertEqual(set(TOKEN_CATEGORIES), set(TokenType))
+        self.assertEqual(token_types_in(IS_TRIVIA), {TokenType.COMMENT, TokenType.WHITESPACE})
+        self.assertEqual(len(token_types_in(IS_MESSAGE_OPERATOR)), 7)
+        self.assertFalse(TOKEN_CATEGORIES[TokenType.IDENTIFIER] & (IS_MESSAGE_OPERATOR | IS_TRIVIA))
+
+    def test_block_scans_with_nested_and_unclosed_blocks(self):
+        text = ('sequence D {\n    actor A;\n    actor B;\n'
+                '    alt { opt { A -> B: "m"; } }\n'
+                '    par { alt { A -> B; }\n'
+                '    opt A -> B;\n')
+        result = Lexer(positional=True).process(text)
+        self.assertEqual(
+            [(d.message, d.line) for d in result["errors"]],
+            [("Missing closing brace for par block", 5), ("Missing opening brace for opt block", 6)]
+        )
+
+        deep = 'sequence D {\n' + 'alt {\n' * 3000 + '}\n' * 3000 + 'opt\n'
+        result = Lexer(positional=True).process(deep)
+        self.assertEqual([d.message for d in result["errors"]], ["Missing opening brace for opt block"])
+
+
+class TestIncrementalLexer(unittest.TestCase):
+    EDITS = [
+        (SAMPLE_DIAGRAM.index('UI =>'), 0, 'x'),                  # grow an identifier
+        (SAMPLE_DIAGRAM.index('"Query user"'), 1, ''),            # break a string
+        (SAMPLE_DIAGRAM.index('"Query user"'), 0, '"'),           # and fix it again
+        (SAMPLE_DIAGRAM.index('    entity'), 0, 'actor User;\n'), # duplicate participant
+        (SAMPLE_DIAGRAM.index('alt'), 0, '\n\n'),                 # shift every later line
+        (len(SAMPLE_DIAGRAM) - 2, 2, ''),                         # drop the closing brace
+        (0, 0, '/* header */'),
+    ]
+
+    def test_edits_match_full_processing(self):
+        lexer = IncrementalLexer(SAMPLE_DIAGRAM, checkpoint_interval=4, block_size=4)
+        for offset, deleted_length, inserted_text in self.EDITS:
+            result = lexer.apply_edit(offset, deleted_length, inserted_text)
+            self.assertEqual(result, Lexer(positional=True).process(lexer.text))
+
+    def test_edit_work_is_local(self):
+        statements = ''.join(f'    actor P{i};\n' for i in range(20))
+        statements += '    P1 -> P2: "call";\n    alt { case ("x") { P2 --> P1: "ok"; } }\n' * 500
+        lexer = IncrementalLexer('sequence Big {\n' + statements + '}\n')
+        offset = lexer.text.index('alt', len(lexer.text) // 2)
+
+        result = lexer.apply_edit(offset, 0, 'x')
+        self.assertLessEqual(lexer.relexed_tokens, 3)
+        self.assertGreater(lexer.revalidated_from, len(lexer.tokens) // 3)
+        self.assertLess(lexer.revalidated_to - lexer.revalidated_from, 100)
+        self.assertEqual(result, Lexer(positional=True).process(lexer.text))
+
+        # Undoing it resumes the checkpoints the broken structure left behind
+        result = lexer.apply_edit(offset, 1, '')
+        self.assertLess(lexer.revalidated_to - lexer.revalidated_from, 100)
+        self.assertEqual(result, Lexer(positional=True).process(lexer.text))
+
+        offset = lexer.text.index('"call"', len(lexer.text) // 2)
+        result = lexer.apply_edit(offset + 1, 0, 'x\n')
+        self.assertLess(lexer.revalidated_to - lexer.revalidated_from, 100)
+        self.assertEqual(result, Lexer(positional=True).process(lexer.text))
+
+    def test_invalid_edit(self):
+        with self.assertRaises(ValueError):
+            IncrementalLexer("sequence {}").apply_edit(5, 20, "")
+
+
+class TestBatchLint(unittest.TestCase):
+    def test_parallel_results_in_fixed_order(self):
+        diagrams = [SAMPLE_DIAGRAM, "actor User;", SAMPLE_DIAGRAM.replace("Database;", "Database;\n    actor UI;")]
+        with tempfile.TemporaryDirectory() as directory:
+            for i, text in enumerate(diagrams):
+                with open(os.path.join(directory, f"d{i}.seq"), "w", encoding="utf-8") as handle:
+                    handle.write(text)
+            files = find_diagram_files([directory])
+            self.assertEqual([os.path.basename(f) for f in files], ["d0.seq", "d1.seq", "d2.seq"])
+
+            results = lint_files(files, jobs=2, chunksize=1)
+            self.assertEqual(results, lint_files(files, jobs=1))
+
+        self.assertEqual([result.path for result in results], files)
+        for result, text in zip(results, diagrams):
+            expected = Lexer(positional=True).process(text)
+            self.assertEqual(result.diagnostics, expected["errors"] + expected["warnings"])
+            self.assertEqual(result.success, expected["success"])
+
+    def test_errors_are_reported_before_warnings(self):
+        warning = DiagnosticMessage("unreturned", 2, 1, severity="warning")
+        errors = [DiagnosticMessage("invalid token", 1, 1), DiagnosticMessage("duplicate", 3, 1)]
+        self.assertEqual(report_order([errors[0], warning, errors[1]]), errors + [warning])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,155 @@
+"""
+Structural queries on a CompiledDFA, each linear in the number of transitions
+(counting strings, per length counted): which states are reachable or can
+still accept, whether the language is empty or finite, and how many strings
+it has up to a length.
+"""
+from collections import Counter
+from typing import List
+
+from compiled_automaton import DEAD, CompiledDFA
+
+
+def reachable_states(dfa: CompiledDFA) -> bytearray:
+    """flags[state] is 1 for every state reachable from the start state."""
+    k = dfa.n_symbols
+    table = dfa.table
+    flags = bytearray(dfa.n_states)
+    flags[dfa.start] = 1
+    queue = [dfa.start]
+    for state in queue:
+        row = state * k
+        for target in table[row:row + k]:
+            if not flags[target]:
+                flags[target] = 1
+                queue.append(target)
+    return flags
+
+
+def coreachable_states(dfa: CompiledDFA) -> bytearray:
+    """flags[state] is 1 for every state from which an accepting state is reachable."""
+    k = dfa.n_symbols
+    predecessors: List[List[int]] = [[] for _ in range(dfa.n_states)]
+    for symbol in range(k):
+        for source, target in enumerate(dfa.table[symbol::k]):
+            predecessors[target].append(source)
+    # Nothing is accepted past DEAD, so edges into it never matter
+    predecessors[DEAD] = []
+
+    flags = bytearray(dfa.accepting)
+    queue = [state for state, accepting in enumerate(flags) if accepting]
+    for state in queue:
+        for source in predecessors[state]:
+            if not flags[source]:
+                flags[source] = 1
+                queue.append(source)
+    return flags
+
+
+def live_states(dfa: CompiledDFA) -> bytearray:
+    """flags[state] is 1 for every state that is both reachable and co-reachable."""
+    reachable = reachable_states(dfa)
+    coreachable = coreachable_states(dfa)
+    return bytearray(a & b for a, b in zip(reachable, coreachable))
+
+
+def is_empty(dfa: CompiledDFA) -> bool:
+    """Whether the automaton accepts no string at all; stops at the first accepting state found."""
+    if dfa.accepting[dfa.start]:
+        return False
+    k = dfa.n_symbols
+    table = dfa.table
+    accepting = dfa.accepting
+    seen = bytearray(dfa.n_states)
+    seen[dfa.start] = 1
+    queue = [dfa.start]
+    for state in queue:
+        row = state * k
+        for target in table[row:row + k]:
+            if not seen[target]:
+                if accepting[target]:
+                    return False
+                seen[target] = 1
+                queue.append(target)
+    return True
+
+
+def is_finite(dfa: CompiledDFA) -> bool:
+    """
+    Whether the automaton accepts finitely many strings, i.e. whether the
+    graph of its live states (see live_states) has no cycle. Cycles are found
+    by peeling off states without incoming edges (Kahn's algorithm): the
+    graph is acyclic exactly when every live state gets peeled.
+    """
+    live = live_states(dfa)
+    k = dfa.n_symbols
+    table = dfa.table
+    states = [state for state, flag in enumerate(live) if flag]
+    in_degree = [0] * dfa.n_states
+    for state in states:
+        row = state * k
+        for target in table[row:row + k]:
+            if live[target]:
+                in_degree[target] += 1
+
+    queue = [state for state in states if not in_degree[state]]
+    for state in queue:
+        row = state * k
+        for target in table[row:row + k]:
+            if live[target]:
+                in_degree[target] -= 1
+                if not in_degree[target]:
+                    queue.append(target)
+    return len(queue) == len(states)
+
+
+def accepted_counts(dfa: CompiledDFA, max_length: int) -> List[int]:
+    """
+    counts[n] is the number of strings of length n accepted, for n up to
+    max_length. Dynamic programming over the transition matrix restricted to
+    live states: the vector of the number of strings leading from the start
+    state to each state is multiplied by the matrix once per length. Counts
+    are exact integers of any size.
+    """
+    live = live_states(dfa)
+    if not live[dfa.start]:
+        return [0] * (max_length + 1)
+    k = dfa.n_symbols
+    table = dfa.table
+
+    # Each live state's live successors, with the number of symbols leading there
+    ids = {}
+    states = []
+    for state, flag in enumerate(live):
+        if flag:
+            ids[state] = len(states)
+            states.append(state)
+    successors = []
+    for state in states:
+        row = state * k
+        targets = [ids[target] for target in table[row:row + k] if live[target]]
+        if len(set(targets)) == len(targets):
+            successors.append([(target, 1) for target in targets])
+        else:
+            successors.append(list(Counter(targets).items()))
+    accepting = [i for i, state in enumerate(states) if dfa.accepting[state]]
+
+    vector = [0] * len(states)
+    vector[ids[dfa.start]] = 1
+    counts = []
+    for length in range(max_length + 1):
+        counts.append(sum(vector[i] for i in accepting))
+        if length == max_length:
+            break
+        next_vector = [0] * len(states)
+        for i, paths in enumerate(vector):
+            if paths:
+                for target, symbols in successors[i]:
+                    next_vector[target] += paths * symbols
+        vector = next_vector
+    return counts
+
+
+def count_accepted(dfa: CompiledDFA, max_length: int) -> int:
+    """Number of accepted strings of length at most max_length."""
+    return sum(accepted_counts(dfa, max_length))
@@ -0,0 +1,122 @@
+"""
+Lint many sequence diagram files in parallel.
+
+    python batch_lint.py diagrams/ more.seq --jobs 8
+"""
+import argparse
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Iterable, List, Optional, Tuple
+
+from lexer import DiagnosticMessage, SemanticValidator, TOKENIZER_ENGINES
+
+# (severity, line, column, message): what a worker sends back for each diagnostic
+CompactDiagnostic = Tuple[str, int, int, str]
+
+_tokenizer = None
+
+
+@dataclass
+class LintResult:
+    path: str
+    # In report_order
+    diagnostics: List[DiagnosticMessage]
+
+    @property
+    def success(self) -> bool:
+        return not any(d.severity == "error" for d in self.diagnostics)
+
+
+def _init_worker(engine: str) -> None:
+    global _tokenizer
+    _tokenizer = TOKENIZER_ENGINES[engine](positional=True)
+
+
+def _lint_path(path: str) -> Tuple[str, List[CompactDiagnostic]]:
+    """Lint one file in a worker; only the path and compact diagnostics cross processes."""
+    try:
+        with open(path, encoding='utf-8') as handle:
+            text = handle.read()
+    except (OSError, UnicodeDecodeError) as error:
+        return path, [("error", 0, 0, f"Cannot read file: {error}")]
+
+    tokens, diagnostics = _tokenizer.tokenize(text)
+    # A fresh validator per file, since trackers keep state between validate() calls
+    diagnostics += SemanticValidator().validate(tokens)
+    return path, [(d.severity, d.line, d.column, d.message) for d in report_order(diagnostics)]
+
+
+def report_order(diagnostics: List[DiagnosticMessage]) -> List[DiagnosticMessage]:
+    """Errors, then warnings, each in the order found, as Lexer.process reports them."""
+    return ([d for d in diagnostics if d.severity == "error"] +
+            [d for d in diagnostics if d.severity != "error"])
+
+
+def find_diagram_files(paths: Iterable[str], extension: str = '.seq') -> List[str]:
+    """Expand directories into the diagram files below them, sorted for a stable order."""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, names in os.walk(path):
+                files.extend(os.path.join(root, name) for name in names if name.endswith(extension))
+        else:
+            files.append(path)
+    return sorted(files)
+
+
+def lint_files(paths: Iterable[str], jobs: Optional[int] = None, engine: str = "master",
+               chunksize: int = 16) -> List[LintResult]:
+    """
+    Lint files across a process pool of jobs workers (all cores by default).
+    Results come back in the order of paths, whatever order workers finish in.
+    """
+    if engine not in TOKENIZER_ENGINES:
+        raise ValueError(f"Unknown tokenizer engine: '{engine}'")
+    paths = list(paths)
+
+    if jobs == 1 or len(paths) <= 1:
+        _init_worker(engine)
+        compact_results = map(_lint_path, paths)
+        return [_expand(path, compact) for path, compact in compact_results]
+
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker, initargs=(engine,)) as executor:
+        compact_results = executor.map(_lint_path, paths, chunksize=chunksize)
+        return [_expand(path, compact) for path, compact in compact_results]
+
+
+def _expand(path: str, compact: List[CompactDiagnostic]) -> LintResult:
+    return LintResult(path, [
+        DiagnosticMessage(message=message, line=line, column=column, severity=severity)
+        for severity, line, column, message in compact
+    ])
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Lint sequence diagram files in parallel.")
+    parser.add_argument('paths', nargs='+', help="diagram files or directories to search")
+    parser.add_argument('--jobs', '-j', type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument('--engine', choices=sorted(TOKENIZER_ENGINES), default="master")
+    parser.add_argument('--extension', default='.seq', help="file extension searched in directories")
+    parser.add_argument('--quiet', '-q', action='store_true', help="only print errors")
+    args = parser.parse_args(argv)
+
+    files = find_diagram_files(args.paths, args.extension)
+    results = lint_files(files, jobs=args.jobs, engine=args.engine)
+
+    failed = 0
+    for result in results:
+        for d in result.diagnostics:
+            if args.quiet and d.severity != "error":
+                continue
+            print(f"{result.path}:{d.line}:{d.column}: {d.severity}: {d.message}")
+        if not result.success:
+            failed += 1
+
+    print(f"{len(results)} files checked, {failed} with errors", file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,4 @@
+"""Performance benchmarks for the lexer and automata modules.
+
+Run them from the ``codes`` directory, e.g. ``python -m benchmarks.tokenizer_scaling``.
+"""
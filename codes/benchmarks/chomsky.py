@@ -0,0 +1,98 @@
+"""
+Chomsky classification of grammars with many productions: the one-pass
+classifier with diagnostics against the former heuristic, and the cost of a
+cached call and of a call after a mutation.
+
+    python -m benchmarks.chomsky [--productions 100000]
+"""
+import argparse
+import random
+import sys
+import time
+
+from Grammar import Grammar
+
+
+def make_grammar(kind, productions, non_terminals=1000, seed=1):
+    """
+    A grammar with the given number of productions spread over the
+    non-terminals N0, N1, ...: right-linear for kind "regular", with two
+    non-terminals on some right-hand sides for "context-free", and with some
+    left-hand sides of a non-terminal and a terminal for "context-sensitive".
+    """
+    rng = random.Random(seed)
+    names = [f"N{i}" for i in range(non_terminals)]
+    terminals = list('abcdefgh')
+    rules = {name: [] for name in names}
+    for i in range(productions):
+        lhs = names[i % non_terminals]
+        right = rng.choices(terminals, k=rng.randint(1, 4)) + [rng.choice(names)]
+        if kind != "regular" and i % 10 == 0:
+            right.insert(1, rng.choice(names))
+        if kind == "context-sensitive" and i % 10 == 5:
+            lhs = f"{lhs} {rng.choice(terminals)}"
+        rules.setdefault(lhs, []).append(right)
+    return Grammar(names, terminals, names[0], rules)
+
+
+def legacy_type(grammar):
+    """The classification find_Chomsky_type made before the classifier."""
+    is_type3 = True
+    is_type2 = True
+    is_type1 = True
+    for non_terminal, productions in grammar.rules.items():
+        if non_terminal not in grammar.non_terminals:
+            return "Type-0"
+        if len(non_terminal) != 1 or non_terminal not in grammar.non_terminals:
+            is_type2 = False
+        for production in productions:
+            if production == "":
+                continue
+            if all(symbol in grammar.terminals for symbol in production):
+                continue
+            if (len(production) >= 2 and
+                    all(symbol in grammar.terminals for symbol in production[:-1]) and
+                    production[-1] in grammar.non_terminals):
+                continue
+            is_type3 = False
+            if len(production) < len(non_terminal) or not any(symbol in grammar.non_terminals for symbol in production):
+                is_type1 = False
+    if is_type3:
+        return "Type-3"
+    if is_type2:
+        return "Type-2"
+    if is_type1:
+        return "Type-1"
+    return "Type-0"
+
+
+def timed(function):
+    start = time.perf_counter()
+    result = function()
+    return time.perf_counter() - start, result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--productions', type=int, default=100_000)
+    parser.add_argument('--non-terminals', type=int, default=1000)
+    args = parser.parse_args(argv)
+
+    print(f"{'grammar':18} {'type':7} {'broken':>7} {'legacy ms':>10} {'first ms':>10} {'cached µs':>10} {'mutated ms':>11}")
+    for kind in ("regular", "context-free", "context-sensitive"):
+        grammar = make_grammar(kind, args.productions, args.non_terminals)
+        legacy_seconds, _ = timed(lambda: legacy_type(grammar))
+        first_seconds, classification = timed(grammar.classify)
+        cached_seconds, cached = timed(grammar.classify)
+        if cached is not classification:
+            raise AssertionError("the classification was not cached")
+        grammar.rules[grammar.start_symbol].append(['a'])
+        mutated_seconds, _ = timed(grammar.classify)
+        print(f"{kind:18} {classification.name:7} {len(classification.diagnostics):7} "
+              f"{legacy_seconds * 1000:10.1f} {first_seconds * 1000:10.1f} "
+              f"{cached_seconds * 1e6:10.2f} {mutated_seconds * 1000:11.1f}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,55 @@
+"""
+Startup cost of a large DFA: compiling it from a FiniteAutomation against
+memory-mapping a file written by CompiledDFA.save, and matching speed of each.
+
+    python -m benchmarks.dfa_load [--states 200000] [--strings 100000]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+from compiled_automaton import CompiledDFA
+from benchmarks.dfa_batch import make_automaton
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--states', type=int, default=200_000)
+    parser.add_argument('--strings', type=int, default=100_000)
+    parser.add_argument('--length', type=int, default=40, help="maximum string length")
+    args = parser.parse_args(argv)
+
+    alphabet = 'abcdefgh'
+    automaton = make_automaton(args.states, alphabet)
+    start = time.perf_counter()
+    compiled = automaton.compile()
+    compile_seconds = time.perf_counter() - start
+
+    rng = random.Random(1)
+    strings = [''.join(rng.choices(alphabet, k=rng.randint(1, args.length))) for _ in range(args.strings)]
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'automaton.dfa')
+        compiled.save(path)
+        start = time.perf_counter()
+        loaded = CompiledDFA.load(path)
+        load_seconds = time.perf_counter() - start
+
+        timings = []
+        for dfa in (compiled, loaded):
+            start = time.perf_counter()
+            results = [dfa.accepts(string) for string in strings]
+            timings.append((time.perf_counter() - start, results))
+        if timings[0][1] != timings[1][1]:
+            raise AssertionError("the loaded automaton disagrees with the compiled one")
+        del loaded, dfa
+
+    print(f"compile {compile_seconds * 1000:10.1f} ms   {args.strings / timings[0][0]:12,.0f} strings/s")
+    print(f"load    {load_seconds * 1000:10.1f} ms   {args.strings / timings[1][0]:12,.0f} strings/s")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
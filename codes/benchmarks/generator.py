@@ -0,0 +1,85 @@
+"""
+Synthetic sequence diagrams for benchmarks, with a controlled number of
+participants and messages, block nesting depth, comment density and error rate.
+The same spec and seed always give the same text.
+"""
+import random
+from dataclasses import dataclass
+
+PARTICIPANT_TYPES = ['actor', 'boundary', 'control', 'entity', 'database']
+OPERATORS = ['->', '=>', '-x>', '-o>', '<->', '|<']
+CONTROL_KEYWORDS = ['alt', 'opt', 'par', 'while', 'for']
+COMMENTS = ['// {0} talks to {1}', '/* {0} -> {1} */']
+
+
+@dataclass
+class DiagramSpec:
+    participants: int = 10
+    messages: int = 1000
+    # Deepest nesting of control blocks around messages; 0 keeps every message at top level
+    nesting: int = 0
+    # Chance of a comment line before each message
+    comment_density: float = 0.0
+    # Chance of each message being replaced by an erroneous statement
+    error_rate: float = 0.0
+    seed: int = 0
+
+
+def generate_diagram(spec: DiagramSpec) -> str:
+    """Build the text of a diagram following spec."""
+    rng = random.Random(spec.seed)
+    names = [f'P{i}' for i in range(max(spec.participants, 1))]
+    lines = ['sequence "Generated" {']
+    for i, name in enumerate(names):
+        lines.append(f'    {PARTICIPANT_TYPES[i % len(PARTICIPANT_TYPES)]} {name};')
+
+    # Calls waiting for a return, so that most sync messages get one
+    pending = []
+    depth = 0
+    for m in range(spec.messages):
+        indent = '    ' * (depth + 1)
+
+        # Open or close a block every few messages, wandering between 0 and nesting
+        if spec.nesting and m % 4 == 0:
+            if depth < spec.nesting and (depth == 0 or rng.random() < 0.5):
+                keyword = rng.choice(CONTROL_KEYWORDS)
+                lines.append(f'{indent}{keyword} ("c{m}") {{')
+                depth += 1
+                indent += '    '
+            elif depth:
+                depth -= 1
+                indent = '    ' * (depth + 1)
+                lines.append(f'{indent}}}')
+
+        sender, receiver = rng.sample(names, 2) if len(names) > 1 else (names[0], names[0])
+        if spec.comment_density and rng.random() < spec.comment_density:
+            lines.append(indent + rng.choice(COMMENTS).format(sender, receiver))
+
+        if spec.error_rate and rng.random() < spec.error_rate:
+            lines.append(indent + _error_statement(rng, sender, receiver, m))
+        elif pending and rng.random() < 0.4:
+            caller, callee = pending.pop()
+            lines.append(f'{indent}{callee} --> {caller}: "result {m}";')
+        else:
+            operator = rng.choice(OPERATORS)
+            if operator == '->':
+                pending.append((sender, receiver))
+            lines.append(f'{indent}{sender} {operator} {receiver}: "message {m}";')
+
+    while depth:
+        depth -= 1
+        lines.append('    ' * (depth + 1) + '}')
+    lines.append('}')
+    return '\n'.join(lines) + '\n'
+
+
+def _error_statement(rng: random.Random, sender: str, receiver: str, m: int) -> str:
+    """A statement with one lexical or semantic error."""
+    kind = rng.randrange(4)
+    if kind == 0:
+        return f'{sender} @#$ {receiver}: "invalid token {m}";'
+    if kind == 1:
+        return f'Ghost{m} -> {receiver}: "undeclared";'
+    if kind == 2:
+        return f'{sender} --> {receiver}: "unmatched return {m}";'
+    return f'opt ("{m}") {sender} -> {receiver};'
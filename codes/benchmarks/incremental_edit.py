@@ -0,0 +1,83 @@
+"""
+Regression benchmark for IncrementalLexer: the latency of an edit must not grow
+with the size of the document. Exits with status 1 when it does.
+
+    python -m benchmarks.incremental_edit [--max-statements 20000] [--tolerance 4.0]
+"""
+import argparse
+import gc
+import sys
+import time
+
+from incremental_lexer import IncrementalLexer
+
+ACTORS = ''.join(f'    actor P{i};\n' for i in range(20))
+STATEMENTS = '    P1 -> P2: "call";\n    alt { case ("x") { P2 --> P1: "ok"; } }\n'
+
+SIZES = [2_000, 20_000]
+
+# (name, text the edit is made at, offset into it, inserted text); every edit
+# is undone before the next one, which is timed as well
+EDITS = [
+    ('string', '"call"', 1, 'x'),
+    ('newline', '    alt', 0, '\n'),
+    ('keyword', 'alt', 0, 'x'),
+]
+
+
+def make_diagram(statements):
+    return 'sequence Big {\n' + ACTORS + STATEMENTS * statements + '}\n'
+
+
+def time_edits(lexer, target, shift, inserted, repeat):
+    """Return the median seconds of an edit and of its undo at repeat places past the middle."""
+    edits, undos = [], []
+    # Like timeit, keep the cyclic collector out of the measurement
+    gc.disable()
+    try:
+        for k in range(repeat):
+            offset = lexer.text.index(target, len(lexer.text) // 2 + k * 200) + shift
+            start = time.perf_counter()
+            lexer.apply_edit(offset, 0, inserted)
+            edits.append(time.perf_counter() - start)
+            start = time.perf_counter()
+            lexer.apply_edit(offset, len(inserted), '')
+            undos.append(time.perf_counter() - start)
+    finally:
+        gc.enable()
+    return sorted(edits)[repeat // 2], sorted(undos)[repeat // 2]
+
+
+def run(sizes, repeat):
+    """Return {edit name: [(tokens, edit seconds, undo seconds), ...]}."""
+    results = {name: [] for name, _, _, _ in EDITS}
+    for size in sizes:
+        lexer = IncrementalLexer(make_diagram(size))
+        for name, target, shift, inserted in EDITS:
+            results[name].append((len(lexer.tokens),) + time_edits(lexer, target, shift, inserted, repeat))
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--max-statements', type=int, default=SIZES[-1])
+    parser.add_argument('--repeat', type=int, default=21)
+    parser.add_argument('--tolerance', type=float, default=4.0)
+    args = parser.parse_args(argv)
+
+    sizes = [size for size in SIZES if size <= args.max_statements]
+    flat = True
+    for name, timings in run(sizes, args.repeat).items():
+        print(f"{name}:")
+        for tokens, edit, undo in timings:
+            print(f"  {tokens:>8} tokens  edit {edit * 1e3:7.2f} ms  undo {undo * 1e3:7.2f} ms")
+        slowest = max(max(edit, undo) for _, edit, undo in timings)
+        fastest = min(min(edit, undo) for _, edit, undo in timings)
+        if slowest > args.tolerance * fastest:
+            print(f"  latency grew more than {args.tolerance}x with the document")
+            flat = False
+    return 0 if flat else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,161 @@
+"""
+Benchmark suite for Lexer.process: times Tokenizer.tokenize and
+SemanticValidator.validate separately on generated diagrams, reports tokens/sec
+and peak RSS per case, and saves the results as JSON. With --compare, exits with
+status 1 when a case got slower than a saved baseline by more than --threshold.
+
+    python -m benchmarks.lexer_suite [--output results.json] [--compare baseline.json]
+"""
+import argparse
+import gc
+import json
+import platform
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict
+from multiprocessing import get_context
+from typing import Any, Dict, List, Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+from lexer import SemanticValidator, TOKENIZER_ENGINES
+from benchmarks.generator import DiagramSpec, generate_diagram
+
+CASES: Dict[str, DiagramSpec] = {
+    "small": DiagramSpec(participants=5, messages=100),
+    "medium": DiagramSpec(participants=20, messages=10_000),
+    "large": DiagramSpec(participants=50, messages=100_000),
+    "many-participants": DiagramSpec(participants=5_000, messages=10_000),
+    "deep-nesting": DiagramSpec(participants=20, messages=10_000, nesting=50),
+    "comment-heavy": DiagramSpec(participants=20, messages=10_000, comment_density=0.8),
+    "error-heavy": DiagramSpec(participants=20, messages=10_000, error_rate=0.2),
+}
+
+
+def peak_rss_kb() -> Optional[int]:
+    """Peak resident set size of this process in KB, or None where unsupported."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KB, macOS bytes
+    return peak // 1024 if sys.platform == 'darwin' else peak
+
+
+def _best_of(repeat: int, function, *args):
+    """Return (best seconds, last result) over repeat calls, without the cyclic GC."""
+    best = float('inf')
+    result = None
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            result = function(*args)
+            best = min(best, time.perf_counter() - start)
+    finally:
+        gc.enable()
+    return best, result
+
+
+def run_case(spec: DiagramSpec, engine: str = "default", repeat: int = 3) -> Dict[str, Any]:
+    """
+    Time one case in this process. The tokenizer runs in positional mode, since
+    the slicing mode is quadratic and would dominate the larger cases.
+    """
+    text = generate_diagram(spec)
+    tokenizer = TOKENIZER_ENGINES[engine](positional=True)
+
+    tokenize_seconds, (tokens, tokenization_diagnostics) = _best_of(repeat, tokenizer.tokenize, text)
+    # A fresh validator per run, since trackers keep state between validate() calls
+    validate_seconds, validation_diagnostics = _best_of(
+        repeat, lambda: SemanticValidator().validate(tokens))
+
+    return {
+        "spec": asdict(spec),
+        "characters": len(text),
+        "tokens": len(tokens),
+        "diagnostics": len(tokenization_diagnostics) + len(validation_diagnostics),
+        "tokenize_seconds": tokenize_seconds,
+        "validate_seconds": validate_seconds,
+        "tokenize_tokens_per_second": len(tokens) / tokenize_seconds,
+        "validate_tokens_per_second": len(tokens) / validate_seconds,
+        "peak_rss_kb": peak_rss_kb(),
+    }
+
+
+def run(cases: Dict[str, DiagramSpec], engine: str = "default", repeat: int = 3,
+        isolate: bool = True) -> Dict[str, Any]:
+    """
+    Run every case and return the JSON-ready results. With isolate, each case
+    runs in a fresh process so its peak RSS is not hidden by an earlier case.
+    """
+    results = {}
+    for name, spec in cases.items():
+        if isolate:
+            with ProcessPoolExecutor(max_workers=1, mp_context=get_context('spawn')) as executor:
+                results[name] = executor.submit(run_case, spec, engine, repeat).result()
+        else:
+            results[name] = run_case(spec, engine, repeat)
+
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "engine": engine,
+        "repeat": repeat,
+        "cases": results,
+    }
+
+
+def find_regressions(results: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    """Describe every phase of a case that is more than threshold times slower than in baseline."""
+    regressions = []
+    for name, case in results["cases"].items():
+        old = baseline.get("cases", {}).get(name)
+        if old is None or old["spec"] != case["spec"]:
+            continue
+        for phase in ("tokenize", "validate"):
+            ratio = case[f"{phase}_seconds"] / old[f"{phase}_seconds"]
+            if ratio > threshold:
+                regressions.append(f"{name}: {phase} is {ratio:.2f}x slower than the baseline")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--case', choices=sorted(CASES), action='append', help="case to run (default: all)")
+    parser.add_argument('--engine', choices=sorted(TOKENIZER_ENGINES), default="default")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--in-process', action='store_true', help="run cases in this process (shared peak RSS)")
+    parser.add_argument('--output', '-o', help="write the results to this JSON file")
+    parser.add_argument('--compare', help="baseline JSON file from an earlier run")
+    parser.add_argument('--threshold', type=float, default=1.5, help="slowdown ratio that counts as a regression")
+    args = parser.parse_args(argv)
+
+    cases = {name: CASES[name] for name in args.case} if args.case else CASES
+    results = run(cases, args.engine, args.repeat, isolate=not args.in_process)
+
+    print(f"{'case':<18} {'tokens':>9} {'tokenize tok/s':>15} {'validate tok/s':>15} {'peak RSS':>10}")
+    for name, case in results["cases"].items():
+        rss = f"{case['peak_rss_kb'] / 1024:.1f} MB" if case['peak_rss_kb'] is not None else "n/a"
+        print(f"{name:<18} {case['tokens']:>9} {case['tokenize_tokens_per_second']:>15,.0f} "
+              f"{case['validate_tokens_per_second']:>15,.0f} {rss:>10}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as handle:
+            json.dump(results, handle, indent=2)
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as handle:
+            regressions = find_regressions(results, json.load(handle), args.threshold)
+        for regression in regressions:
+            print(regression)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,87 @@
+"""
+Microbenchmark for token classification: the per-token cost of testing a token
+type against a list literal built in the loop (the validator's old checks) and
+against the TOKEN_CATEGORIES bitmasks, plus validation time per token.
+
+    python -m benchmarks.token_categories [--size 1000000] [--repeat 5]
+"""
+import argparse
+import gc
+import sys
+import time
+
+from lexer import IS_INTERACTION, IS_TRIVIA, TOKEN_CATEGORIES, Lexer, SemanticValidator, TokenType
+from benchmarks.tokenizer_scaling import make_diagram
+
+
+def classify_with_lists(types):
+    """The old checks: a fresh list of members for every token."""
+    count = 0
+    for token_type in types:
+        if token_type in [TokenType.COMMENT, TokenType.WHITESPACE]:
+            continue
+        if token_type in [
+            TokenType.SYNC_OPERATOR, TokenType.ASYNC_OPERATOR,
+            TokenType.RETURN_OPERATOR, TokenType.XSYNC_OPERATOR,
+            TokenType.TWO_WAY_OPERATOR, TokenType.TIMEOUT_OPERATOR,
+            TokenType.BULKING_OPERATOR, TokenType.CONTROL_KEYWORD,
+            TokenType.LIFECYCLE_KEYWORD
+        ]:
+            count += 1
+    return count
+
+
+def classify_with_masks(types):
+    """The same checks through the category bitmasks."""
+    categories = TOKEN_CATEGORIES
+    count = 0
+    for token_type in types:
+        bits = categories[token_type]
+        if bits & IS_TRIVIA:
+            continue
+        if bits & IS_INTERACTION:
+            count += 1
+    return count
+
+
+def best_time(function, argument, repeat):
+    best = float('inf')
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            function(argument)
+            best = min(best, time.perf_counter() - start)
+    finally:
+        gc.enable()
+    return best
+
+
+def run(size, repeat):
+    """Return {name: nanoseconds per token} for a diagram of roughly size characters."""
+    tokens = Lexer(positional=True).tokenizer.tokenize(make_diagram(size))[0]
+    types = [token.type for token in tokens]
+    if classify_with_lists(types) != classify_with_masks(types):
+        raise AssertionError("classifiers disagree")
+
+    per_token = 1e9 / len(tokens)
+    return {
+        "classify (list literals)": best_time(classify_with_lists, types, repeat) * per_token,
+        "classify (bitmasks)": best_time(classify_with_masks, types, repeat) * per_token,
+        "validate": best_time(lambda t: SemanticValidator().validate(t), tokens, repeat) * per_token,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--size', type=int, default=1_000_000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args(argv)
+
+    for name, nanoseconds in run(args.size, args.repeat).items():
+        print(f"{name:<26} {nanoseconds:8.1f} ns/token")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,101 @@
+"""
+Regression benchmark for positional tokenizing: the cost per KB of input must stay
+flat from 1 KB to 10 MB. Exits with status 1 when the scaling is not linear.
+
+    python -m benchmarks.tokenizer_scaling [--max-size 10000000] [--tolerance 3.0]
+"""
+import argparse
+import gc
+import sys
+import time
+
+from lexer import TOKENIZER_ENGINES
+
+STATEMENTS = [
+    'User -> UI: "Login" <<call>>;\n',
+    'UI => System: "Validate credentials";\n',
+    '// checking the user store\n',
+    'System -x> Database: "Query user";\n',
+    'Database --> System: "User data";\n',
+    'alt { case ("valid") { System --> UI: "Valid user"; } }\n',
+]
+
+SIZES = [1_000, 10_000, 100_000, 1_000_000, 10_000_000]
+
+
+def make_diagram(size):
+    """Build a diagram of roughly size characters."""
+    header = 'sequence Generated {\n    actor User;\n    boundary UI;\n    control System;\n    entity Database;\n'
+    body = []
+    length = len(header)
+    i = 0
+    while length < size:
+        statement = '    ' + STATEMENTS[i % len(STATEMENTS)]
+        body.append(statement)
+        length += len(statement)
+        i += 1
+    return header + ''.join(body) + '}\n'
+
+
+def time_tokenize(tokenizer, text, repeat):
+    best = float('inf')
+    # Like timeit, keep the cyclic collector out of the measurement
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            tokenizer.tokenize(text)
+            best = min(best, time.perf_counter() - start)
+    finally:
+        gc.enable()
+    return best
+
+
+def run(engines, sizes, repeat):
+    """Return {engine: [(size, seconds), ...]}."""
+    results = {}
+    for engine in engines:
+        tokenizer = TOKENIZER_ENGINES[engine](positional=True)
+        results[engine] = []
+        for size in sizes:
+            text = make_diagram(size)
+            runs = repeat if size < 1_000_000 else 1
+            results[engine].append((len(text), time_tokenize(tokenizer, text, runs)))
+    return results
+
+
+def check_linear(timings, tolerance):
+    """
+    True when no size costs more than tolerance times the cheapest per-KB cost.
+    Quadratic tokenizing grows the per-KB cost ~10x per size step, so a small
+    tolerance only absorbs cache effects on the larger inputs.
+    """
+    per_kb = [seconds / (size / 1000) for size, seconds in timings]
+    return max(per_kb) <= tolerance * min(per_kb)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--max-size', type=int, default=SIZES[-1])
+    parser.add_argument('--engine', choices=sorted(TOKENIZER_ENGINES), action='append')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--tolerance', type=float, default=3.0)
+    args = parser.parse_args(argv)
+
+    sizes = [size for size in SIZES if size <= args.max_size]
+    engines = args.engine or sorted(TOKENIZER_ENGINES)
+    results = run(engines, sizes, args.repeat)
+
+    linear = True
+    for engine, timings in results.items():
+        print(f"{engine} (positional):")
+        for size, seconds in timings:
+            print(f"  {size:>10} chars  {seconds:9.4f} s  {seconds / (size / 1000) * 1e6:8.1f} us/KB")
+        if not check_linear(timings, args.tolerance):
+            print(f"  per-KB cost grew more than {args.tolerance}x: scaling is not linear")
+            linear = False
+    return 0 if linear else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,103 @@
+from dataclasses import dataclass, field
+from typing import Hashable, List
+
+from grammar_compiler import production_symbols
+
+
+@dataclass
+class RuleDiagnostic:
+    lhs: Hashable
+    production: object
+    # Position of the production in rules[lhs]
+    index: int
+    # The type (3, 2 or 1) the production keeps the grammar from being, or 0
+    # for a rule that fits no type at all
+    breaks: int
+    reason: str
+
+
+@dataclass
+class ChomskyClassification:
+    # The most restrictive type every production fits: 3, 2, 1 or 0
+    chomsky_type: int
+    diagnostics: List[RuleDiagnostic] = field(default_factory=list)
+
+    @property
+    def name(self) -> str:
+        return f"Type-{self.chomsky_type}"
+
+    def breaking(self, chomsky_type: int) -> List[RuleDiagnostic]:
+        """The diagnostics of the productions that break chomsky_type."""
+        return [diagnostic for diagnostic in self.diagnostics if diagnostic.breaks == chomsky_type]
+
+
+def classify(grammar) -> ChomskyClassification:
+    """
+    Classify a grammar in one pass over its productions, reporting for each
+    production every type it breaks and why:
+
+    Type-3  the left-hand side is one non-terminal and the right-hand side is
+            terminals followed by at most one non-terminal (right-linear)
+    Type-2  the left-hand side is one non-terminal
+    Type-1  the right-hand side is at least as long as the left-hand side,
+            except for start -> ε when the start symbol is on no right-hand side
+    Type-0  the left-hand side has a non-terminal
+
+    A left-hand side that is not a declared non-terminal is read as a
+    string of symbols, as by grammar_compiler.production_symbols.
+    """
+    non_terminals = grammar.non_terminals
+    start = grammar.start_symbol
+    diagnostics: List[RuleDiagnostic] = []
+    broken = set()
+    start_on_right = False
+    # Productions start -> ε, checked once it is known whether start is on a right-hand side
+    start_erasures = []
+
+    def report(lhs, production, index, breaks, reason):
+        diagnostics.append(RuleDiagnostic(lhs, production, index, breaks, reason))
+        broken.add(breaks)
+
+    for lhs, productions in grammar.rules.items():
+        if lhs in non_terminals:
+            left = [lhs]
+        else:
+            left = production_symbols(lhs, non_terminals)
+        single = len(left) == 1 and left[0] in non_terminals
+        lhs_has_non_terminal = any(symbol in non_terminals for symbol in left)
+
+        for index, production in enumerate(productions):
+            right = production_symbols(production, non_terminals)
+            positions = [i for i, symbol in enumerate(right) if symbol in non_terminals]
+            if start in right:
+                start_on_right = True
+
+            if not lhs_has_non_terminal:
+                report(lhs, production, index, 0, f"left-hand side {lhs!r} has no non-terminal")
+                continue
+            if not single:
+                reason = f"left-hand side {lhs!r} is not a single non-terminal"
+                report(lhs, production, index, 3, reason)
+                report(lhs, production, index, 2, reason)
+            elif len(positions) > 1:
+                report(lhs, production, index, 3, f"{len(positions)} non-terminals on the right-hand side")
+            elif positions and positions[0] != len(right) - 1:
+                report(lhs, production, index, 3, f"non-terminal {right[positions[0]]!r} is not at the end")
+
+            if not right:
+                if single and left[0] == start:
+                    start_erasures.append((lhs, production, index))
+                else:
+                    report(lhs, production, index, 1, f"ε-production of {lhs!r}, which is not the start symbol")
+            elif len(right) < len(left):
+                report(lhs, production, index, 1,
+                       f"right-hand side is shorter than the left-hand side ({len(right)} < {len(left)})")
+
+    if start_on_right:
+        for lhs, production, index in start_erasures:
+            report(lhs, production, index, 1, f"start symbol {start!r} derives ε but appears on a right-hand side")
+
+    for chomsky_type in (3, 2, 1):
+        if chomsky_type not in broken and 0 not in broken:
+            return ChomskyClassification(chomsky_type, diagnostics)
+    return ChomskyClassification(0, diagnostics)
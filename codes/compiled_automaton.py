@@ -0,0 +1,321 @@
+from array import array
+from itertools import chain
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Sequence
+
+# Id of the dead state in every compiled automaton: a missing transition leads
+# here, and every transition out of it loops back
+DEAD = 0
+
+# Transition symbol of a move that reads no input
+EPSILON = "ε"
+
+
+def transition_targets(target: Any, known_states) -> List[Hashable]:
+    """
+    Return the states a transition value stands for. FiniteAutomation accepts a
+    single state, a collection of states or None as a transition value; a tuple
+    that is itself a known state (as produced by nfa_to_dfa) is a single state.
+    """
+    if target is None:
+        return []
+    if isinstance(target, (set, frozenset, list)):
+        return list(target)
+    if isinstance(target, tuple) and target not in known_states:
+        return list(target)
+    return [target]
+
+
+def alphabet_order(alphabet: Iterable[Hashable]) -> List[Hashable]:
+    """
+    Symbols in a stable order: as listed, or sorted if the alphabet is a set.
+    EPSILON is never an input symbol.
+    """
+    if isinstance(alphabet, (set, frozenset)):
+        return sorted((symbol for symbol in alphabet if symbol != EPSILON), key=repr)
+    return [symbol for symbol in dict.fromkeys(alphabet) if symbol != EPSILON]
+
+
+def state_names(labels: Sequence[Any], states: Iterable[int]) -> Dict[int, Hashable]:
+    """
+    A distinct name for each of states: its label, or q<id> for a state
+    without a label or whose label an earlier state already took.
+    """
+    used = set(label for label in labels if label is not None)
+    taken = set()
+    names = {}
+    for state in states:
+        name = labels[state]
+        if name is None or name in taken:
+            name = f"q{state}"
+            while name in used:
+                name += "'"
+            used.add(name)
+        taken.add(name)
+        names[state] = name
+    return names
+
+
+def join_symbols(symbols: Sequence[Hashable]):
+    """A string of symbols as a str when every symbol is a str, else as a tuple."""
+    if all(isinstance(symbol, str) for symbol in symbols):
+        return ''.join(symbols)
+    return tuple(symbols)
+
+
+class CompiledDFA:
+    """
+    Deterministic automaton over dense integer ids. States are numbered 1..n
+    with DEAD = 0, symbols 0..k-1, and the transitions form a flat table where
+    table[state * k + symbol] is the next state. The table is an array('i')
+    or any sequence of ints such as a memoryview of a mapped file.
+
+    Unless premultiply is false, accepts runs on a private copy of the table
+    holding row offsets instead of state ids; without it, accepts reads the
+    table in place, which leaves a shared table unduplicated.
+    """
+
+    def __init__(self, symbols: Sequence[Hashable], table: Sequence[int], accepting: bytearray, start: int,
+                 labels: Optional[List[Any]] = None, subsets: Optional[List[int]] = None,
+                 premultiply: bool = True):
+        self.symbols = list(symbols)
+        self.symbol_ids: Dict[Hashable, int] = {symbol: i for i, symbol in enumerate(self.symbols)}
+        self.n_symbols = len(self.symbols)
+        self.table = table
+        self.accepting = accepting
+        self.n_states = len(accepting)
+        self.start = start
+        # Original state of each id, None for DEAD and for states made up by an algorithm
+        self.labels = labels if labels is not None else [None] * self.n_states
+        # For a determinized NFA, the bitmask of NFA states behind each state
+        self.subsets = subsets
+        self._numpy_table = None
+        self._build_matcher(premultiply)
+
+    def _build_matcher(self, premultiply: bool) -> None:
+        """
+        Build the tables used by accepts. Rows get an extra column for symbols
+        outside the alphabet, and entries hold next_state * width, so a step is
+        a single index and add.
+        """
+        k = self.n_symbols
+        width = self._width = k + 1
+        other = self._other = k
+        table = self.table
+        self._offsets = None
+        if premultiply:
+            offsets = [0] * (self.n_states * width)
+            for state in range(self.n_states):
+                row = state * k
+                base = state * width
+                for symbol in range(k):
+                    offsets[base + symbol] = table[row + symbol] * width
+            self._offsets = offsets
+
+        # For alphabets of single characters below 256, encoding a string is
+        # bytes.translate through this table, with no per-symbol Python work
+        self._byte_codes = None
+        if k < 256 and all(isinstance(symbol, str) and len(symbol) == 1 and ord(symbol) < 256
+                           for symbol in self.symbols):
+            codes = bytearray([other] * 256)
+            for symbol, i in self.symbol_ids.items():
+                codes[ord(symbol)] = i
+            self._byte_codes = bytes(codes)
+
+    def encode(self, string) -> Sequence[int]:
+        """Symbol ids of string; symbols outside the alphabet get the id n_symbols."""
+        if self._byte_codes is not None:
+            if isinstance(string, (bytes, bytearray, memoryview)):
+                return bytes(string).translate(self._byte_codes)
+            if isinstance(string, str):
+                try:
+                    return string.encode('latin-1').translate(self._byte_codes)
+                except UnicodeEncodeError:
+                    pass
+        symbol_ids = self.symbol_ids
+        other = self._other
+        return [symbol_ids.get(symbol, other) for symbol in string]
+
+    def step(self, state: int, symbol: Hashable) -> int:
+        """State reached from state on one symbol."""
+        symbol_id = self.symbol_ids.get(symbol)
+        if symbol_id is None:
+            return DEAD
+        return self.table[state * self.n_symbols + symbol_id]
+
+    def accepts(self, string) -> bool:
+        """Whether the automaton accepts string (a str, bytes or sequence of symbols)."""
+        offsets = self._offsets
+        if offsets is None:
+            return self._accepts_in_place(string)
+        state = self.start * self._width
+        for code in self.encode(string):
+            state = offsets[state + code]
+        return bool(self.accepting[state // self._width])
+
+    def _accepts_in_place(self, string) -> bool:
+        table = self.table
+        k = self.n_symbols
+        state = self.start
+        for code in self.encode(string):
+            if code == k:
+                return False
+            state = table[state * k + code]
+        return bool(self.accepting[state])
+
+    def accepts_many(self, strings: Iterable, chunk_size: int = 1 << 16):
+        """
+        Whether each of strings is accepted, as a NumPy bool array. The strings
+        are encoded into a padded matrix, chunk_size rows at a time, and all of
+        them step through the table together, one vectorized step per column.
+        Requires NumPy.
+        """
+        import numpy as np
+        
+        table = self._padded_table()
+        width = self.n_symbols + 2
+        pad = width - 1
+        code_type = np.uint8 if pad < 256 else np.intc
+        accepting = np.frombuffer(bytes(self.accepting), dtype=np.uint8).astype(bool)
+        
+        strings = strings if isinstance(strings, list) else list(strings)
+        result = np.empty(len(strings), dtype=bool)
+        for begin in range(0, len(strings), chunk_size):
+            chunk = strings[begin:begin + chunk_size]
+            flat, lengths = self._encode_many(chunk, code_type)
+            longest = int(lengths.max()) if len(chunk) else 0
+            
+            # Column-major, so each step reads one contiguous column
+            codes = np.full((len(chunk), longest), pad, dtype=code_type, order='F')
+            codes[np.arange(longest) < lengths[:, None]] = flat
+            
+            # States are kept as row offsets into the flattened table
+            offsets = np.full(len(chunk), self.start * width, dtype=np.intc)
+            for column in codes.T:
+                offsets = table[offsets + column]
+            result[begin:begin + len(chunk)] = accepting[offsets // width]
+        return result
+    
+    def _encode_many(self, strings: List, code_type):
+        """Return the symbol ids of all strings concatenated, and their lengths, as NumPy arrays."""
+        import numpy as np
+        
+        lengths = np.fromiter(map(len, strings), dtype=np.intp, count=len(strings))
+        if self._byte_codes is not None:
+            try:
+                joined = ''.join(strings).encode('latin-1')
+            except (TypeError, UnicodeEncodeError):
+                pass
+            else:
+                return np.frombuffer(joined.translate(self._byte_codes), dtype=np.uint8), lengths
+        
+        encoded = chain.from_iterable(self.encode(string) for string in strings)
+        return np.fromiter(encoded, dtype=code_type, count=int(lengths.sum())), lengths
+    
+    def _padded_table(self):
+        """
+        The transition table for accepts_many: a flat NumPy array of rows of
+        k + 2 entries, with a column for symbols outside the alphabet leading to
+        DEAD and a padding column that leaves the state unchanged. Entries are
+        next_state * (k + 2), the offset of the next state's row.
+        """
+        if self._numpy_table is None:
+            import numpy as np
+            k = self.n_symbols
+            table = np.empty((self.n_states, k + 2), dtype=np.intc)
+            table[:, :k] = np.frombuffer(self.table, dtype=np.intc).reshape(self.n_states, k)
+            table[:, k] = DEAD
+            table[:, k + 1] = np.arange(self.n_states)
+            self._numpy_table = (table * (k + 2)).ravel()
+        return self._numpy_table
+
+    def save(self, path) -> None:
+        """Write the automaton in the binary format of dfa_format."""
+        from dfa_format import save_dfa
+        save_dfa(self, path)
+
+    @staticmethod
+    def load(path) -> 'CompiledDFA':
+        """Memory-map an automaton written by save; see dfa_format.load_dfa."""
+        from dfa_format import load_dfa
+        return load_dfa(path)
+
+    def minimize(self, prune: bool = True) -> 'CompiledDFA':
+        """The minimal equivalent automaton; see minimize.minimize_dfa."""
+        from minimize import minimize_dfa
+        return minimize_dfa(self, prune)
+
+    def to_automaton(self):
+        """
+        The FiniteAutomation this table stands for. States are named as by
+        state_names, and transitions to DEAD are left out.
+        """
+        from FiniteAutomation import FiniteAutomation
+
+        ids = [state for state in range(self.n_states) if state != DEAD or state == self.start]
+        names = state_names(self.labels, ids)
+
+        k = self.n_symbols
+        transitions = {}
+        for state in ids:
+            row = state * k
+            moves = {symbol: names[self.table[row + i]]
+                     for i, symbol in enumerate(self.symbols) if self.table[row + i] != DEAD}
+            if moves:
+                transitions[names[state]] = moves
+        return FiniteAutomation(
+            states=[names[state] for state in ids],
+            alphabet=list(self.symbols),
+            transitions=transitions,
+            start_state=names[self.start],
+            final_states=[names[state] for state in ids if self.accepting[state]],
+        )
+
+    def __repr__(self):
+        return f"CompiledDFA(states={self.n_states}, symbols={self.n_symbols}, start={self.start})"
+
+
+def compile_automaton(automaton) -> CompiledDFA:
+    """
+    Compile a deterministic FiniteAutomation. Transition values holding more
+    than one state raise ValueError.
+    """
+    labels: List[Any] = [None]
+    ids: Dict[Hashable, int] = {}
+
+    def state_id(state):
+        if state not in ids:
+            ids[state] = len(labels)
+            labels.append(state)
+        return ids[state]
+
+    for state in automaton.states:
+        state_id(state)
+    start = state_id(automaton.start_state)
+
+    symbols = alphabet_order(automaton.alphabet)
+    symbol_ids = {symbol: i for i, symbol in enumerate(symbols)}
+    edges = []
+    for state, transitions in automaton.transitions.items():
+        source = state_id(state)
+        for symbol, target in transitions.items():
+            if symbol == EPSILON and transition_targets(target, ids):
+                raise ValueError(f"State {state!r} has an ε-transition; the automaton is not deterministic")
+            if symbol not in symbol_ids:
+                continue
+            targets = transition_targets(target, ids)
+            if len(targets) > 1:
+                raise ValueError(f"State {state!r} has {len(targets)} transitions on {symbol!r}; "
+                                 f"the automaton is not deterministic")
+            if targets:
+                edges.append((source, symbol_ids[symbol], state_id(targets[0])))
+
+    final_ids = [state_id(state) for state in automaton.final_states]
+    accepting = bytearray(len(labels))
+    for state in final_ids:
+        accepting[state] = 1
+
+    k = len(symbols)
+    table = array('i', [DEAD]) * (len(labels) * k)
+    for source, symbol, target in edges:
+        table[source * k + symbol] = target
+    return CompiledDFA(symbols, table, accepting, start, labels)
@@ -0,0 +1,329 @@
+import re
+from array import array
+from typing import Any, Dict, Hashable, List, Optional, Sequence, Tuple
+
+from compiled_automaton import DEAD, EPSILON, CompiledDFA, alphabet_order, state_names, transition_targets
+
+_NONZERO_BYTE = re.compile(b'[^\x00]')
+
+
+def _bit_count(value: int) -> int:
+    return bin(value).count('1')
+
+
+if hasattr(int, 'bit_count'):
+    _bit_count = int.bit_count
+
+
+class CompiledNFA:
+    """
+    Nondeterministic automaton simulated on bitsets. States are numbered
+    0..n-1 and a set of states is an int with bit i set for state i;
+    successors[symbol][state] is the set reachable from state on symbol.
+
+    A step unions successor sets a byte of the current set at a time, through
+    per-symbol tables of the union for each of the 256 subsets of a byte's
+    eight states. Table entries are filled in as inputs reach them.
+    """
+
+    def __init__(self, symbols: Sequence[Hashable], successors: List[List[int]], start: int,
+                 accepting: int, labels: List[Any], closures: Optional[List[int]] = None):
+        self.symbols = list(symbols)
+        self.symbol_ids: Dict[Hashable, int] = {symbol: i for i, symbol in enumerate(self.symbols)}
+        self.n_symbols = len(self.symbols)
+        # Original state of each id, None for states made up by an algorithm
+        self.labels = labels
+        self.n_states = len(labels)
+        self.accepting = accepting
+        
+        # closures[i] is the set reachable from state i by ε-moves, i included.
+        # Folding them into the start set and the successor sets once keeps
+        # every set the simulation sees closed, with no closure work per step.
+        self.closures = closures
+        # The start set as given, before closing it
+        self.initial = start
+        if closures is not None:
+            start = self.close(start)
+            successors = [[self.close(states) if states else 0 for states in row] for row in successors]
+        self.start = start
+        self.successors = successors
+        self._n_bytes = (self.n_states + 7) // 8
+        # _unions[symbol][chunk][byte], with rows created on first use
+        self._unions: List[List[Optional[List[Optional[int]]]]] = [
+            [None] * self._n_bytes for _ in self.symbols]
+
+    def close(self, states: int) -> int:
+        """The ε-closure of a set of states."""
+        closures = self.closures
+        if closures is None:
+            return states
+        result = states
+        while states:
+            low = states & -states
+            result |= closures[low.bit_length() - 1]
+            states ^= low
+        return result
+    
+    def step(self, states: int, symbol_id: int) -> int:
+        """Set of states reached from the set states on the symbol with id symbol_id."""
+        if not states:
+            return 0
+        rows = self._unions[symbol_id]
+        fill = self._fill
+        result = 0
+        data = states.to_bytes(self._n_bytes, 'little')
+        # Let the regex engine skip the empty bytes of sparse sets
+        if _bit_count(states) * 4 < self._n_bytes:
+            chunks = (match.start() for match in _NONZERO_BYTE.finditer(data))
+        else:
+            chunks = (chunk for chunk, byte in enumerate(data) if byte)
+        for chunk in chunks:
+            byte = data[chunk]
+            row = rows[chunk]
+            if row is None:
+                row = rows[chunk] = [None] * 256
+                row[0] = 0
+            union = row[byte]
+            if union is None:
+                union = fill(symbol_id, chunk, row, byte)
+            result |= union
+        return result
+    
+    def _fill(self, symbol_id: int, chunk: int, row: List[Optional[int]], byte: int) -> int:
+        """Compute row[byte] from the entry without its lowest bit."""
+        rest = byte & (byte - 1)
+        union = row[rest]
+        if union is None:
+            union = self._fill(symbol_id, chunk, row, rest)
+        state = chunk * 8 + (byte & -byte).bit_length() - 1
+        successors = self.successors[symbol_id]
+        if state < len(successors):
+            union |= successors[state]
+        row[byte] = union
+        return union
+
+    def run(self, string, states: Optional[int] = None) -> int:
+        """Set of states reached on string from states (the start set by default)."""
+        if states is None:
+            states = self.start
+        symbol_ids = self.symbol_ids
+        step = self.step
+        for symbol in string:
+            symbol_id = symbol_ids.get(symbol)
+            if symbol_id is None:
+                return 0
+            states = step(states, symbol_id)
+            if not states:
+                return 0
+        return states
+
+    def accepts(self, string) -> bool:
+        """Whether some run on string ends in an accepting state."""
+        return bool(self.run(string) & self.accepting)
+
+    def state_set(self, states: int) -> List[Any]:
+        """Labels of the states in a set."""
+        labels = []
+        while states:
+            low = states & -states
+            labels.append(self.labels[low.bit_length() - 1])
+            states ^= low
+        return labels
+
+    def determinize(self, max_states: Optional[int] = None) -> CompiledDFA:
+        """
+        Subset construction. Each reachable set of NFA states becomes a DFA state
+        with an integer id, found through a dict keyed by the set's bitmask; the
+        list of discovered sets doubles as the worklist. The result's subsets[i]
+        is the bitmask of NFA states behind DFA state i. Raises ValueError when
+        more than max_states states are reached.
+        """
+        k = self.n_symbols
+        step = self.step
+        subsets = [0, self.start]
+        ids = {0: DEAD, self.start: 1}
+        table = array('i', [DEAD]) * k
+        
+        current = 1
+        while current < len(subsets):
+            states = subsets[current]
+            row = []
+            for symbol in range(k):
+                target = step(states, symbol)
+                target_id = ids.get(target)
+                if target_id is None:
+                    target_id = ids[target] = len(subsets)
+                    subsets.append(target)
+                    if max_states is not None and target_id > max_states:
+                        raise ValueError(f"Subset construction exceeded {max_states} states")
+                row.append(target_id)
+            table.extend(row)
+            current += 1
+        
+        accepting_states = self.accepting
+        accepting = bytearray(1 if states & accepting_states else 0 for states in subsets)
+        labels = [None] + [tuple(self.state_set(states)) for states in subsets[1:]]
+        return CompiledDFA(self.symbols, table, accepting, 1, labels, subsets)
+
+    def to_automaton(self):
+        """
+        An equivalent FiniteAutomation without ε-moves: each state takes the
+        transitions and acceptance of its ε-closure. States are named as by
+        state_names, and a transition value is a state, or a set of states
+        where there is more than one.
+        """
+        from FiniteAutomation import FiniteAutomation
+
+        names = state_names(self.labels, range(self.n_states))
+
+        closures = self.closures
+        transitions = {}
+        final_states = []
+        for state in range(self.n_states):
+            closure = closures[state] if closures is not None else 1 << state
+            if closure & self.accepting:
+                final_states.append(names[state])
+            members = list(_members(closure))
+            moves = {}
+            for symbol_id, symbol in enumerate(self.symbols):
+                successors = self.successors[symbol_id]
+                targets = 0
+                for member in members:
+                    targets |= successors[member]
+                if targets & (targets - 1):
+                    moves[symbol] = {names[target] for target in _members(targets)}
+                elif targets:
+                    moves[symbol] = names[targets.bit_length() - 1]
+            if moves:
+                transitions[names[state]] = moves
+
+        if self.initial & (self.initial - 1) or not self.initial:
+            raise ValueError("Only an automaton with a single start state can be converted")
+        start = names[self.initial.bit_length() - 1]
+        return FiniteAutomation(list(names.values()), list(self.symbols), transitions, start, final_states)
+
+    def __repr__(self):
+        return f"CompiledNFA(states={self.n_states}, symbols={self.n_symbols})"
+
+
+def _members(states: int):
+    """Ids of the states in a set, lowest first."""
+    while states:
+        low = states & -states
+        yield low.bit_length() - 1
+        states ^= low
+
+
+def compile_nfa(automaton) -> CompiledNFA:
+    """Compile a FiniteAutomation, deterministic or not, for bitset simulation."""
+    labels: List[Any] = []
+    ids: Dict[Hashable, int] = {}
+
+    def state_id(state):
+        if state not in ids:
+            ids[state] = len(labels)
+            labels.append(state)
+        return ids[state]
+
+    for state in automaton.states:
+        state_id(state)
+    start = state_id(automaton.start_state)
+
+    symbols = alphabet_order(automaton.alphabet)
+    symbol_ids = {symbol: i for i, symbol in enumerate(symbols)}
+    edges = []
+    epsilon_edges = []
+    for state, transitions in automaton.transitions.items():
+        source = state_id(state)
+        for symbol, target in transitions.items():
+            if symbol == EPSILON:
+                for next_state in transition_targets(target, ids):
+                    epsilon_edges.append((source, state_id(next_state)))
+            elif symbol in symbol_ids:
+                for next_state in transition_targets(target, ids):
+                    edges.append((source, symbol_ids[symbol], state_id(next_state)))
+
+    accepting = 0
+    for state in automaton.final_states:
+        accepting |= 1 << state_id(state)
+
+    successors = [[0] * len(labels) for _ in symbols]
+    for source, symbol, target in edges:
+        successors[symbol][source] |= 1 << target
+    closures = epsilon_closures(len(labels), epsilon_edges) if epsilon_edges else None
+    return CompiledNFA(symbols, successors, 1 << start, accepting, labels, closures)
+
+
+def epsilon_closures(n_states: int, edges: Sequence[Tuple[int, int]]) -> List[int]:
+    """
+    Bitmask of the states reachable from each state through the (source,
+    target) ε-edges. States of a strongly connected component share a closure,
+    so the components are found first (Tarjan's algorithm, iteratively) and each
+    closure is the union of its component and the closures of the components
+    it has edges to, which Tarjan's algorithm completes first. Linear in the
+    number of edges, counting a bitmask union as one step.
+    """
+    graph: List[List[int]] = [[] for _ in range(n_states)]
+    for source, target in edges:
+        graph[source].append(target)
+
+    closures = [0] * n_states
+    index = [-1] * n_states
+    low = [0] * n_states
+    on_stack = [False] * n_states
+    stack: List[int] = []
+    counter = 0
+
+    for root in range(n_states):
+        if index[root] >= 0:
+            continue
+        if not graph[root]:
+            # No ε-moves out; a DFS that reaches it later finds the same closure
+            closures[root] = 1 << root
+            continue
+        # Each frame is (state, position of the next edge to follow)
+        frames = [(root, 0)]
+        index[root] = low[root] = counter
+        counter += 1
+        stack.append(root)
+        on_stack[root] = True
+        while frames:
+            state, position = frames[-1]
+            successors = graph[state]
+            if position < len(successors):
+                frames[-1] = (state, position + 1)
+                target = successors[position]
+                if index[target] < 0:
+                    index[target] = low[target] = counter
+                    counter += 1
+                    stack.append(target)
+                    on_stack[target] = True
+                    frames.append((target, 0))
+                elif on_stack[target]:
+                    low[state] = min(low[state], index[target])
+                continue
+
+            frames.pop()
+            if frames:
+                parent = frames[-1][0]
+                low[parent] = min(low[parent], low[state])
+            if low[state] != index[state]:
+                continue
+
+            # state is the root of a component; pop it off the stack
+            members = []
+            while True:
+                member = stack.pop()
+                on_stack[member] = False
+                members.append(member)
+                if member == state:
+                    break
+            closure = 0
+            for member in members:
+                closure |= 1 << member
+            for member in members:
+                for target in graph[member]:
+                    closure |= closures[target]
+            for member in members:
+                closures[member] = closure
+    return closures
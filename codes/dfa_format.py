@@ -0,0 +1,131 @@
+"""
+Binary format for compiled DFAs, laid out so a file can be memory-mapped and
+used in place:
+
+    header     <4sHHIIII: magic, version, reserved, n_states, n_symbols,
+               start, size of the symbol map in bytes
+    symbol map for each symbol, <I length then its UTF-8 bytes
+    padding    zero bytes up to a multiple of 4
+    table      n_states * n_symbols little-endian int32, row-major
+    accepting  bitmap of ceil(n_states / 8) bytes, state i in bit i % 8 of byte i // 8
+
+Only str symbols can be stored, and state labels are not stored.
+"""
+import mmap
+import struct
+import sys
+from array import array
+from typing import List, Tuple
+
+from compiled_automaton import CompiledDFA
+
+MAGIC = b'CDFA'
+VERSION = 1
+_HEADER = struct.Struct('<4sHHIIII')
+_LENGTH = struct.Struct('<I')
+
+# bytes.translate tables between the characters '0'/'1' and bytes 0/1
+_FROM_DIGITS = bytes.maketrans(b'01', b'\x00\x01')
+_TO_DIGITS = bytes.maketrans(b'\x00\x01', b'01')
+
+
+def dfa_to_bytes(dfa: CompiledDFA) -> bytes:
+    """Serialize dfa in the binary format."""
+    symbol_map = bytearray()
+    for symbol in dfa.symbols:
+        if not isinstance(symbol, str):
+            raise ValueError(f"Only str symbols can be serialized, not {symbol!r}")
+        encoded = symbol.encode('utf-8')
+        symbol_map += _LENGTH.pack(len(encoded)) + encoded
+
+    header = _HEADER.pack(MAGIC, VERSION, 0, dfa.n_states, dfa.n_symbols, dfa.start, len(symbol_map))
+    padding = b'\0' * (-(len(header) + len(symbol_map)) % 4)
+    table = array('i', dfa.table)
+    if sys.byteorder != 'little':
+        table.byteswap()
+    return b''.join((header, symbol_map, padding, table.tobytes(), _pack_bits(dfa.accepting)))
+
+
+def dfa_from_buffer(buffer) -> CompiledDFA:
+    """
+    A CompiledDFA over a buffer holding the binary format. The transition
+    table is a memoryview into the buffer rather than a copy, and matching
+    reads it directly instead of building the premultiplied offsets.
+    """
+    view = memoryview(buffer)
+    if len(view) < _HEADER.size:
+        raise ValueError("Not a compiled DFA: too short for the header")
+    magic, version, _, n_states, n_symbols, start, symbols_size = _HEADER.unpack_from(view)
+    if magic != MAGIC:
+        raise ValueError("Not a compiled DFA: bad magic number")
+    if version != VERSION:
+        raise ValueError(f"Unsupported compiled DFA version {version}")
+
+    offset = _HEADER.size
+    symbols, offset = _read_symbols(view, offset, offset + symbols_size, n_symbols)
+    offset += -offset % 4
+    table_end = offset + 4 * n_states * n_symbols
+    accepting_end = table_end + (n_states + 7) // 8
+    if len(view) < accepting_end:
+        raise ValueError("Not a compiled DFA: truncated")
+    if not 0 <= start < n_states:
+        raise ValueError(f"Start state {start} out of range")
+
+    if sys.byteorder == 'little' and struct.calcsize('i') == 4:
+        table = view[offset:table_end].cast('i')
+    else:
+        table = array('i')
+        table.frombytes(view[offset:table_end])
+        if sys.byteorder != 'little':
+            table.byteswap()
+    accepting = _unpack_bits(view[table_end:accepting_end], n_states)
+    return CompiledDFA(symbols, table, accepting, start, premultiply=False)
+
+
+def save_dfa(dfa: CompiledDFA, path) -> None:
+    with open(path, 'wb') as handle:
+        handle.write(dfa_to_bytes(dfa))
+
+
+def load_dfa(path) -> CompiledDFA:
+    """
+    Memory-map a file written by save_dfa. The pages are shared with every
+    other process mapping the same file, and only the header, symbol map and
+    accepting bitmap are read up front.
+    """
+    with open(path, 'rb') as handle:
+        try:
+            mapped = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # an empty file cannot be mapped
+            raise ValueError(f"Not a compiled DFA: {path} is empty") from None
+    return dfa_from_buffer(mapped)
+
+
+def _read_symbols(view: memoryview, offset: int, end: int, n_symbols: int) -> Tuple[List[str], int]:
+    symbols = []
+    for _ in range(n_symbols):
+        if offset + _LENGTH.size > end:
+            raise ValueError("Not a compiled DFA: truncated symbol map")
+        length, = _LENGTH.unpack_from(view, offset)
+        offset += _LENGTH.size
+        if offset + length > end:
+            raise ValueError("Not a compiled DFA: truncated symbol map")
+        symbols.append(bytes(view[offset:offset + length]).decode('utf-8'))
+        offset += length
+    return symbols, end
+
+
+def _pack_bits(flags) -> bytes:
+    """Bitmap of a sequence of 0/1 flags, least significant bit first."""
+    if not len(flags):
+        return b''
+    digits = bytes(flags).translate(_TO_DIGITS)[::-1]
+    return int(digits, 2).to_bytes((len(flags) + 7) // 8, 'little')
+
+
+def _unpack_bits(bitmap, n: int) -> bytearray:
+    """The n 0/1 flags of a bitmap, as _pack_bits wrote it."""
+    if not n:
+        return bytearray()
+    digits = format(int.from_bytes(bitmap, 'little') & ((1 << n) - 1), f'0{n}b')[::-1]
+    return bytearray(digits.encode('ascii').translate(_FROM_DIGITS))
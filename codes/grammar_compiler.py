@@ -0,0 +1,112 @@
+from typing import Dict, Hashable, List, Tuple
+
+from compiled_automaton import EPSILON, alphabet_order
+from compiled_nfa import CompiledNFA, epsilon_closures
+
+
+def production_symbols(production, non_terminals) -> List[Hashable]:
+    """
+    The symbols of a production. Lists and tuples are taken as they are. A
+    str is split on whitespace if it has any (as to_regular_grammar writes
+    "a q1"), is one symbol if it names a non-terminal, and is a string of
+    one-character symbols otherwise. EPSILON and empty productions give [].
+    """
+    if isinstance(production, str):
+        if any(character.isspace() for character in production):
+            symbols = production.split()
+        elif production in non_terminals:
+            symbols = [production]
+        else:
+            symbols = list(production)
+    else:
+        symbols = list(production)
+    return [symbol for symbol in symbols if symbol != EPSILON]
+
+
+def compile_grammar(grammar) -> CompiledNFA:
+    """
+    Compile a right-linear grammar into a CompiledNFA. Every production is
+    t1 ... tm [B]: terminals followed by at most one non-terminal. Each
+    non-terminal is a state; A -> t1 ... tm B reads the terminals through
+    intermediate states into B, or into a final state "F" without B.
+    Intermediate states are shared between productions of A with a common
+    prefix. A -> B is an ε-move and A -> ε makes A accepting.
+
+    Symbols that are not non-terminals are terminals. Raises ValueError for
+    a production with a non-terminal before its end.
+    """
+    non_terminals = set(grammar.non_terminals) | set(grammar.rules)
+    labels: List[Hashable] = []
+    ids: Dict[Hashable, int] = {}
+
+    def state_id(label) -> int:
+        if label not in ids:
+            ids[label] = len(labels)
+            labels.append(label)
+        return ids[label]
+
+    for non_terminal in sorted(non_terminals, key=repr):
+        state_id(non_terminal)
+    start = state_id(grammar.start_symbol)
+
+    final = None
+    accepting = 0
+    edges: List[Tuple[int, Hashable, int]] = []
+    epsilon_edges: List[Tuple[int, int]] = []
+    # (state, terminal) -> the intermediate state reached, shared by common prefixes
+    intermediates: Dict[Tuple[int, Hashable], int] = {}
+    terminals = dict.fromkeys(alphabet_order(grammar.terminals))
+
+    for non_terminal, productions in grammar.rules.items():
+        source = ids[non_terminal]
+        for production in productions:
+            symbols = production_symbols(production, non_terminals)
+            target = None
+            if symbols and symbols[-1] in non_terminals:
+                target = ids[symbols[-1]]
+                symbols = symbols[:-1]
+            for symbol in symbols:
+                if symbol in non_terminals:
+                    raise ValueError(f"Production {non_terminal} -> {production!r} is not right-linear")
+                terminals.setdefault(symbol)
+
+            if not symbols:
+                if target is None:
+                    accepting |= 1 << source
+                else:
+                    epsilon_edges.append((source, target))
+                continue
+
+            state = source
+            for symbol in symbols[:-1]:
+                key = (state, symbol)
+                if key not in intermediates:
+                    intermediates[key] = len(labels)
+                    labels.append(None)
+                    edges.append((state, symbol, intermediates[key]))
+                state = intermediates[key]
+            if target is None:
+                if final is None:
+                    final = len(labels)
+                    labels.append(_final_label(non_terminals))
+                    accepting |= 1 << final
+                target = final
+            edges.append((state, symbols[-1], target))
+
+    symbols = list(terminals)
+    symbol_ids = {symbol: i for i, symbol in enumerate(symbols)}
+    successors = [[0] * len(labels) for _ in symbols]
+    for source, symbol, target in edges:
+        successors[symbol_ids[symbol]][source] |= 1 << target
+    closures = epsilon_closures(len(labels), epsilon_edges) if epsilon_edges else None
+    return CompiledNFA(symbols, successors, 1 << start, accepting, labels, closures)
+
+
+def _final_label(non_terminals) -> str:
+    """"F", or "F" with a number if a non-terminal already has that name."""
+    label = "F"
+    number = 0
+    while label in non_terminals:
+        number += 1
+        label = f"F{number}"
+    return label
@@ -0,0 +1,901 @@
+from bisect import bisect_left, bisect_right
+from dataclasses import replace
+from typing import Dict, List, Tuple, Optional, Any, Iterator
+
+from lexer import (
+    Token, TokenType, DiagnosticMessage, SemanticValidator, SyncMessageInfo, ValidationCheckpoint,
+    LazyTokenIndex, TOKENIZER_ENGINES, TOKEN_CATEGORIES, IS_TRIVIA
+)
+
+# Plain forms used while blocks are rebuilt, with absolute positions:
+#   token      (type, value, start, line, column, anchor id or None)
+#   invalid    (start, line, column, text)
+#   segment    (token index, stored state, [(line, column, message, severity), ...])
+PlainToken = Tuple[TokenType, str, int, int, int, Optional[int]]
+PlainInvalid = Tuple[int, int, int, str]
+PlainSegment = Tuple[int, ValidationCheckpoint, List[Tuple[int, int, str, str]]]
+
+
+class _ChunkedText:
+    """
+    Document text as a list of chunks of about chunk_size characters, so an
+    edit copies the chunks it touches instead of the whole text.
+    """
+
+    def __init__(self, text: str, chunk_size: int = 8192):
+        self.chunk_size = chunk_size
+        self.chunks = [text[i:i + chunk_size] for i in range(0, len(text), chunk_size)] or ['']
+        self.starts = [i * chunk_size for i in range(len(self.chunks))]
+        self.length = len(text)
+
+    def __len__(self) -> int:
+        return self.length
+
+    def __str__(self) -> str:
+        return ''.join(self.chunks)
+
+    def slice(self, start: int, end: int) -> str:
+        """Return the text from offset start to end."""
+        k = bisect_right(self.starts, start) - 1
+        pieces = []
+        while k < len(self.chunks) and self.starts[k] < end:
+            chunk_start = self.starts[k]
+            pieces.append(self.chunks[k][max(start - chunk_start, 0):end - chunk_start])
+            k += 1
+        return ''.join(pieces)
+
+    def rfind(self, sub: str, end: int) -> int:
+        """Offset of the last sub that ends at or before end, or -1; sub must not span chunks."""
+        k = bisect_right(self.starts, end) - 1
+        while k >= 0:
+            found = self.chunks[k].rfind(sub, 0, end - self.starts[k])
+            if found >= 0:
+                return self.starts[k] + found
+            k -= 1
+        return -1
+
+    def replace(self, offset: int, deleted_length: int, inserted: str) -> None:
+        """Replace deleted_length characters at offset with inserted."""
+        end = offset + deleted_length
+        first = bisect_right(self.starts, offset) - 1
+        last = max(bisect_right(self.starts, end) - 1, first)
+        start = self.starts[first]
+        joined = ''.join(self.chunks[first:last + 1])
+        edited = joined[:offset - start] + inserted + joined[end - start:]
+
+        size = self.chunk_size
+        if len(edited) > 2 * size:
+            pieces = [edited[i:i + size] for i in range(0, len(edited), size)]
+        else:
+            pieces = [edited] if edited or len(self.chunks) == last + 1 - first else []
+        delta = len(inserted) - deleted_length
+        self.chunks[first:last + 1] = pieces
+        self.starts[first:last + 1] = [start + i * size for i in range(len(pieces))]
+        after = first + len(pieces)
+        self.starts[after:] = [chunk_start + delta for chunk_start in self.starts[after:]]
+        self.length += delta
+
+
+class _Block:
+    """
+    Consecutive tokens with their starts and lines relative to the first one.
+    Columns on the first line are relative to its column, so moving a block
+    only changes its header in TokenBlocks.
+
+    Invalid text is kept in the block of the token before it, and validator
+    checkpoints (segments: state plus the diagnostics reported up to the next
+    checkpoint) in the block of the token they were taken at, both encoded
+    the same way.
+    """
+    __slots__ = ('types', 'values', 'starts', 'lines', 'columns', 'anchors', 'kinds',
+                 'invalid', 'quote', 'segments', 'diagnostic_count')
+
+
+class TokenBlocks:
+    """
+    Token sequence of an IncrementalLexer. Tokens are stored in blocks of at
+    most block_size, each positioned by a header (first token index, start
+    offset, line, column), so an edit rebuilds the blocks it touches and moves
+    every later one by updating its header. Indexing returns a Token, so code
+    written against List[Token] works unchanged.
+    """
+
+    def __init__(self, block_size: int = 512):
+        self.block_size = block_size
+        self._blocks: List[_Block] = []
+        self._first: List[int] = []
+        self._base: List[int] = []
+        self._line: List[int] = []
+        self._column: List[int] = []
+        self._length = 0
+        # Anchor id -> block, for the few tokens a stored validator state refers to
+        self._anchors: Dict[int, _Block] = {}
+        self._next_anchor = 0
+        self._cached = (0, 0, None, 0)
+        # Totals over all blocks, so results need not visit blocks without any
+        self._invalid_count = 0
+        self._quote_blocks = 0
+        self._diagnostic_count = 0
+
+    # Sequence interface
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self._length))]
+        if index < 0:
+            index += self._length
+        block, j, b = self._locate(index)
+        line = block.lines[j]
+        return Token(
+            type=block.types[j],
+            value=block.values[j],
+            line=self._line[b] + line,
+            column=block.columns[j] if line else self._column[b] + block.columns[j]
+        )
+
+    def __iter__(self) -> Iterator[Token]:
+        for b, block in enumerate(self._blocks):
+            base_line, base_column = self._line[b], self._column[b]
+            for token_type, value, line, column in zip(block.types, block.values, block.lines, block.columns):
+                yield Token(type=token_type, value=value, line=base_line + line,
+                            column=column if line else base_column + column)
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, (TokenBlocks, list)):
+            return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+        return NotImplemented
+
+    def type_at(self, index: int) -> TokenType:
+        """Return the type of a token without building it."""
+        block, j, _ = self._locate(index)
+        return block.types[j]
+
+    def start_at(self, index: int) -> int:
+        """Return the offset in the text at which a token starts."""
+        block, j, b = self._locate(index)
+        return self._base[b] + block.starts[j]
+
+    def _locate(self, index: int) -> Tuple[_Block, int, int]:
+        """Return (block, index in the block, block number) of a token."""
+        first, end, block, b = self._cached
+        if not first <= index < end:
+            if not 0 <= index < self._length:
+                raise IndexError("token index out of range")
+            b = bisect_right(self._first, index) - 1
+            block = self._blocks[b]
+            first = self._first[b]
+            self._cached = (first, first + len(block.types), block, b)
+        return block, index - first, b
+
+    # Lookups
+
+    def next_of(self, kind: frozenset, position: int) -> int:
+        """
+        Index of the first token at or after position whose type is in kind,
+        or len(self). Blocks without such a token are skipped whole.
+        """
+        if position >= self._length:
+            return self._length
+        b = bisect_right(self._first, position) - 1
+        j = position - self._first[b]
+        blocks = self._blocks
+        while b < len(blocks):
+            block = blocks[b]
+            if block.kinds is None:
+                # Enum hashing runs in Python, so drop repeated types by identity first
+                block.kinds = frozenset({id(token_type): token_type for token_type in block.types}.values())
+            if not kind.isdisjoint(block.kinds):
+                types = block.types
+                for k in range(j, len(types)):
+                    if types[k] in kind:
+                        return self._first[b] + k
+            b += 1
+            j = 0
+        return self._length
+
+    def bisect_start(self, offset: int) -> int:
+        """Index of the first token starting at or after offset."""
+        b = bisect_right(self._base, offset) - 1
+        if b < 0:
+            return 0
+        block = self._blocks[b]
+        return self._first[b] + bisect_left(block.starts, offset - self._base[b])
+
+    def index_of_start(self, offset: int) -> int:
+        """Index of the token starting exactly at offset, or -1."""
+        index = self.bisect_start(offset)
+        if index < self._length and self.start_at(index) == offset:
+            return index
+        return -1
+
+    def first_quote_before(self, offset: int) -> Optional[int]:
+        """Start of the first invalid '"' or '<' text, if it lies before offset."""
+        if not self._quote_blocks:
+            return None
+        for b, block in enumerate(self._blocks):
+            if block.quote is not None:
+                start = self._base[b] + block.quote
+                return start if start < offset else None
+        return None
+
+    def anchor_at(self, line: int, column: int) -> int:
+        """
+        Return the anchor id of the token at (line, column), giving it one if
+        it has none. Unlike positions, anchor ids stay the same as the token
+        moves with edits elsewhere.
+        """
+        key = (line, column)
+        lo, hi = 0, len(self._blocks)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if (self._line[mid], self._column[mid]) <= key:
+                lo = mid + 1
+            else:
+                hi = mid
+        b = max(lo - 1, 0)
+        block = self._blocks[b]
+        relative_line = line - self._line[b]
+        j = bisect_left(block.lines, relative_line)
+        column = column - self._column[b] if relative_line == 0 else column
+        while block.columns[j] != column:
+            j += 1
+        if j not in block.anchors:
+            block.anchors[j] = self._next_anchor
+            self._anchors[self._next_anchor] = block
+            self._next_anchor += 1
+        return block.anchors[j]
+
+    def anchor_position(self, anchor: int) -> Tuple[int, int]:
+        """Return the (line, column) of the token with an anchor id."""
+        block = self._anchors[anchor]
+        b = self._blocks.index(block)
+        j = next(j for j, other in block.anchors.items() if other == anchor)
+        line = block.lines[j]
+        return self._line[b] + line, block.columns[j] if line else self._column[b] + block.columns[j]
+
+    # Diagnostics and checkpoints
+
+    def invalid_tokens(self) -> Iterator[Tuple[int, int, str]]:
+        """Yield (line, column, text) of all invalid text in order."""
+        if not self._invalid_count:
+            return
+        for b, block in enumerate(self._blocks):
+            if block.invalid:
+                base_line, base_column = self._line[b], self._column[b]
+                for _, line, column, text in block.invalid:
+                    yield base_line + line, column if line else base_column + column, text
+
+    def validation_diagnostics(self, end: int) -> Iterator[DiagnosticMessage]:
+        """Yield the diagnostics of the segments before token index end in the order they were reported."""
+        if not self._diagnostic_count:
+            return
+        for b, block in enumerate(self._blocks):
+            first = self._first[b]
+            if first >= end:
+                return
+            if block.diagnostic_count:
+                base_line, base_column = self._line[b], self._column[b]
+                for segment in block.segments:
+                    if first + segment[0] >= end:
+                        return
+                    for line, column, message, severity in segment[2]:
+                        yield DiagnosticMessage(message=message, line=base_line + line,
+                                                column=column if line else base_column + column,
+                                                severity=severity)
+
+    def segment_at(self, index: int) -> Optional[ValidationCheckpoint]:
+        """Return the state stored for a checkpoint at token index, if any."""
+        block, j, _ = self._locate(index)
+        for segment in block.segments:
+            if segment[0] == j:
+                return segment[1]
+        return None
+
+    def resume_point(self, index: int) -> Optional[Tuple[int, ValidationCheckpoint]]:
+        """
+        Return the last checkpoint at or before index whose state did not read
+        ahead to the last token, as (token index, state), or None.
+        """
+        b = bisect_right(self._first, min(index, self._length - 1)) - 1
+        while b >= 0:
+            first = self._first[b]
+            for segment in reversed(self._blocks[b].segments):
+                if first + segment[0] <= index and not segment[1].lookahead_to_end:
+                    return first + segment[0], segment[1]
+            b -= 1
+        return None
+
+    def replace_segments(self, start: int, end: int, segments: List[PlainSegment]) -> None:
+        """Replace the segments at token indexes start <= index < end, in order."""
+        blocks = self._blocks
+        b = bisect_right(self._first, start) - 1
+        position = 0
+        while b < len(blocks) and self._first[b] < end:
+            block = blocks[b]
+            first = self._first[b]
+            last = b == len(blocks) - 1
+            limit = first + len(block.types)
+            if start <= first and (limit <= end and not last):
+                kept = []
+            else:
+                kept = [segment for segment in block.segments if not start <= first + segment[0] < end]
+            added = []
+            while position < len(segments) and (last or segments[position][0] < limit):
+                added.append(self._encode_segment(segments[position], first, self._line[b], self._column[b]))
+                position += 1
+            if added or len(kept) != len(block.segments):
+                block.segments = sorted(kept + added, key=lambda segment: segment[0]) if kept else added
+                self._diagnostic_count -= block.diagnostic_count
+                block.diagnostic_count = sum(len(segment[2]) for segment in block.segments)
+                self._diagnostic_count += block.diagnostic_count
+            b += 1
+
+    def clear_segments(self) -> None:
+        for block in self._blocks:
+            if block.segments:
+                block.segments = []
+                block.diagnostic_count = 0
+        self._diagnostic_count = 0
+
+    # Editing
+
+    def load(self, tokens: List[Token], starts: List[int], invalid: List[PlainInvalid]) -> None:
+        """Replace the whole sequence."""
+        plain = [(token.type, token.value, start, token.line, token.column, None)
+                 for token, start in zip(tokens, starts)]
+        self._anchors.clear()
+        self._cached = (0, 0, None, 0)
+        self._blocks, self._first, self._base, self._line, self._column = [], [], [], [], []
+        self._invalid_count = self._quote_blocks = self._diagnostic_count = 0
+        self._length = len(plain)
+        self._insert_blocks(0, 0, plain, invalid, [])
+
+    def splice(self, first: int, reuse_from: int, restart: int, edit: Tuple[int, int, int],
+               tokens: List[Token], starts: List[int], invalid: List[PlainInvalid],
+               resync: Optional[Tuple[int, int, Token]]) -> None:
+        """
+        Replace the tokens first..reuse_from-1 and the invalid text from offset
+        restart up to the token at reuse_from with the re-lexed ones. edit is
+        (offset, end of the inserted text, change in length). resync is
+        (old line, old column, new Token) for the token at reuse_from, or None
+        if the tokens to the end were replaced.
+
+        Checkpoints after first and before reuse_from are dropped; those from
+        reuse_from on move with their token unless that puts them at first. Blocks after the one holding
+        reuse_from only get new headers.
+        """
+        self._cached = (0, 0, None, 0)
+        blocks = self._blocks
+        offset, inserted_end, delta = edit
+        token_delta = len(tokens) - (reuse_from - first)
+
+        lo = bisect_right(self._first, first - 1) - 1 if first else 0
+        if resync is None:
+            hi = len(blocks) - 1
+        else:
+            hi = bisect_right(self._first, reuse_from) - 1
+        while hi + 1 < len(blocks) and self._first[hi + 1] - self._first[lo] < self.block_size // 2:
+            hi += 1
+
+        old_tokens, old_invalid, old_segments = self._decode(lo, hi)
+        range_first = self._first[lo]
+        keep = first - range_first
+        reuse = reuse_from - range_first
+
+        if resync is not None:
+            old_line, old_column, new = resync
+            line_delta = new.line - old_line
+            column_delta = new.column - old_column
+
+            def shift(line, column):
+                return line + line_delta, column + column_delta if line == old_line else column
+        else:
+            line_delta = column_delta = 0
+
+        # Relexed tokens that are the same old token keep its anchor id
+        old_anchors = {item[2]: item for item in old_tokens[keep:reuse] if item[5] is not None}
+        plain = old_tokens[:keep]
+        for token, start in zip(tokens, starts):
+            anchor = None
+            if old_anchors:
+                old_start = start if start < offset else start - delta if start >= inserted_end else None
+                old = old_anchors.get(old_start)
+                if old is not None and old[:2] == (token.type, token.value):
+                    anchor = old_anchors.pop(old_start)[5]
+            plain.append((token.type, token.value, start, token.line, token.column, anchor))
+        for item in old_anchors.values():
+            del self._anchors[item[5]]
+        new_invalid = [item for item in old_invalid if item[0] < restart] + invalid
+        new_segments = [segment for segment in old_segments if segment[0] <= first and segment[0] < reuse_from]
+
+        if resync is not None:
+            resync_start = old_tokens[reuse][2]
+            for token_type, value, start, line, column, anchor in old_tokens[reuse:]:
+                plain.append((token_type, value, start + delta, *shift(line, column), anchor))
+            new_invalid += [(start + delta, *shift(line, column), text)
+                            for start, line, column, text in old_invalid if start >= resync_start]
+            for index, state, diagnostics in old_segments:
+                # Checkpoints up to first are where validation resumes, which one
+                # moved onto first is not unless no token before it changed
+                if index >= reuse_from and (index + token_delta > first or reuse_from == first):
+                    new_segments.append((index + token_delta, state, [
+                        (*shift(line, column), message, severity) for line, column, message, severity in diagnostics
+                    ]))
+
+        for block in blocks[lo:hi + 1]:
+            self._invalid_count -= len(block.invalid)
+            self._quote_blocks -= block.quote is not None
+            self._diagnostic_count -= block.diagnostic_count
+        del blocks[lo:hi + 1]
+        del self._first[lo:hi + 1], self._base[lo:hi + 1], self._line[lo:hi + 1], self._column[lo:hi + 1]
+        self._length += token_delta
+        after = self._insert_blocks(lo, range_first, plain, new_invalid, new_segments)
+
+        if resync is not None and after < len(blocks):
+            self._first[after:] = [index + token_delta for index in self._first[after:]]
+            self._base[after:] = [start + delta for start in self._base[after:]]
+            if column_delta:
+                self._column[after:] = [column + column_delta if line == old_line else column
+                                        for line, column in zip(self._line[after:], self._column[after:])]
+            if line_delta:
+                self._line[after:] = [line + line_delta for line in self._line[after:]]
+
+    def _decode(self, lo: int, hi: int) -> Tuple[List[PlainToken], List[PlainInvalid], List[PlainSegment]]:
+        """Return the contents of blocks lo..hi with absolute positions."""
+        tokens, invalid, segments = [], [], []
+        for b in range(lo, hi + 1):
+            block = self._blocks[b]
+            first, base, base_line, base_column = self._first[b], self._base[b], self._line[b], self._column[b]
+            anchors = block.anchors
+            for j, (token_type, value, start, line, column) in enumerate(
+                    zip(block.types, block.values, block.starts, block.lines, block.columns)):
+                tokens.append((token_type, value, base + start, base_line + line,
+                               column if line else base_column + column, anchors.get(j)))
+            invalid.extend((base + start, base_line + line, column if line else base_column + column, text)
+                           for start, line, column, text in block.invalid)
+            for index, state, diagnostics in block.segments:
+                segments.append((first + index, state, [
+                    (base_line + line, column if line else base_column + column, message, severity)
+                    for line, column, message, severity in diagnostics
+                ]))
+        return tokens, invalid, segments
+
+    def _insert_blocks(self, at: int, first: int, tokens: List[PlainToken], invalid: List[PlainInvalid],
+                       segments: List[PlainSegment]) -> int:
+        """
+        Build blocks from plain contents whose first token has index first and
+        insert them at block number at. Returns the number after the last one.
+        """
+        size = self.block_size
+        count = max(1, -(-len(tokens) // size))
+        bounds = [len(tokens) * k // count for k in range(count + 1)]
+        invalid_position = segment_position = 0
+
+        for k in range(count):
+            chunk = tokens[bounds[k]:bounds[k + 1]]
+            if chunk:
+                base, base_line, base_column = chunk[0][2], chunk[0][3], chunk[0][4]
+            else:
+                base, base_line, base_column = 0, 1, 1
+            last = k == count - 1
+            next_start = tokens[bounds[k + 1]][2] if not last else None
+
+            block = _Block()
+            block.types = [item[0] for item in chunk]
+            block.values = [item[1] for item in chunk]
+            block.starts = [item[2] - base for item in chunk]
+            block.lines = [item[3] - base_line for item in chunk]
+            block.columns = [item[4] - base_column if item[3] == base_line else item[4] for item in chunk]
+            block.anchors = {j: item[5] for j, item in enumerate(chunk) if item[5] is not None}
+            # Built by the first scan that reaches the block
+            block.kinds = None
+            for anchor in block.anchors.values():
+                self._anchors[anchor] = block
+
+            end = invalid_position
+            while end < len(invalid) and (last or invalid[end][0] < next_start):
+                end += 1
+            block.invalid = [(start - base, line - base_line, column - base_column if line == base_line else column, text)
+                             for start, line, column, text in invalid[invalid_position:end]]
+            block.quote = next((start for start, _, _, text in block.invalid if text[0] in '"<'), None)
+            self._invalid_count += len(block.invalid)
+            self._quote_blocks += block.quote is not None
+            invalid_position = end
+
+            end = segment_position
+            while end < len(segments) and (last or segments[end][0] < first + bounds[k + 1]):
+                end += 1
+            block.segments = [self._encode_segment(segment, first + bounds[k], base_line, base_column)
+                              for segment in segments[segment_position:end]]
+            block.diagnostic_count = sum(len(segment[2]) for segment in block.segments)
+            self._diagnostic_count += block.diagnostic_count
+            segment_position = end
+
+            self._blocks.insert(at + k, block)
+            self._first.insert(at + k, first + bounds[k])
+            self._base.insert(at + k, base)
+            self._line.insert(at + k, base_line)
+            self._column.insert(at + k, base_column)
+        return at + count
+
+    @staticmethod
+    def _encode_segment(segment: PlainSegment, first: int, base_line: int, base_column: int):
+        index, state, diagnostics = segment
+        return index - first, state, [
+            (line - base_line, column - base_column if line == base_line else column, message, severity)
+            for line, column, message, severity in diagnostics
+        ]
+
+
+class _BlockTypes:
+    """Read-only view of the types of a TokenBlocks."""
+
+    def __init__(self, tokens: TokenBlocks):
+        self.tokens = tokens
+
+    def __len__(self) -> int:
+        return len(self.tokens)
+
+    def __getitem__(self, index: int) -> TokenType:
+        return self.tokens.type_at(index)
+
+
+class _BlockTokenIndex(LazyTokenIndex):
+    """LazyTokenIndex over TokenBlocks whose forward scans skip whole blocks."""
+
+    def __init__(self, tokens: TokenBlocks):
+        super().__init__([])
+        self.types = _BlockTypes(tokens)
+
+    def next_of(self, kind: frozenset, position: int) -> int:
+        return self.types.tokens.next_of(kind, position)
+
+
+class IncrementalLexer:
+    """
+    Lexer for editor integration that keeps the previous tokens and validator
+    checkpoints, and after an edit re-lexes and re-validates only what changed.
+
+    Tokens, invalid text, checkpoints and the diagnostics between checkpoints
+    live in the blocks of a TokenBlocks with positions relative to each block,
+    and the text in chunks, so the work per edit grows with the size of the
+    edit and the number of blocks, not with the text after it.
+
+    Validation stops where the validator state matches an old checkpoint, or
+    where the last diagram ends. Checkpoints past that end are kept unreported
+    (dormant) with the final state they led to, so the edit that restores the
+    structure, such as undoing a typo in a keyword, can resume them. Edits that
+    turn the rest of the document from outside a diagram into inside one with
+    no such checkpoints still re-validate it.
+
+    Positions are reported like Lexer(positional=True). The token sequence in a
+    result is owned by the lexer and is updated in place by the next edit.
+    """
+
+    # Characters read at a time when re-lexing; doubled while a token runs past them
+    window_size = 1024
+
+    def __init__(self, text: str = "", engine: str = "default", checkpoint_interval: int = 32,
+                 block_size: int = 512):
+        if engine not in TOKENIZER_ENGINES:
+            raise ValueError(f"Unknown tokenizer engine: '{engine}'")
+        self.tokenizer = TOKENIZER_ENGINES[engine](positional=True)
+        self.checkpoint_interval = checkpoint_interval
+        self.block_size = block_size
+        # Size of the work done by the last call, for editors that want to report it
+        self.relexed_tokens = 0
+        self.revalidated_from = 0
+        self.revalidated_to = 0
+        self.process(text)
+
+    @property
+    def text(self) -> str:
+        """The current document, joined from its chunks on each access."""
+        return str(self._text)
+
+    def process(self, text: str) -> Dict[str, Any]:
+        """Tokenize and validate a whole new document."""
+        self._text = _ChunkedText(text)
+        self.tokens = TokenBlocks(self.block_size)
+        new_tokens, new_starts, new_invalid, _ = self._relex(0, 1, 0, None, len(text))
+        self.tokens.load(new_tokens, new_starts, new_invalid)
+        self.relexed_tokens = len(new_tokens)
+
+        self.final_state: Optional[ValidationCheckpoint] = None
+        self.document_diagnostics: List[DiagnosticMessage] = []
+        # Segments before _live_end are reported; those in _dormant's
+        # (start, end) range are checkpoints of an earlier validation that
+        # stopped at end with the final state given
+        self._live_end = 0
+        self._dormant: Optional[Tuple[int, int, ValidationCheckpoint]] = None
+        # The validator reads the plain list, which is faster than the blocks
+        self._revalidate(None, len(new_tokens), new_tokens)
+        return self.result()
+
+    def apply_edit(self, offset: int, deleted_length: int, inserted_text: str) -> Dict[str, Any]:
+        """
+        Replace deleted_length characters at offset with inserted_text and return
+        the same dictionary as Lexer.process for the edited document.
+        """
+        text = self._text
+        if offset < 0 or deleted_length < 0 or offset + deleted_length > len(text):
+            raise ValueError(f"Edit at {offset}+{deleted_length} is outside the document")
+
+        text.replace(offset, deleted_length, inserted_text)
+        delta = len(inserted_text) - deleted_length
+        tokens = self.tokens
+
+        # Restart at the start of the edited line, or earlier if an old token or
+        # a failed string/stereotype match reached into it
+        restart = text.rfind('\n', offset) + 1
+        first = tokens.bisect_start(restart)
+        while first > 0 and self._end(first - 1) >= restart:
+            first -= 1
+        if first < len(tokens):
+            restart = min(restart, tokens.start_at(first))
+        quote = tokens.first_quote_before(restart)
+        if quote is not None:
+            restart = quote
+            first = tokens.bisect_start(restart)
+
+        line, line_start = self._position_before(first, restart)
+        edit_end = offset + len(inserted_text)
+        new_tokens, new_starts, new_invalid, reuse_from = self._relex(
+            restart, line, line_start, (edit_end, delta), self.window_size)
+        self.relexed_tokens = len(new_tokens)
+
+        # Old tokens from the resynchronisation point on are reused
+        if reuse_from is not None:
+            resync_token = new_tokens.pop()
+            new_starts.pop()
+            old = tokens[reuse_from]
+            resync = (old.line, old.column, resync_token)
+        else:
+            reuse_from = len(tokens)
+            resync = None
+
+        old_length = len(tokens)
+        tokens.splice(first, reuse_from, restart, (offset, edit_end, delta),
+                      new_tokens, new_starts, new_invalid, resync)
+        # Old checkpoints are compared from the resynchronised token on, and
+        # never at first, where the one kept is the state before the edit
+        reuse_from_new = max(first + len(new_tokens), first + 1) if resync is not None else len(tokens)
+        token_delta = len(tokens) - old_length
+
+        def moved(index):
+            return index + token_delta if index >= reuse_from else min(index, reuse_from_new)
+
+        self._live_end = moved(self._live_end)
+        if self._dormant is not None:
+            # Dormant checkpoints before the edit led through changed tokens
+            start, end, state = self._dormant
+            start, end = moved(start), moved(end)
+            if start < reuse_from_new:
+                tokens.replace_segments(start, reuse_from_new, [])
+                start = reuse_from_new
+            self._dormant = (start, end, state) if start < end else None
+        self._revalidate(first, reuse_from_new, tokens)
+        return self.result()
+
+    def result(self) -> Dict[str, Any]:
+        """Return the current tokens and diagnostics in Lexer.process form."""
+        tokenization_diagnostics = [
+            DiagnosticMessage(message=f"Invalid token: '{text}'", line=line, column=column)
+            for line, column, text in self.tokens.invalid_tokens()
+        ]
+        if self.final_state is None:
+            validation_diagnostics = list(self.document_diagnostics)
+        else:
+            validation_diagnostics = list(self.tokens.validation_diagnostics(self._live_end))
+            for (sender, receiver), info in self._resolved(self.final_state).sync_messages:
+                if not info.returned:
+                    validation_diagnostics.append(DiagnosticMessage(
+                        message=f"Synchronous message from '{sender}' to '{receiver}' has no matching return",
+                        line=info.line,
+                        column=info.column,
+                        severity="warning"
+                    ))
+
+        errors = [d for d in tokenization_diagnostics + validation_diagnostics if d.severity == "error"]
+        warnings = [d for d in validation_diagnostics if d.severity == "warning"]
+        return {
+            "tokens": self.tokens,
+            "errors": errors,
+            "warnings": warnings,
+            "success": len(errors) == 0
+        }
+
+    def _end(self, index: int) -> int:
+        return self.tokens.start_at(index) + len(self.tokens[index].value)
+
+    def _position_before(self, first: int, restart: int) -> Tuple[int, int]:
+        """Return the line number and line start offset at restart."""
+        if first == 0:
+            line, line_start, position = 1, 0, 0
+        else:
+            token = self.tokens[first - 1]
+            start = self.tokens.start_at(first - 1)
+            line = token.line
+            line_start = start - token.column + 1
+            position = start
+        between = self._text.slice(position, restart)
+        newlines = between.count('\n')
+        if newlines:
+            line += newlines
+            line_start = position + between.rfind('\n') + 1
+        return line, line_start
+
+    def _relex(self, position: int, line: int, line_start: int, resync: Optional[Tuple[int, int]],
+               window_size: int) -> Tuple[List[Token], List[int], List[Tuple[int, int, int, str]], Optional[int]]:
+        """
+        Scan the text from position and return (tokens, starts, invalid text,
+        index of the old token resynchronised at). With resync=(edit_end,
+        delta), stop at the first token past the edit that starts where an old
+        token started; that token is the last one returned.
+        """
+        tokens, starts, invalid = [], [], []
+        for token_type, start, value, line, column in self._scan(position, line, line_start, window_size):
+            if token_type is None:
+                invalid.append((start, line, column, value))
+                continue
+            tokens.append(Token(type=token_type, value=value, line=line, column=column))
+            starts.append(start)
+            if resync is not None and start >= resync[0]:
+                index = self.tokens.index_of_start(start - resync[1])
+                if index >= 0:
+                    return tokens, starts, invalid, index
+        return tokens, starts, invalid, None
+
+    def _scan(self, position: int, line: int, line_start: int, window_size: int):
+        """
+        Yield (token_type, start, value, line, column) for every token from
+        position onwards like Tokenizer._scan, reading the text in windows of
+        window_size characters. As in Tokenizer.iter_tokens, a token that may
+        continue past the window is scanned again from a window twice as large.
+        """
+        tokenizer = self.tokenizer
+        skip_whitespace = tokenizer.whitespace_pattern.match
+        match_invalid = tokenizer.invalid_pattern.match
+        incomplete_tail = tokenizer.incomplete_tail_pattern.fullmatch
+        text = self._text
+
+        while position < len(text):
+            window_end = min(position + window_size, len(text))
+            window = text.slice(position, window_end)
+            at_end = window_end == len(text)
+            length = len(window)
+            local = 0
+            line_start -= position
+
+            while local < length:
+                whitespace = skip_whitespace(window, local)
+                if whitespace:
+                    end = whitespace.end()
+                else:
+                    match = tokenizer._match_token_at(window, local)
+                    if match:
+                        token_type, value = match
+                        end = local + len(value)
+                    else:
+                        token_type = None
+                        end = match_invalid(window, local).end()
+                    if not at_end and (end >= length or (
+                            window[local] in '"</' and incomplete_tail(window, local))):
+                        window_size *= 2
+                        break
+                    if token_type is None or not TOKEN_CATEGORIES[token_type] & IS_TRIVIA:
+                        yield token_type, position + local, window[local:end], line, local - line_start + 1
+
+                newlines = window.count('\n', local, end)
+                if newlines:
+                    line += newlines
+                    line_start = window.rfind('\n', local, end) + 1
+                local = end
+
+            line_start += position
+            position += local
+
+    def _stored(self, checkpoint: ValidationCheckpoint) -> ValidationCheckpoint:
+        """
+        Return a checkpoint to keep across edits: sync message positions become
+        anchor ids of their tokens, which do not change when the tokens move.
+        """
+        if not checkpoint.sync_messages:
+            return checkpoint
+        return replace(checkpoint, sync_messages=tuple(
+            (pair, (self.tokens.anchor_at(info.line, info.column), info.returned))
+            for pair, info in checkpoint.sync_messages
+        ))
+
+    def _resolved(self, state: ValidationCheckpoint) -> ValidationCheckpoint:
+        """Undo _stored with the current token positions."""
+        if not state.sync_messages:
+            return state
+        return replace(state, sync_messages=tuple(
+            (pair, SyncMessageInfo(*self.tokens.anchor_position(anchor), returned=returned))
+            for pair, (anchor, returned) in state.sync_messages
+        ))
+
+    def _revalidate(self, first_changed: Optional[int], reuse_from: int, tokens) -> None:
+        """
+        Re-run the validator from the last usable checkpoint before
+        first_changed, or from the start if it is None, and stop as soon as its
+        state matches an old checkpoint at or after reuse_from. tokens is
+        self.tokens or the same tokens as a list.
+        """
+        store = self.tokens
+        if not tokens or tokens[0].type != TokenType.DIAGRAM_KEYWORD:
+            if self.final_state is not None:
+                store.clear_segments()
+            self.final_state = None
+            self._live_end, self._dormant = 0, None
+            self.document_diagnostics = SemanticValidator().validate(tokens)
+            self.revalidated_from = self.revalidated_to = 0
+            return
+
+        validator = SemanticValidator()
+        resume = None
+        if first_changed is None or self.final_state is None:
+            store.clear_segments()
+            self._live_end, self._dormant = 0, None
+        else:
+            # A checkpoint is usable if nothing validated before it read changed tokens
+            resume = store.resume_point(first_changed)
+        if resume is None:
+            start, state = 0, self._stored(validator.checkpoint(0, False, True))
+        else:
+            start, state = resume
+            validator.restore(self._resolved(state), [])
+        self.revalidated_from = start
+
+        segments = [(start, state, 0)]
+        match = []
+
+        def on_checkpoint(i, in_diagram, in_participant_section):
+            if i >= reuse_from and not validator._lookahead_to_end:
+                old = store.segment_at(i)
+                if old is not None and not old.lookahead_to_end:
+                    current = self._stored(validator.checkpoint(i, in_diagram, in_participant_section))
+                    if current == old:
+                        match.append(i)
+                        return True
+            # Space checkpoints by at least the state size so copying stays O(1) per token
+            state_size = len(validator.participant_tracker.participants) + len(validator.message_tracker.sync_messages)
+            if i - segments[-1][0] >= max(self.checkpoint_interval, state_size):
+                checkpoint = validator.checkpoint(i, in_diagram, in_participant_section)
+                segments.append((i, self._stored(checkpoint), len(validator.diagnostics)))
+            return False
+
+        index = _BlockTokenIndex(tokens) if tokens is store else LazyTokenIndex(tokens)
+        self.revalidated_to = validator._validate_statements(
+            tokens, start, state.in_diagram, state.in_participant_section, on_checkpoint, index)
+
+        diagnostics = [(d.line, d.column, d.message, d.severity) for d in validator.diagnostics]
+        counts = [count for _, _, count in segments[1:]] + [len(diagnostics)]
+        plain = [(i, checkpoint, diagnostics[count:end])
+                 for (i, checkpoint, count), end in zip(segments, counts)]
+        if match:
+            store.replace_segments(start, match[0], plain)
+            if match[0] >= self._live_end:
+                # Matched a dormant checkpoint: its validation takes over
+                _, self._live_end, self.final_state = self._dormant
+                self._dormant = None
+            return
+
+        # Checkpoints before reuse_from that were not replaced led through changed tokens
+        stop = max(self.revalidated_to, reuse_from)
+        store.replace_segments(start, stop, plain)
+        dormant = self._dormant
+        if stop < self._live_end:
+            if dormant is not None:
+                store.replace_segments(dormant[0], dormant[1], [])
+            self._dormant = (stop, self._live_end, self.final_state)
+        elif dormant is not None and stop < dormant[1]:
+            self._dormant = (max(stop, dormant[0]), dormant[1], dormant[2])
+        else:
+            self._dormant = None
+        self._live_end = self.revalidated_to
+        self.final_state = self._stored(validator.checkpoint(len(tokens), False, False))
@@ -0,0 +1,124 @@
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+from compiled_nfa import CompiledNFA
+
+
+class _LazyState:
+    """A determinized state: a set of NFA states and its transitions found so far."""
+    __slots__ = ('key', 'mask', 'next', 'accepting', 'evicted')
+
+    def __init__(self, key: int, mask: int, n_symbols: int, accepting: bool):
+        self.key = key
+        self.mask = mask
+        self.next: List[Optional['_LazyState']] = [None] * n_symbols
+        self.accepting = accepting
+        self.evicted = False
+
+
+class LazyDFA:
+    """
+    Determinizes a CompiledNFA on the fly: a DFA state (a set of NFA states) and
+    each of its transitions are computed the first time an input reaches them,
+    and kept in a cache of at most max_states states with least recently used
+    eviction.
+
+    When the cache thrashes, i.e. more than thrash_ratio of the last
+    thrash_window steps of a string missed with the cache full, the rest of
+    that string is matched by plain bitset simulation instead.
+    """
+
+    def __init__(self, nfa: CompiledNFA, max_states: int = 4096,
+                 thrash_window: int = 256, thrash_ratio: float = 0.5):
+        if max_states < 1:
+            raise ValueError("max_states must be at least 1")
+        self.nfa = nfa
+        self.max_states = max_states
+        self.thrash_window = thrash_window
+        self.thrash_ratio = thrash_ratio
+        self._by_mask: Dict[int, _LazyState] = {}
+        # Keys of the cached states, least recently used first
+        self._lru: 'OrderedDict[int, _LazyState]' = OrderedDict()
+        self._next_key = 0
+        self.reset_counters()
+
+    def reset_counters(self) -> None:
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.fallbacks = 0
+
+    @property
+    def cache_size(self) -> int:
+        return len(self._lru)
+
+    def counters(self) -> Dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "fallbacks": self.fallbacks,
+            "cache_size": self.cache_size,
+        }
+
+    def _state(self, mask: int) -> _LazyState:
+        """The cached state for a set of NFA states, created (and evicting) if needed."""
+        state = self._by_mask.get(mask)
+        if state is not None:
+            self._lru.move_to_end(state.key)
+            return state
+
+        state = _LazyState(self._next_key, mask, self.nfa.n_symbols, bool(mask & self.nfa.accepting))
+        self._next_key += 1
+        self._by_mask[mask] = state
+        self._lru[state.key] = state
+        if len(self._lru) > self.max_states:
+            _, old = self._lru.popitem(last=False)
+            del self._by_mask[old.mask]
+            # States still pointing at it see the flag and look the mask up again
+            old.evicted = True
+            old.next = None
+            self.evictions += 1
+        return state
+
+    def accepts(self, string) -> bool:
+        """Whether the NFA accepts string."""
+        nfa = self.nfa
+        symbol_ids = nfa.symbol_ids
+        lru = self._lru
+        window = self.thrash_window
+        limit = self.thrash_ratio * window
+        window_steps = 0
+        window_misses = 0
+
+        state = self._state(nfa.start)
+        symbols = iter(string)
+        for symbol in symbols:
+            symbol_id = symbol_ids.get(symbol)
+            if symbol_id is None:
+                return False
+            if state.evicted:
+                state = self._state(state.mask)
+
+            next_state = state.next[symbol_id]
+            if next_state is not None and not next_state.evicted:
+                self.hits += 1
+                lru.move_to_end(next_state.key)
+            else:
+                self.misses += 1
+                window_misses += 1
+                next_state = self._state(nfa.step(state.mask, symbol_id))
+                if not state.evicted:
+                    state.next[symbol_id] = next_state
+            state = next_state
+            if not state.mask:
+                return False
+
+            window_steps += 1
+            if window_steps == window:
+                if window_misses > limit and len(lru) >= self.max_states:
+                    self.fallbacks += 1
+                    return bool(nfa.run(symbols, state.mask) & nfa.accepting)
+                window_steps = window_misses = 0
+
+        return state.accepting
@@ -1,7 +1,9 @@
 import re
+import codecs
+from array import array
 from enum import Enum, auto
-from typing import Dict, List, Set, Tuple, Optional, Any
-from dataclasses import dataclass, field
+from typing import Dict, List, Set, Tuple, Optional, Any, Iterator, Iterable, Callable
+from dataclasses import dataclass, field, replace
 
 # Token definition
 class TokenType(Enum):
@@ -37,12 +39,279 @@ class TokenType(Enum):
 
 @dataclass
 class Token:
+    __slots__ = ('type', 'value', 'line', 'column')
     type: TokenType
     value: str
     line: int
     column: int
 
 
+# Token types by their code in a TokenBuffer
+TOKEN_TYPES: Tuple[TokenType, ...] = tuple(TokenType)
+TOKEN_TYPE_CODES: Dict[TokenType, int] = {token_type: code for code, token_type in enumerate(TOKEN_TYPES)}
+
+# Token categories, as bits of TOKEN_CATEGORIES[token_type]
+IS_TRIVIA = 1 << 0             # comments and whitespace
+IS_MESSAGE_OPERATOR = 1 << 1   # arrows between a sender and a receiver
+IS_LIFECYCLE = 1 << 2          # new, delete, activate, deactivate
+IS_CONTROL = 1 << 3            # alt, opt, loop-like block keywords
+IS_OPERAND = 1 << 4            # identifiers and strings naming participants
+IS_STATEMENT_END = 1 << 5
+IS_OPENING_BRACKET = 1 << 6
+IS_CLOSING_BRACKET = 1 << 7
+# Kinds of tokens that end the participant section of a diagram
+IS_INTERACTION = IS_MESSAGE_OPERATOR | IS_LIFECYCLE | IS_CONTROL
+
+TOKEN_CATEGORIES: Dict[TokenType, int] = dict.fromkeys(TokenType, 0)
+for _token_types, _category in [
+    ((TokenType.COMMENT, TokenType.WHITESPACE), IS_TRIVIA),
+    ((TokenType.SYNC_OPERATOR, TokenType.ASYNC_OPERATOR, TokenType.RETURN_OPERATOR,
+      TokenType.XSYNC_OPERATOR, TokenType.TWO_WAY_OPERATOR, TokenType.TIMEOUT_OPERATOR,
+      TokenType.BULKING_OPERATOR), IS_MESSAGE_OPERATOR),
+    ((TokenType.LIFECYCLE_KEYWORD,), IS_LIFECYCLE),
+    ((TokenType.CONTROL_KEYWORD,), IS_CONTROL),
+    ((TokenType.IDENTIFIER, TokenType.STRING), IS_OPERAND),
+    ((TokenType.SEMICOLON,), IS_STATEMENT_END),
+    ((TokenType.LEFT_BRACE, TokenType.LEFT_PAREN), IS_OPENING_BRACKET),
+    ((TokenType.RIGHT_BRACE, TokenType.RIGHT_PAREN), IS_CLOSING_BRACKET),
+]:
+    for _token_type in _token_types:
+        TOKEN_CATEGORIES[_token_type] |= _category
+del _token_types, _category, _token_type
+
+
+def token_types_in(category: int) -> frozenset:
+    """Return the token types having any of the category bits."""
+    return frozenset(token_type for token_type, bits in TOKEN_CATEGORIES.items() if bits & category)
+
+
+# Token kinds scanned for by the validator and TokenIndex
+MESSAGE_OPERATORS = token_types_in(IS_MESSAGE_OPERATOR)
+MESSAGE_ACTIONS = token_types_in(IS_MESSAGE_OPERATOR | IS_LIFECYCLE)
+MESSAGE_OPERANDS = token_types_in(IS_OPERAND)
+TRIVIA = token_types_in(IS_TRIVIA)
+SEMICOLONS = token_types_in(IS_STATEMENT_END)
+LEFT_BRACES = frozenset([TokenType.LEFT_BRACE])
+LEFT_PARENS = frozenset([TokenType.LEFT_PAREN])
+DIAGRAM_KEYWORDS = frozenset([TokenType.DIAGRAM_KEYWORD])
+
+
+class TokenBuffer:
+    """
+    Struct-of-arrays token storage: type codes and positions live in typed arrays
+    and values are sliced from the source only when a token is read. Indexing
+    returns a Token, so code written against List[Token] works unchanged.
+    """
+    
+    def __init__(self, source: str):
+        self.source = source
+        self.types = array('B')
+        self.starts = array('I')
+        self.ends = array('I')
+        self.lines = array('I')
+        self.columns = array('I')
+    
+    def append(self, token_type: TokenType, start: int, end: int, line: int, column: int) -> None:
+        self.types.append(TOKEN_TYPE_CODES[token_type])
+        self.starts.append(start)
+        self.ends.append(end)
+        self.lines.append(line)
+        self.columns.append(column)
+    
+    def type_at(self, index: int) -> TokenType:
+        """Return the type of a token without building it."""
+        return TOKEN_TYPES[self.types[index]]
+    
+    def value_at(self, index: int) -> str:
+        """Return the source text of a token without building it."""
+        return self.source[self.starts[index]:self.ends[index]]
+    
+    def __len__(self) -> int:
+        return len(self.types)
+    
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        return Token(
+            type=TOKEN_TYPES[self.types[index]],
+            value=self.source[self.starts[index]:self.ends[index]],
+            line=self.lines[index],
+            column=self.columns[index]
+        )
+    
+    def __iter__(self) -> Iterator[Token]:
+        for index in range(len(self)):
+            yield self[index]
+    
+    def __eq__(self, other) -> bool:
+        if isinstance(other, (TokenBuffer, list)):
+            return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+        return NotImplemented
+
+
+# Opening bracket type -> closing bracket type, and the reverse
+BRACKET_PAIRS = {TokenType.LEFT_BRACE: TokenType.RIGHT_BRACE, TokenType.LEFT_PAREN: TokenType.RIGHT_PAREN}
+CLOSING_BRACKETS = {closing: opening for opening, closing in BRACKET_PAIRS.items()}
+
+
+class TokenIndex:
+    """
+    Bracket partners and statement boundaries of a token stream, filled in the
+    same forward pass that produces the tokens and then queried in O(1) by the
+    validator and by tools such as formatters and outline views.
+    """
+    
+    def __init__(self, tokens: Optional[Iterable[Token]] = None):
+        self.types: List[TokenType] = []
+        # Index of the matching '{'/'}' or '('/')' for bracket tokens, -1 otherwise
+        self.partners = array('i')
+        self._next_semicolon = array('i')
+        # Tokens from here on have no ';' at or after them yet
+        self._pending = 0
+        self._open_braces: List[int] = []
+        self._open_parens: List[int] = []
+        self._next: Dict[frozenset, List[int]] = {}
+        if tokens is not None:
+            for token in tokens:
+                self.append(token.type)
+    
+    def append(self, token_type: TokenType) -> None:
+        """Add the next token of the stream."""
+        i = len(self.types)
+        self.types.append(token_type)
+        self.partners.append(-1)
+        self._next_semicolon.append(-1)
+        
+        if token_type is TokenType.SEMICOLON:
+            next_semicolon = self._next_semicolon
+            for k in range(self._pending, i + 1):
+                next_semicolon[k] = i
+            self._pending = i + 1
+        elif token_type is TokenType.LEFT_BRACE:
+            self._open_braces.append(i)
+        elif token_type is TokenType.LEFT_PAREN:
+            self._open_parens.append(i)
+        elif token_type is TokenType.RIGHT_BRACE:
+            if self._open_braces:
+                self._pair(self._open_braces.pop(), i)
+        elif token_type is TokenType.RIGHT_PAREN:
+            if self._open_parens:
+                self._pair(self._open_parens.pop(), i)
+    
+    def _pair(self, opening: int, closing: int) -> None:
+        self.partners[opening] = closing
+        self.partners[closing] = opening
+    
+    def __len__(self) -> int:
+        return len(self.types)
+    
+    def partner(self, index: int) -> int:
+        """Index of the bracket matching the one at index, or -1 if it has none."""
+        return self.partners[index]
+    
+    def next_semicolon(self, index: int) -> int:
+        """Index of the first ';' at or after index, or len(self) if there is none."""
+        if index < self._pending:
+            return self._next_semicolon[index]
+        return len(self.types)
+    
+    def next_of(self, kind: frozenset, position: int) -> int:
+        """
+        Index of the first token at or after position whose type is in kind, or
+        len(self). Answers are memoized for every position a scan passes, so
+        each token is examined at most once per kind. Query only once the
+        stream is complete.
+        """
+        length = len(self.types)
+        table = self._next.get(kind)
+        if table is None:
+            table = self._next[kind] = [-1] * (length + 1)
+            table[length] = length
+        
+        types = self.types
+        end = position
+        while table[end] < 0:
+            if types[end] in kind:
+                table[end] = end
+                break
+            end += 1
+        
+        result = table[end]
+        for k in range(position, end):
+            table[k] = result
+        return result
+
+
+class _TokenTypes:
+    """Read-only view of the types of a token list."""
+    
+    def __init__(self, tokens: List[Token]):
+        self.tokens = tokens
+    
+    def __len__(self) -> int:
+        return len(self.tokens)
+    
+    def __getitem__(self, index: int) -> TokenType:
+        return self.tokens[index].type
+
+
+class LazyTokenIndex(TokenIndex):
+    """
+    TokenIndex over an existing token list that answers each query by a
+    memoized scan instead of indexing every token up front, for callers such as
+    the incremental lexer that only look at a small part of a long list.
+    """
+    
+    def __init__(self, tokens: List[Token]):
+        super().__init__()
+        self.types = _TokenTypes(tokens)
+        self._partners: Dict[int, int] = {}
+    
+    def append(self, token_type: TokenType) -> None:
+        raise TypeError("LazyTokenIndex is built from a complete token list")
+    
+    def next_semicolon(self, index: int) -> int:
+        return self.next_of(SEMICOLONS, index)
+    
+    def partner(self, index: int) -> int:
+        partners = self._partners
+        if index not in partners:
+            token_type = self.types[index]
+            if token_type in BRACKET_PAIRS:
+                self._match(index, BRACKET_PAIRS[token_type], 1)
+            elif token_type in CLOSING_BRACKETS:
+                self._match(index, CLOSING_BRACKETS[token_type], -1)
+            else:
+                partners[index] = -1
+        return partners[index]
+    
+    def _match(self, index: int, other: TokenType, step: int) -> None:
+        """Match brackets from index in direction step, skipping spans already matched."""
+        partners = self._partners
+        types = self.types
+        own = types[index]
+        stack = [index]
+        i = index + step
+        while stack and 0 <= i < len(types):
+            token_type = types[i]
+            if token_type is own and i in partners:
+                # An unmatched bracket inside leaves this one unmatched too
+                if partners[i] < 0:
+                    break
+                i = partners[i] + step
+                continue
+            if token_type is own:
+                stack.append(i)
+            elif token_type is other:
+                opening = stack.pop()
+                partners[opening] = i
+                partners[i] = opening
+            i += step
+        
+        for unmatched in stack:
+            partners[unmatched] = -1
+
+
 @dataclass
 class DiagnosticMessage:
     message: str
@@ -66,6 +335,24 @@ class SyncMessageInfo:
     returned: bool = False
 
 
+@dataclass
+class ValidationCheckpoint:
+    """Validator state at a statement boundary, compared by tracker state only"""
+    index: int = field(compare=False)
+    diagnostic_count: int = field(compare=False)
+    lookahead_to_end: bool = field(compare=False)
+    in_diagram: bool
+    in_participant_section: bool
+    participants: Tuple[Tuple[str, str, str, Optional[str], Optional[str]], ...]  # (name, type, state, class, package)
+    active_participants: frozenset
+    object_instances: frozenset
+    classes: frozenset
+    packages: frozenset
+    sync_messages: Tuple[Tuple[Tuple[str, str], SyncMessageInfo], ...]
+    message_stack: Tuple[Any, ...]
+    control_stack: Tuple[Tuple[str, int, int], ...]
+
+
 class TokenDefinitions:
     """Class responsible for token pattern definitions"""
     
@@ -106,14 +393,133 @@ class TokenDefinitions:
 class Tokenizer:
     """Class responsible for tokenizing input text"""
     
-    def __init__(self):
+    whitespace_pattern = re.compile(r'\s+')
+    invalid_pattern = re.compile(r'[^\s{}();:]+')
+    # Prefixes of the only tokens whose match can depend on text far ahead
+    incomplete_tail_pattern = re.compile(r'"[^"]*|<<\s*[a-z]*\s*>?|/\*.*')
+    
+    def __init__(self, positional: bool = False):
+        self.positional = positional
         self.token_patterns = TokenDefinitions.get_token_patterns()
         self.compiled_patterns = {
             token_type: re.compile(pattern) 
             for token_type, pattern in self.token_patterns.items()
         }
         
-    def tokenize(self, input_text: str) -> Tuple[List[Token], List[DiagnosticMessage]]:
+    def _match_token_at(self, input_text: str, position: int) -> Optional[Tuple[TokenType, str]]:
+        """Return the (type, value) of the token starting at position, matching in place."""
+        for token_type, pattern in self.compiled_patterns.items():
+            match_obj = pattern.match(input_text, position)
+            if match_obj:
+                return token_type, match_obj.group(0)
+        return None
+    
+    def _match_token(self, input_text: str, position: int) -> Optional[Tuple[TokenType, str]]:
+        """Return the (type, value) of the token starting at position, or None."""
+        if self.positional:
+            return self._match_token_at(input_text, position)
+        return self._match_token_at(input_text[position:], 0)
+    
+    def _scan(self, input_text: str, position: int = 0):
+        """
+        Yield (token_type, start, end) for every token from position onwards,
+        matching in place. Comments are skipped; invalid text has token_type None.
+        """
+        length = len(input_text)
+        skip_whitespace = self.whitespace_pattern.match
+        match_invalid = self.invalid_pattern.match
+        
+        while position < length:
+            whitespace = skip_whitespace(input_text, position)
+            if whitespace:
+                position = whitespace.end()
+                if position >= length:
+                    break
+            
+            match = self._match_token_at(input_text, position)
+            if not match:
+                end = match_invalid(input_text, position).end()
+                yield None, position, end
+                position = end
+                continue
+            
+            token_type, value = match
+            end = position + len(value)
+            if not TOKEN_CATEGORIES[token_type] & IS_TRIVIA:
+                yield token_type, position, end
+            position = end
+    
+    def _scan_positions(self, input_text: str):
+        """
+        Yield (token_type, start, end, line, column) like _scan, with line/column
+        taken from precomputed newline offsets.
+        """
+        line_starts = [0]
+        line_starts.extend(newline.end() for newline in re.finditer('\n', input_text))
+        line_index = 0
+        last_line = len(line_starts) - 1
+        
+        for token_type, start, end in self._scan(input_text):
+            while line_index < last_line and line_starts[line_index + 1] <= start:
+                line_index += 1
+            yield token_type, start, end, line_index + 1, start - line_starts[line_index] + 1
+    
+    def _tokenize_positional(self, input_text: str,
+                             index: Optional[TokenIndex] = None) -> Tuple[List[Token], List[DiagnosticMessage]]:
+        """
+        Tokenize without slicing the input; line/column come from newline offsets.
+        Unlike the character-counting loop, newlines inside multi-line strings
+        advance the line number of the tokens that follow.
+        """
+        tokens = []
+        diagnostics = []
+        
+        for token_type, start, end, line, column in self._scan_positions(input_text):
+            if token_type is None:
+                diagnostics.append(DiagnosticMessage(
+                    message=f"Invalid token: '{input_text[start:end]}'",
+                    line=line,
+                    column=column
+                ))
+            else:
+                tokens.append(Token(
+                    type=token_type,
+                    value=input_text[start:end],
+                    line=line,
+                    column=column
+                ))
+                if index is not None:
+                    index.append(token_type)
+        
+        return tokens, diagnostics
+    
+    def tokenize_to_buffer(self, input_text: str,
+                           index: Optional[TokenIndex] = None) -> Tuple['TokenBuffer', List[DiagnosticMessage]]:
+        """Tokenize like the positional mode into a compact TokenBuffer."""
+        tokens = TokenBuffer(input_text)
+        diagnostics = []
+        append = tokens.append
+        
+        for token_type, start, end, line, column in self._scan_positions(input_text):
+            if token_type is None:
+                diagnostics.append(DiagnosticMessage(
+                    message=f"Invalid token: '{input_text[start:end]}'",
+                    line=line,
+                    column=column
+                ))
+            else:
+                append(token_type, start, end, line, column)
+                if index is not None:
+                    index.append(token_type)
+        
+        return tokens, diagnostics
+        
+    def tokenize(self, input_text: str,
+                 index: Optional[TokenIndex] = None) -> Tuple[List[Token], List[DiagnosticMessage]]:
+        """Tokenize input_text, also filling index with the tokens if one is given."""
+        if self.positional:
+            return self._tokenize_positional(input_text, index)
+        
         tokens = []
         diagnostics = []
         
@@ -133,12 +539,7 @@ class Tokenizer:
                 continue
             
             # Try to match a token
-            match = None
-            for token_type, pattern in self.compiled_patterns.items():
-                match_obj = pattern.match(input_text[position:])
-                if match_obj:
-                    match = (token_type, match_obj.group(0))
-                    break
+            match = self._match_token(input_text, position)
             
             if not match:
                 # Handle invalid token
@@ -162,7 +563,7 @@ class Tokenizer:
             token_type, value = match
             
             # Skip comments and whitespace
-            if token_type in [TokenType.COMMENT, TokenType.WHITESPACE]:
+            if TOKEN_CATEGORIES[token_type] & IS_TRIVIA:
                 for char in value:
                     if char == '\n':
                         line += 1
@@ -179,11 +580,113 @@ class Tokenizer:
                 line=line,
                 column=column
             ))
+            if index is not None:
+                index.append(token_type)
             
             column += len(value)
             position += len(value)
         
         return tokens, diagnostics
+    
+    def iter_tokens(self, source, chunk_size: int = 1 << 16,
+                    diagnostics: Optional[List[DiagnosticMessage]] = None,
+                    encoding: str = 'utf-8') -> Iterator[Token]:
+        """
+        Lazily tokenize a file object, mmap or anything else with read(size).
+        Binary input is decoded incrementally. Only the unconsumed tail of the
+        current chunk is kept, so memory is bounded by chunk_size plus the longest
+        token. Invalid-token diagnostics are appended to diagnostics if given.
+        Positions are reported like the positional mode.
+        """
+        decoder = codecs.getincrementaldecoder(encoding)()
+        skip_whitespace = self.whitespace_pattern.match
+        match_invalid = self.invalid_pattern.match
+        incomplete_tail = self.incomplete_tail_pattern.fullmatch
+        
+        buffer = ''
+        position = 0
+        line = 1
+        line_start = 0  # buffer index of the first character of the current line
+        at_eof = False
+        
+        while not at_eof:
+            chunk = source.read(chunk_size)
+            at_eof = not chunk
+            if not isinstance(chunk, str):
+                chunk = decoder.decode(chunk, final=at_eof)
+            buffer = buffer[position:] + chunk
+            line_start -= position
+            position = 0
+            length = len(buffer)
+            
+            while position < length:
+                whitespace = skip_whitespace(buffer, position)
+                if whitespace:
+                    end = whitespace.end()
+                else:
+                    match = self._match_token_at(buffer, position)
+                    if match:
+                        token_type, value = match
+                        end = position + len(value)
+                    else:
+                        token_type = None
+                        end = match_invalid(buffer, position).end()
+                    
+                    # A token touching the end of the buffer may continue in the next
+                    # chunk, and an open string, stereotype or block comment may still
+                    # be closed by it: wait for more input before deciding
+                    if not at_eof and (end >= length or (
+                            buffer[position] in '"</' and incomplete_tail(buffer, position))):
+                        break
+                    
+                    column = position - line_start + 1
+                    if token_type is None:
+                        if diagnostics is not None:
+                            diagnostics.append(DiagnosticMessage(
+                                message=f"Invalid token: '{buffer[position:end]}'",
+                                line=line,
+                                column=column
+                            ))
+                    elif token_type is not TokenType.COMMENT:
+                        yield Token(
+                            type=token_type,
+                            value=buffer[position:end],
+                            line=line,
+                            column=column
+                        )
+                
+                newlines = buffer.count('\n', position, end)
+                if newlines:
+                    line += newlines
+                    line_start = buffer.rfind('\n', position, end) + 1
+                position = end
+
+
+class MasterPatternTokenizer(Tokenizer):
+    """Tokenizer that tries all token patterns in a single combined regex"""
+    
+    def __init__(self, positional: bool = False):
+        super().__init__(positional)
+        # Named alternatives keep the priority order of the pattern table, so the
+        # first alternative that matches is the same token the per-pattern loop picks
+        self.master_pattern = re.compile('|'.join(
+            f'(?P<{token_type.name}>{pattern})'
+            for token_type, pattern in self.token_patterns.items()
+        ))
+        
+    def _match_token_at(self, input_text: str, position: int) -> Optional[Tuple[TokenType, str]]:
+        match_obj = self.master_pattern.match(input_text, position)
+        if match_obj:
+            return TokenType[match_obj.lastgroup], match_obj.group(0)
+        return None
+    
+    _match_token = _match_token_at
+
+
+TOKENIZER_ENGINES = {
+    "default": Tokenizer,
+    "master": MasterPatternTokenizer,
+}
 
 
 class ParticipantTracker:
@@ -336,9 +839,34 @@ class SemanticValidator:
         self.message_tracker = MessageTracker()
         self.control_flow_tracker = ControlFlowTracker()
         self.diagnostics: List[DiagnosticMessage] = []
+        # Set once a check has read up to the last token, after which the
+        # state no longer depends only on the tokens already passed
+        self._lookahead_to_end = False
+        self._index: Optional[TokenIndex] = None
+        
+        # Strategy tables, built once per validator
+        self._lifecycle_handlers = {
+            'new': self._handle_new_event,
+            'delete': self._handle_delete_event,
+            'activate': self._handle_activate_event,
+            'deactivate': self._handle_deactivate_event
+        }
+        self._message_handlers = {
+            TokenType.SYNC_OPERATOR: self._handle_sync_message,
+            TokenType.ASYNC_OPERATOR: self._handle_async_message,
+            TokenType.RETURN_OPERATOR: self._handle_return_message,
+            TokenType.XSYNC_OPERATOR: self._handle_xsync_message,
+            TokenType.TWO_WAY_OPERATOR: self._handle_two_way_message,
+            TokenType.TIMEOUT_OPERATOR: self._handle_timeout_message,
+            TokenType.BULKING_OPERATOR: self._handle_bulking_message
+        }
     
-    def validate(self, tokens: List[Token]) -> List[DiagnosticMessage]:
-        """Validate the tokens for semantic correctness."""
+    def validate(self, tokens: List[Token], index: Optional[TokenIndex] = None) -> List[DiagnosticMessage]:
+        """
+        Validate the tokens for semantic correctness. index is a TokenIndex of
+        the same tokens, such as one filled by the tokenizer; if omitted,
+        lookups scan the tokens on demand.
+        """
         self.diagnostics = []
         
         # Check if we have a sequence diagram
@@ -351,15 +879,44 @@ class SemanticValidator:
             return self.diagnostics
         
         # Process tokens
-        i = 0
-        in_diagram = False
-        in_participant_section = True  # Initially assume we're in the participant section
+        self._lookahead_to_end = False
+        self._validate_statements(tokens, 0, False, True, index=index)
+        self._report_unreturned_messages()
         
-        while i < len(tokens):
+        return self.diagnostics
+    
+    def _validate_statements(self, tokens: List[Token], i: int, in_diagram: bool,
+                             in_participant_section: bool,
+                             on_checkpoint: Optional[Callable[[int, bool, bool], bool]] = None,
+                             index: Optional[TokenIndex] = None) -> int:
+        """
+        Run the main validation loop from token i with the given section flags.
+        on_checkpoint is called at every statement boundary (after a ';' inside the
+        diagram) and may return True to stop early. Returns the index validation
+        stopped at: where on_checkpoint stopped it, where the last diagram ended
+        if only tokens outside any diagram follow, or len(tokens).
+        """
+        # Forward lookups by the checks below go through the index, so the
+        # whole pass stays linear in the number of tokens
+        if index is None:
+            index = LazyTokenIndex(tokens)
+        elif len(index) != len(tokens):
+            raise ValueError("Token index does not match the tokens")
+        self._index = index
+        
+        categories = TOKEN_CATEGORIES
+        length = len(tokens)
+        while i < length:
             token = tokens[i]
+            token_type = token.type
+            
+            if (on_checkpoint is not None and in_diagram and i
+                    and tokens[i - 1].type is TokenType.SEMICOLON
+                    and on_checkpoint(i, in_diagram, in_participant_section)):
+                return i
             
             # Handle diagram start
-            if token.type == TokenType.DIAGRAM_KEYWORD:
+            if token_type is TokenType.DIAGRAM_KEYWORD:
                 if in_diagram:
                     self.diagnostics.append(DiagnosticMessage(
                         message="Nested sequence diagrams are not allowed",
@@ -370,50 +927,55 @@ class SemanticValidator:
                 i += 1
                 continue
             
+            # Outside a diagram only the next 'sequence' keyword matters
+            if not in_diagram:
+                diagram_end = i
+                i = index.next_of(DIAGRAM_KEYWORDS, i)
+                if i >= length:
+                    return diagram_end
+                continue
+            
             # Handle diagram name (optional)
-            if in_diagram and (token.type == TokenType.STRING or token.type == TokenType.IDENTIFIER):
+            if token_type is TokenType.STRING or token_type is TokenType.IDENTIFIER:
                 i += 1
                 continue
             
             # Handle diagram opening brace
-            if in_diagram and token.type == TokenType.LEFT_BRACE:
+            if token_type is TokenType.LEFT_BRACE:
                 i += 1
                 continue
             
             # Handle diagram closing brace
-            if in_diagram and token.type == TokenType.RIGHT_BRACE:
+            if token_type is TokenType.RIGHT_BRACE:
                 in_diagram = False
                 i += 1
                 continue
             
             # Handle participant declarations
-            if in_diagram and token.type == TokenType.PARTICIPANT_TYPE:
+            if token_type is TokenType.PARTICIPANT_TYPE:
                 i = self._validate_participant_declaration(tokens, i)
                 continue
             
             # After first interaction, we're no longer in participant section
-            if in_diagram and token.type in [
-                TokenType.SYNC_OPERATOR, TokenType.ASYNC_OPERATOR, 
-                TokenType.RETURN_OPERATOR, TokenType.XSYNC_OPERATOR, 
-                TokenType.TWO_WAY_OPERATOR, TokenType.TIMEOUT_OPERATOR, 
-                TokenType.BULKING_OPERATOR, TokenType.CONTROL_KEYWORD, 
-                TokenType.LIFECYCLE_KEYWORD
-            ]:
+            if categories[token_type] & IS_INTERACTION:
                 in_participant_section = False
             
             # Handle messages
-            if in_diagram and not in_participant_section and token.type == TokenType.IDENTIFIER:
+            if not in_participant_section and token_type is TokenType.IDENTIFIER:
                 i = self._validate_message(tokens, i)
                 continue
             
             # Handle control flow
-            if in_diagram and not in_participant_section and token.type == TokenType.CONTROL_KEYWORD:
+            if not in_participant_section and token_type is TokenType.CONTROL_KEYWORD:
                 i = self._validate_control_flow(tokens, i)
                 continue
             
             i += 1
         
-        # Check for unreturned synchronous messages
+        return length
+    
+    def _report_unreturned_messages(self) -> None:
+        """Check for unreturned synchronous messages."""
         for (sender, receiver), info in self.message_tracker.get_unreturned_messages():
             self.diagnostics.append(DiagnosticMessage(
                 message=f"Synchronous message from '{sender}' to '{receiver}' has no matching return",
@@ -421,8 +983,45 @@ class SemanticValidator:
                 column=info.column,
                 severity="warning"
             ))
-        
-        return self.diagnostics
+    
+    def checkpoint(self, index: int, in_diagram: bool, in_participant_section: bool) -> 'ValidationCheckpoint':
+        """Snapshot the validator state at a statement boundary."""
+        participants = self.participant_tracker
+        return ValidationCheckpoint(
+            index=index,
+            diagnostic_count=len(self.diagnostics),
+            lookahead_to_end=self._lookahead_to_end,
+            in_diagram=in_diagram,
+            in_participant_section=in_participant_section,
+            participants=tuple((name, info.type, info.state, info.class_name, info.package)
+                               for name, info in participants.participants.items()),
+            active_participants=frozenset(participants.active_participants),
+            object_instances=frozenset(participants.object_instances),
+            classes=frozenset(participants.classes),
+            packages=frozenset(participants.packages),
+            sync_messages=tuple((pair, replace(info)) for pair, info in self.message_tracker.sync_messages.items()),
+            message_stack=tuple(self.message_tracker.message_stack),
+            control_stack=tuple(self.control_flow_tracker.control_stack)
+        )
+    
+    def restore(self, checkpoint: 'ValidationCheckpoint', diagnostics: List[DiagnosticMessage]) -> None:
+        """Reset the trackers to a checkpoint; diagnostics are those reported before it."""
+        self.participant_tracker = ParticipantTracker()
+        self.participant_tracker.participants = {
+            name: ParticipantInfo(type=participant_type, state=state, class_name=class_name, package=package)
+            for name, participant_type, state, class_name, package in checkpoint.participants
+        }
+        self.participant_tracker.active_participants = set(checkpoint.active_participants)
+        self.participant_tracker.object_instances = set(checkpoint.object_instances)
+        self.participant_tracker.classes = set(checkpoint.classes)
+        self.participant_tracker.packages = set(checkpoint.packages)
+        self.message_tracker = MessageTracker()
+        self.message_tracker.sync_messages = {pair: replace(info) for pair, info in checkpoint.sync_messages}
+        self.message_tracker.message_stack = list(checkpoint.message_stack)
+        self.control_flow_tracker = ControlFlowTracker()
+        self.control_flow_tracker.control_stack = list(checkpoint.control_stack)
+        self.diagnostics = list(diagnostics)
+        self._lookahead_to_end = checkpoint.lookahead_to_end
     
     def _validate_participant_declaration(self, tokens: List[Token], index: int) -> int:
         """Validate a participant declaration. Returns the new index."""
@@ -431,7 +1030,7 @@ class SemanticValidator:
         
         # Look for participant name
         j = index + 1
-        while j < len(tokens) and tokens[j].type in [TokenType.WHITESPACE, TokenType.COMMENT]:
+        while j < len(tokens) and TOKEN_CATEGORIES[tokens[j].type] & IS_TRIVIA:
             j += 1
         
         if j < len(tokens):
@@ -492,8 +1091,7 @@ class SemanticValidator:
                     ))
             
             # Skip to semicolon
-            while j < len(tokens) and tokens[j].type != TokenType.SEMICOLON:
-                j += 1
+            j = self._index.next_semicolon(j)
             
             return j + 1  # Move past semic
         return index + 1
@@ -511,14 +1109,7 @@ class SemanticValidator:
             ))
         
         # Look for message operator
-        j = index + 1
-        while j < len(tokens) and tokens[j].type not in [
-            TokenType.SYNC_OPERATOR, TokenType.ASYNC_OPERATOR, 
-            TokenType.RETURN_OPERATOR, TokenType.XSYNC_OPERATOR, 
-            TokenType.TWO_WAY_OPERATOR, TokenType.TIMEOUT_OPERATOR, 
-            TokenType.BULKING_OPERATOR, TokenType.LIFECYCLE_KEYWORD
-        ]:
-            j += 1
+        j = self._index.next_of(MESSAGE_ACTIONS, index + 1)
         
         if j < len(tokens):
             operator_token = tokens[j]
@@ -528,14 +1119,10 @@ class SemanticValidator:
                 return self._handle_lifecycle_event(tokens, j, sender)
             
             # Handle message operators
-            if operator_token.type in [
-                TokenType.SYNC_OPERATOR, TokenType.ASYNC_OPERATOR, 
-                TokenType.RETURN_OPERATOR, TokenType.XSYNC_OPERATOR, 
-                TokenType.TWO_WAY_OPERATOR, TokenType.TIMEOUT_OPERATOR, 
-                TokenType.BULKING_OPERATOR
-            ]:
+            if TOKEN_CATEGORIES[operator_token.type] & IS_MESSAGE_OPERATOR:
                 return self._handle_message_operator(tokens, j, sender)
         
+        self._lookahead_to_end = True
         return index + 1
     
     def _handle_lifecycle_event(self, tokens: List[Token], index: int, participant: str) -> int:
@@ -543,22 +1130,13 @@ class SemanticValidator:
         token = tokens[index]
         lifecycle_event = token.value
         
-        # Use a dictionary to map lifecycle events to handler methods
-        lifecycle_handlers = {
-            'new': self._handle_new_event,
-            'delete': self._handle_delete_event,
-            'activate': self._handle_activate_event,
-            'deactivate': self._handle_deactivate_event
-        }
-        
         # Call the appropriate handler
-        if lifecycle_event in lifecycle_handlers:
-            lifecycle_handlers[lifecycle_event](participant, token)
+        handler = self._lifecycle_handlers.get(lifecycle_event)
+        if handler is not None:
+            handler(participant, token)
         
         # Skip to semicolon
-        j = index + 1
-        while j < len(tokens) and tokens[j].type != TokenType.SEMICOLON:
-            j += 1
+        j = self._index.next_semicolon(index + 1)
         
         return j + 1  # Move past semicolon
     
@@ -621,9 +1199,7 @@ class SemanticValidator:
         operator_token = tokens[index]
         
         # Look for receiver
-        j = index + 1
-        while j < len(tokens) and tokens[j].type not in [TokenType.IDENTIFIER, TokenType.STRING]:
-            j += 1
+        j = self._index.next_of(MESSAGE_OPERANDS, index + 1)
         
         if j < len(tokens):
             receiver_token = tokens[j]
@@ -643,27 +1219,17 @@ class SemanticValidator:
             elif not self.participant_tracker.is_participant_active(receiver):
                 self.participant_tracker.activate_participant(receiver)
             
-            # Use a strategy pattern to handle different message types
-            message_handlers = {
-                TokenType.SYNC_OPERATOR: self._handle_sync_message,
-                TokenType.ASYNC_OPERATOR: self._handle_async_message,
-                TokenType.RETURN_OPERATOR: self._handle_return_message,
-                TokenType.XSYNC_OPERATOR: self._handle_xsync_message,
-                TokenType.TWO_WAY_OPERATOR: self._handle_two_way_message,
-                TokenType.TIMEOUT_OPERATOR: self._handle_timeout_message,
-                TokenType.BULKING_OPERATOR: self._handle_bulking_message
-            }
-            
             # Call the appropriate handler
-            if operator_token.type in message_handlers:
-                message_handlers[operator_token.type](sender, receiver, operator_token)
+            handler = self._message_handlers.get(operator_token.type)
+            if handler is not None:
+                handler(sender, receiver, operator_token)
             
             # Skip to semicolon
-            while j < len(tokens) and tokens[j].type != TokenType.SEMICOLON:
-                j += 1
+            j = self._index.next_semicolon(j)
             
             return j + 1  # Move past semicolon
         
+        self._lookahead_to_end = True
         return index + 1
     
     def _handle_sync_message(self, sender: str, receiver: str, token: Token) -> None:
@@ -712,9 +1278,7 @@ class SemanticValidator:
         self.control_flow_tracker.push_control(keyword, token.line, token.column)
         
         # Find the opening brace
-        brace_index = index + 1
-        while brace_index < len(tokens) and tokens[brace_index].type != TokenType.LEFT_BRACE:
-            brace_index += 1
+        brace_index = self._index.next_of(LEFT_BRACES, index + 1)
             
         if brace_index >= len(tokens):
             self.diagnostics.append(DiagnosticMessage(
@@ -722,37 +1286,25 @@ class SemanticValidator:
                 line=token.line,
                 column=token.column
             ))
+            self._lookahead_to_end = True
             return index + 1
             
         # Find the closing brace
-        closing_index = brace_index + 1
-        brace_count = 1
-        while closing_index < len(tokens) and brace_count > 0:
-            if tokens[closing_index].type == TokenType.LEFT_BRACE:
-                brace_count += 1
-            elif tokens[closing_index].type == TokenType.RIGHT_BRACE:
-                brace_count -= 1
-            closing_index += 1
-            
-        if brace_count > 0:
+        closing_brace = self._index.partner(brace_index)
+            
+        if closing_brace < 0:
             self.diagnostics.append(DiagnosticMessage(
                 message=f"Missing closing brace for {keyword} block",
                 line=token.line,
                 column=token.column
             ))
+            self._lookahead_to_end = True
             return index + 1
             
+        closing_index = closing_brace + 1
+            
         # Check for interactions inside the block
-        has_interactions = False
-        for i in range(brace_index + 1, closing_index - 1):
-            if tokens[i].type in [
-                TokenType.SYNC_OPERATOR, TokenType.ASYNC_OPERATOR, 
-                TokenType.RETURN_OPERATOR, TokenType.XSYNC_OPERATOR, 
-                TokenType.TWO_WAY_OPERATOR, TokenType.TIMEOUT_OPERATOR, 
-                TokenType.BULKING_OPERATOR
-            ]:
-                has_interactions = True
-                break
+        has_interactions = self._index.next_of(MESSAGE_OPERATORS, brace_index + 1) < closing_brace
                 
         if not has_interactions and keyword == 'loop':
             self.diagnostics.append(DiagnosticMessage(
@@ -764,11 +1316,7 @@ class SemanticValidator:
         # For loops, check for potential infinite loops
         if keyword == 'loop':
             # Simple heuristic: if there's no condition or exit mechanism visible
-            has_condition = False
-            for i in range(index + 1, brace_index):
-                if tokens[i].type == TokenType.LEFT_PAREN:
-                    has_condition = True
-                    break
+            has_condition = self._index.next_of(LEFT_PARENS, index + 1) < brace_index
                     
             if not has_condition:
                 self.diagnostics.append(DiagnosticMessage(
@@ -786,8 +1334,12 @@ class SemanticValidator:
 class Lexer:
     """Main lexer class that orchestrates the tokenization and validation process"""
     
-    def __init__(self):
-        self.tokenizer = Tokenizer()
+    def __init__(self, engine: str = "default", positional: bool = False, compact: bool = False):
+        if engine not in TOKENIZER_ENGINES:
+            raise ValueError(f"Unknown tokenizer engine: '{engine}'")
+        # Compact token storage is built by the positional scanner
+        self.compact = compact
+        self.tokenizer = TOKENIZER_ENGINES[engine](positional=positional or compact)
         self.validator = SemanticValidator()
         
     def process(self, input_text: str) -> Dict[str, Any]:
@@ -795,11 +1347,15 @@ class Lexer:
         Process the input text: tokenize and validate.
         Returns a dictionary with tokens, errors, and warnings.
         """
-        # Tokenize the input
-        tokens, tokenization_diagnostics = self.tokenizer.tokenize(input_text)
+        # Tokenize the input, indexing brackets and statements in the same pass
+        index = TokenIndex()
+        if self.compact:
+            tokens, tokenization_diagnostics = self.tokenizer.tokenize_to_buffer(input_text, index)
+        else:
+            tokens, tokenization_diagnostics = self.tokenizer.tokenize(input_text, index)
         
         # Validate the tokens
-        validation_diagnostics = self.validator.validate(tokens)
+        validation_diagnostics = self.validator.validate(tokens, index)
         
         # Separate errors and warnings
         errors = [d for d in tokenization_diagnostics + validation_diagnostics if d.severity == "error"]
@@ -0,0 +1,174 @@
+from array import array
+from itertools import accumulate, chain
+from typing import List, Tuple
+
+from analysis import coreachable_states, reachable_states
+from compiled_automaton import DEAD, CompiledDFA
+
+
+def trim(dfa: CompiledDFA) -> CompiledDFA:
+    """
+    The same automaton without the states that are unreachable or cannot reach
+    an accepting state; transitions into the latter now lead to DEAD.
+    """
+    reachable = reachable_states(dfa)
+    coreachable = coreachable_states(dfa)
+    kept = [DEAD] + [state for state in range(dfa.n_states)
+                     if state != DEAD and reachable[state] and coreachable[state]]
+    if dfa.start == DEAD or not coreachable[dfa.start]:
+        return _empty(dfa)
+
+    ids = [DEAD] * dfa.n_states
+    for new, state in enumerate(kept):
+        ids[state] = new
+    k = dfa.n_symbols
+    table = array('i', (ids[dfa.table[state * k + symbol]] for state in kept for symbol in range(k)))
+    accepting = bytearray(dfa.accepting[state] for state in kept)
+    labels = [dfa.labels[state] for state in kept]
+    subsets = [dfa.subsets[state] for state in kept] if dfa.subsets is not None else None
+    return CompiledDFA(dfa.symbols, table, accepting, ids[dfa.start], labels, subsets)
+
+
+def minimize_dfa(dfa: CompiledDFA, prune: bool = True) -> CompiledDFA:
+    """
+    The minimal DFA for the language of dfa, by Hopcroft's partition
+    refinement in O(n·k·log n). States are numbered in breadth-first order
+    from the start state, so automata for the same language minimize to the
+    same table. Each state keeps the label of the lowest-numbered state it
+    merges, and states that cannot reach an accepting state merge into DEAD.
+
+    With prune, a trim() pass first drops unreachable and dead states, which
+    keeps them out of the refinement; without it, unreachable states are
+    minimized too and numbered after the reachable ones.
+    """
+    if prune:
+        dfa = trim(dfa)
+    n, k = dfa.n_states, dfa.n_symbols
+    block_of = _refine(n, k, dfa.table, dfa.accepting)
+    dead_block = block_of[DEAD]
+    if block_of[dfa.start] == dead_block:
+        return _empty(dfa)
+
+    # The lowest-numbered state of each block stands for it
+    representatives = {}
+    for state in range(n):
+        representatives.setdefault(block_of[state], state)
+
+    ids = {dead_block: DEAD}
+    order = [representatives[dead_block]]
+    table = array('i', [DEAD]) * k
+    current = 1
+    # Without pruning, the unreachable blocks follow, from the lowest state up
+    for root in chain([dfa.start], range(n)):
+        if block_of[root] in ids:
+            continue
+        ids[block_of[root]] = len(order)
+        order.append(representatives[block_of[root]])
+        while current < len(order):
+            row = order[current] * k
+            for target in dfa.table[row:row + k]:
+                block = block_of[target]
+                target_id = ids.get(block)
+                if target_id is None:
+                    target_id = ids[block] = len(order)
+                    order.append(representatives[block])
+                table.append(target_id)
+            current += 1
+
+    accepting = bytearray(dfa.accepting[state] for state in order)
+    labels = [None] + [dfa.labels[state] for state in order[1:]]
+    return CompiledDFA(dfa.symbols, table, accepting, 1, labels)
+
+
+def _empty(dfa: CompiledDFA) -> CompiledDFA:
+    """The one-state automaton of the empty language, keeping the start label."""
+    k = dfa.n_symbols
+    return CompiledDFA(dfa.symbols, array('i', [DEAD]) * (2 * k), bytearray(2), 1,
+                       [None, dfa.labels[dfa.start]])
+
+
+def _refine(n: int, k: int, table: array, accepting: bytearray) -> List[int]:
+    """
+    Block of each state in the coarsest partition that separates accepting
+    states and is stable under every symbol (Hopcroft's algorithm).
+
+    Blocks are ranges of the elements list, with the states marked by the
+    current splitter swapped to the front of their block. When a block
+    splits, the smaller part gets a new id and is queued with every symbol,
+    which covers both halves whether or not the block was already queued.
+    """
+    inverse = _inverse(n, k, table)
+    elements = [state for state in range(n) if accepting[state]]
+    n_accepting = len(elements)
+    elements += [state for state in range(n) if not accepting[state]]
+    position = [0] * n
+    for index, state in enumerate(elements):
+        position[state] = index
+
+    if n_accepting in (0, n):
+        return [0] * n
+    first = [0, n_accepting]
+    end = [n_accepting, n]
+    marked = [0, 0]
+    block_of = [0 if accepting[state] else 1 for state in range(n)]
+    smaller = 0 if n_accepting <= n - n_accepting else 1
+    pending: List[Tuple[int, int]] = [(smaller, symbol) for symbol in range(k)]
+
+    while pending:
+        splitter, symbol = pending.pop()
+        sources, offsets = inverse[symbol]
+        touched = []
+        # Copied, since marking reorders the splitter's own range
+        for target in elements[first[splitter]:end[splitter]]:
+            for source in sources[offsets[target]:offsets[target + 1]]:
+                block = block_of[source]
+                count = marked[block]
+                front = first[block] + count
+                if position[source] < front:
+                    continue
+                other = elements[front]
+                index = position[source]
+                elements[front] = source
+                position[source] = front
+                elements[index] = other
+                position[other] = index
+                if not count:
+                    touched.append(block)
+                marked[block] = count + 1
+
+        for block in touched:
+            count = marked[block]
+            marked[block] = 0
+            size = end[block] - first[block]
+            if count == size:
+                continue
+            new = len(first)
+            if count <= size - count:
+                first.append(first[block])
+                end.append(first[block] + count)
+                first[block] += count
+            else:
+                first.append(first[block] + count)
+                end.append(end[block])
+                end[block] = first[block] + count
+            marked.append(0)
+            for state in elements[first[new]:end[new]]:
+                block_of[state] = new
+            pending.extend((new, symbol) for symbol in range(k))
+    return block_of
+
+
+def _inverse(n: int, k: int, table: array) -> List[Tuple[List[int], List[int]]]:
+    """
+    Per symbol, the sources sorted by target and the offset of each target's
+    run, so the predecessors of t are sources[offsets[t]:offsets[t + 1]].
+    """
+    inverse = []
+    for symbol in range(k):
+        column = table[symbol::k]
+        sources = sorted(range(n), key=column.__getitem__)
+        counts = [0] * (n + 1)
+        for target in column:
+            counts[target + 1] += 1
+        inverse.append((sources, list(accumulate(counts))))
+    return inverse
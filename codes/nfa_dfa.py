@@ -51,6 +51,7 @@ def nfa_to_dfa(nfa):
 
     unprocessed_states = [start_state]
     dfa_states.append(start_state)
+    seen_states = {start_state}
     
     while unprocessed_states:
         current_dfa_state = unprocessed_states.pop()
@@ -62,9 +63,10 @@ def nfa_to_dfa(nfa):
 
             if next_state:
                 next_state_tuple = tuple(sorted(next_state))
-                if next_state_tuple not in dfa_states:
+                if next_state_tuple not in seen_states:
                     unprocessed_states.append(next_state_tuple)
                     dfa_states.append(next_state_tuple)
+                    seen_states.add(next_state_tuple)
                     dfa.add_state(str(next_state_tuple), any(nfa.is_final(state) for state in next_state_tuple))
                 
                 dfa.add_transition(str(current_dfa_state), str(next_state_tuple), symbol)
@@ -0,0 +1,177 @@
+from array import array
+from typing import Callable, Dict, Hashable, List, Optional, Sequence, Tuple
+
+from compiled_automaton import DEAD, CompiledDFA, join_symbols
+
+# Whether a pair of states accepts, given whether each side accepts
+OPERATIONS: Dict[str, Callable[[int, int], bool]] = {
+    "intersection": lambda left, right: bool(left and right),
+    "union": lambda left, right: bool(left or right),
+    "difference": lambda left, right: bool(left and not right),
+    "symmetric_difference": lambda left, right: bool(left) != bool(right),
+}
+
+Columns = List[Tuple[Optional[int], Optional[int]]]
+
+
+def _joint_alphabet(left: CompiledDFA, right: CompiledDFA) -> Tuple[List[Hashable], Columns]:
+    """
+    Symbols of either automaton, left's first, with the symbol id of each on
+    both sides; None where an automaton lacks the symbol, which leads to DEAD.
+    """
+    symbols = list(left.symbols) + [symbol for symbol in right.symbols if symbol not in left.symbol_ids]
+    columns = [(left.symbol_ids.get(symbol), right.symbol_ids.get(symbol)) for symbol in symbols]
+    return symbols, columns
+
+
+def _column(dfa: CompiledDFA, symbol_id: Optional[int]) -> Sequence[int]:
+    """Target of every state of dfa on one symbol."""
+    if symbol_id is None:
+        return array('i', [DEAD]) * dfa.n_states
+    return dfa.table[symbol_id::dfa.n_symbols]
+
+
+def product(left: CompiledDFA, right: CompiledDFA, operation: str) -> CompiledDFA:
+    """
+    The product automaton of left and right for one of OPERATIONS. Only the
+    pairs of states reachable from the pair of start states are built, in
+    breadth-first order; state i stands for the pair of labels labels[i].
+    """
+    accept = OPERATIONS.get(operation)
+    if accept is None:
+        raise ValueError(f"Unknown operation {operation!r}; expected one of {', '.join(OPERATIONS)}")
+    symbols, columns = _joint_alphabet(left, right)
+    targets = [(_column(left, left_id), _column(right, right_id)) for left_id, right_id in columns]
+
+    # A pair (a, b) is looked up by a * width + b
+    width = right.n_states
+    pairs = [(DEAD, DEAD)]
+    ids = {DEAD: DEAD}
+    start_key = left.start * width + right.start
+    if start_key != DEAD:
+        ids[start_key] = 1
+        pairs.append((left.start, right.start))
+
+    table = array('i', [DEAD]) * len(symbols)
+    current = 1
+    while current < len(pairs):
+        a, b = pairs[current]
+        row = []
+        for left_targets, right_targets in targets:
+            next_a = left_targets[a]
+            next_b = right_targets[b]
+            key = next_a * width + next_b
+            target = ids.get(key)
+            if target is None:
+                target = ids[key] = len(pairs)
+                pairs.append((next_a, next_b))
+            row.append(target)
+        table.extend(row)
+        current += 1
+
+    accepting = bytearray(1 if accept(left.accepting[a], right.accepting[b]) else 0 for a, b in pairs)
+    labels = [None] + [(left.labels[a], right.labels[b]) for a, b in pairs[1:]]
+    return CompiledDFA(symbols, table, accepting, ids[start_key], labels)
+
+
+def intersection(left: CompiledDFA, right: CompiledDFA) -> CompiledDFA:
+    return product(left, right, "intersection")
+
+
+def union(left: CompiledDFA, right: CompiledDFA) -> CompiledDFA:
+    return product(left, right, "union")
+
+
+def difference(left: CompiledDFA, right: CompiledDFA) -> CompiledDFA:
+    return product(left, right, "difference")
+
+
+def symmetric_difference(left: CompiledDFA, right: CompiledDFA) -> CompiledDFA:
+    return product(left, right, "symmetric_difference")
+
+
+def equivalent(left: CompiledDFA, right: CompiledDFA) -> bool:
+    """
+    Whether left and right accept the same language, by Hopcroft and Karp's
+    algorithm: starting from the pair of start states, pairs of states are
+    assumed equivalent and merged in a union-find over the states of both
+    automata, and only pairs not already in one class are followed. Each
+    merge removes a class, so at most n_left + n_right pairs are visited and
+    the check is near-linear in the size of the automata.
+    """
+    _, columns = _joint_alphabet(left, right)
+    targets = [(_column(left, left_id), _column(right, right_id)) for left_id, right_id in columns]
+    offset = left.n_states
+    parent = list(range(left.n_states + right.n_states))
+    size = [1] * len(parent)
+
+    def find(state):
+        while parent[state] != state:
+            parent[state] = parent[parent[state]]
+            state = parent[state]
+        return state
+
+    def merge(a, b):
+        """Merge the classes of a and b; False if they were one already."""
+        a, b = find(a), find(b)
+        if a == b:
+            return False
+        if size[a] < size[b]:
+            a, b = b, a
+        parent[b] = a
+        size[a] += size[b]
+        return True
+
+    merge(left.start, offset + right.start)
+    pending = [(left.start, right.start)]
+    while pending:
+        a, b = pending.pop()
+        if bool(left.accepting[a]) != bool(right.accepting[b]):
+            return False
+        for left_targets, right_targets in targets:
+            next_a = left_targets[a]
+            next_b = right_targets[b]
+            if merge(next_a, offset + next_b):
+                pending.append((next_a, next_b))
+    return True
+
+
+def counterexample(left: CompiledDFA, right: CompiledDFA):
+    """
+    A shortest string accepted by exactly one of left and right, or None if
+    they are equivalent. Equivalence is settled by equivalent() first; only
+    for automata that differ are pairs of states searched breadth-first, and
+    only down to the depth of the shortest counterexample. The string is a
+    str when all symbols are strings, a tuple of symbols otherwise.
+    """
+    if equivalent(left, right):
+        return None
+
+    symbols, columns = _joint_alphabet(left, right)
+    targets = [(_column(left, left_id), _column(right, right_id)) for left_id, right_id in columns]
+    width = right.n_states
+    start = (left.start, right.start)
+    # For each pair found, the pair it was reached from and the symbol id read
+    previous: Dict[int, Tuple[Optional[int], int]] = {left.start * width + right.start: (None, -1)}
+    queue = [start]
+    found = None
+    for a, b in queue:
+        if bool(left.accepting[a]) != bool(right.accepting[b]):
+            found = a * width + b
+            break
+        key = a * width + b
+        for symbol_id, (left_targets, right_targets) in enumerate(targets):
+            next_a = left_targets[a]
+            next_b = right_targets[b]
+            next_key = next_a * width + next_b
+            if next_key not in previous:
+                previous[next_key] = (key, symbol_id)
+                queue.append((next_a, next_b))
+
+    word = []
+    key, symbol_id = previous[found]
+    while key is not None:
+        word.append(symbols[symbol_id])
+        key, symbol_id = previous[key]
+    word.reverse()
+    return join_symbols(word)
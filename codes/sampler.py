@@ -0,0 +1,82 @@
+import random
+from typing import List, Optional
+
+from analysis import live_states
+from compiled_automaton import CompiledDFA, join_symbols
+
+
+class UniformSampler:
+    """
+    Draws accepted strings of a given length uniformly at random from the
+    language of a CompiledDFA.
+
+    counts[n][i] is the number of strings of length n that lead from the
+    i-th live state (see analysis.live_states) to acceptance, kept as exact
+    integers and extended only as far as
+    the longest length asked for. A sample of length n then picks each
+    symbol in turn with probability proportional to the number of
+    completions it leaves, which costs O(n·k) big-int comparisons and no
+    further counting.
+    """
+
+    def __init__(self, dfa: CompiledDFA, rng: Optional[random.Random] = None):
+        self.dfa = dfa
+        self.rng = rng if rng is not None else random.Random()
+
+        live = live_states(dfa)
+        self._states = [state for state, flag in enumerate(live) if flag]
+        ids = {state: i for i, state in enumerate(self._states)}
+        k = dfa.n_symbols
+        # Per live state, its (symbol id, live target) moves in symbol order
+        self._moves = [
+            [(symbol, ids[target]) for symbol, target in enumerate(dfa.table[state * k:state * k + k])
+             if live[target]]
+            for state in self._states
+        ]
+        self._start = ids.get(dfa.start)
+        self.counts: List[List[int]] = [[1 if dfa.accepting[state] else 0 for state in self._states]]
+
+    def _extend(self, length: int) -> None:
+        counts = self.counts
+        moves = self._moves
+        while len(counts) <= length:
+            previous = counts[-1]
+            counts.append([sum(previous[target] for _, target in state_moves) for state_moves in moves])
+
+    def count(self, length: int) -> int:
+        """Number of accepted strings of the given length."""
+        if self._start is None or length < 0:
+            return 0
+        self._extend(length)
+        return self.counts[length][self._start]
+
+    def sample(self, length: int):
+        """
+        One accepted string of the given length, every one equally likely.
+        Raises ValueError if the language has none.
+        """
+        total = self.count(length)
+        if not total:
+            raise ValueError(f"No accepted string has length {length}")
+        symbols = self.dfa.symbols
+        counts = self.counts
+        randrange = self.rng.randrange
+        state = self._start
+        word = []
+        for remaining in range(length - 1, -1, -1):
+            # Walk the moves until the random rank falls within one's completions
+            rank = randrange(total)
+            completions = counts[remaining]
+            for symbol, target in self._moves[state]:
+                rank -= completions[target]
+                if rank < 0:
+                    break
+            word.append(symbols[symbol])
+            state = target
+            total = completions[target]
+        return join_symbols(word)
+
+    def samples(self, length: int, count: int) -> list:
+        """count independent samples of the given length."""
+        self._extend(length)
+        return [self.sample(length) for _ in range(count)]
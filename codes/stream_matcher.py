@@ -0,0 +1,132 @@
+from typing import BinaryIO, Iterator, List, Optional
+
+from compiled_automaton import DEAD, CompiledDFA
+
+# Input is stepped through in blocks of this many symbols, so a run that
+# reaches DEAD stops within a block instead of finishing the chunk
+BLOCK_SIZE = 1 << 14
+
+
+class StreamMatcher:
+    """
+    Runs a CompiledDFA over input that arrives in chunks, keeping the state
+    between feed() calls, so the input never has to be held in memory at once.
+    Chunks are str, bytes or sequences of symbols; a byte is the symbol of the
+    character with that code, which makes byte streams usable with alphabets
+    of single characters below U+0100.
+    """
+
+    def __init__(self, dfa: CompiledDFA):
+        self.dfa = dfa
+        # Premultiplied row offsets where the DFA has them, else the table in place
+        self._offsets = dfa._offsets
+        self._scale = dfa._width if self._offsets is not None else 1
+        self._accept_at: Optional[bytearray] = None
+        self.reset()
+
+    def reset(self) -> None:
+        """Go back to the start state and offset 0."""
+        self._position = self.dfa.start * self._scale
+        self.offset = 0
+
+    @property
+    def state(self) -> int:
+        """Id of the current state in the DFA."""
+        return self._position // self._scale
+
+    @property
+    def accepted(self) -> bool:
+        """Whether the input fed so far is accepted."""
+        return bool(self.dfa.accepting[self.state])
+
+    def feed(self, chunk) -> None:
+        """Consume the next chunk of input."""
+        codes = self.dfa.encode(chunk)
+        self._advance(codes, None)
+        self.offset += len(codes)
+
+    def scan(self, chunk) -> List[int]:
+        """
+        Consume the next chunk and return every offset within the whole input
+        where an accepting state is reached: offset i means the first i
+        symbols are accepted. The empty prefix is left to accepted.
+        """
+        codes = self.dfa.encode(chunk)
+        hits: List[int] = []
+        self._advance(codes, hits)
+        self.offset += len(codes)
+        return hits
+
+    def feed_file(self, file: BinaryIO, buffer_size: int = 1 << 20) -> bool:
+        """Consume a binary file to its end and return accepted."""
+        for chunk in self._read(file, buffer_size):
+            self.feed(chunk)
+        return self.accepted
+
+    def scan_file(self, file: BinaryIO, buffer_size: int = 1 << 20) -> Iterator[int]:
+        """Consume a binary file, yielding the offsets scan() would report."""
+        for chunk in self._read(file, buffer_size):
+            yield from self.scan(chunk)
+
+    def _read(self, file: BinaryIO, buffer_size: int) -> Iterator[memoryview]:
+        """
+        Chunks of file read with readinto into one reused buffer, each valid
+        until the next is read. Reading stops early once the run is in DEAD,
+        since nothing after that can be accepted.
+        """
+        buffer = bytearray(buffer_size)
+        view = memoryview(buffer)
+        while self._position != DEAD:
+            count = file.readinto(buffer)
+            if not count:
+                break
+            with view[:count] as chunk:
+                yield chunk
+
+    def _advance(self, codes, hits: Optional[List[int]]) -> None:
+        """Step through codes, appending the offsets of accepting states to hits if given."""
+        position = self._position
+        offsets = self._offsets
+        if offsets is None:
+            table = self.dfa.table
+            k = self.dfa.n_symbols
+            accepting = self.dfa.accepting
+        elif hits is not None:
+            accept_at = self._accepting_offsets()
+
+        for begin in range(0, len(codes), BLOCK_SIZE):
+            if position == DEAD:
+                break
+            block = codes[begin:begin + BLOCK_SIZE]
+            if offsets is None:
+                # Symbols outside the alphabet have the id k and lead to DEAD
+                base = self.offset + begin + 1
+                for i, code in enumerate(block):
+                    if code == k:
+                        position = DEAD
+                        break
+                    position = table[position * k + code]
+                    if hits is not None and accepting[position]:
+                        hits.append(base + i)
+            elif hits is None:
+                for code in block:
+                    position = offsets[position + code]
+            else:
+                base = self.offset + begin + 1
+                for i, code in enumerate(block):
+                    position = offsets[position + code]
+                    if accept_at[position]:
+                        hits.append(base + i)
+        self._position = position
+
+    def _accepting_offsets(self) -> bytearray:
+        """Flags indexed by row offset: whether the state at that offset accepts."""
+        if self._accept_at is None:
+            scale = self._scale
+            accept_at = bytearray(self.dfa.n_states * scale)
+            accept_at[::scale] = self.dfa.accepting
+            self._accept_at = accept_at
+        return self._accept_at
+
+    def __repr__(self):
+        return f"StreamMatcher(state={self.state}, offset={self.offset}, accepted={self.accepted})"
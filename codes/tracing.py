@@ -0,0 +1,126 @@
+"""
+Tracing hooks for FiniteAutomation. Methods that take a tracer report to it
+what they do; without one they run silently and skip the reporting entirely.
+"""
+import json
+import sys
+import time
+from collections import Counter
+from contextlib import ExitStack, contextmanager, nullcontext
+from typing import Any, Dict, Hashable, Iterable, Optional, TextIO
+
+
+class Tracer:
+    """
+    Receives events from a traced call. Every hook does nothing here;
+    subclasses override the ones they need.
+    """
+
+    def visit(self, state: Hashable) -> None:
+        """A state is current after reading a symbol (or at the start)."""
+
+    def transition(self, state: Hashable, symbol: Hashable, next_state: Hashable) -> None:
+        """A transition was taken."""
+
+    def message(self, text: str) -> None:
+        """A human-readable line describing a step."""
+
+    @contextmanager
+    def phase(self, name: str):
+        """Wraps one phase of a call, such as the simulation or a conversion."""
+        yield
+
+
+def traced_phase(tracer: Optional[Tracer], name: str):
+    """tracer.phase(name), or a context that does nothing without a tracer."""
+    return tracer.phase(name) if tracer is not None else nullcontext()
+
+
+class VerboseTracer(Tracer):
+    """Writes every message to a stream, standard output by default."""
+
+    def __init__(self, stream: Optional[TextIO] = None):
+        self.stream = stream
+
+    def message(self, text: str) -> None:
+        print(text, file=self.stream if self.stream is not None else sys.stdout)
+
+
+class Stats(Tracer):
+    """Counts transitions taken and states visited, and times each phase."""
+
+    def __init__(self):
+        self.transitions: Counter = Counter()
+        self.visits: Counter = Counter()
+        self.phase_seconds: Dict[str, float] = {}
+        self.phase_calls: Counter = Counter()
+        self.messages = 0
+
+    def visit(self, state: Hashable) -> None:
+        self.visits[state] += 1
+
+    def transition(self, state: Hashable, symbol: Hashable, next_state: Hashable) -> None:
+        self.transitions[state, symbol, next_state] += 1
+
+    def message(self, text: str) -> None:
+        self.messages += 1
+
+    @contextmanager
+    def phase(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phase_seconds[name] = self.phase_seconds.get(name, 0.0) + time.perf_counter() - start
+            self.phase_calls[name] += 1
+
+    @property
+    def transitions_taken(self) -> int:
+        return sum(self.transitions.values())
+
+    @property
+    def states_visited(self) -> int:
+        return sum(self.visits.values())
+
+    def as_dict(self) -> Dict[str, Any]:
+        """The statistics as plain lists and dicts, with states as given."""
+        return {
+            "transitions_taken": self.transitions_taken,
+            "states_visited": self.states_visited,
+            "messages": self.messages,
+            "transitions": [{"from": state, "symbol": symbol, "to": next_state, "count": count}
+                            for (state, symbol, next_state), count in self.transitions.items()],
+            "visits": [{"state": state, "count": count} for state, count in self.visits.items()],
+            "phases": {name: {"seconds": seconds, "calls": self.phase_calls[name]}
+                       for name, seconds in self.phase_seconds.items()},
+        }
+
+    def to_json(self, **kwargs) -> str:
+        """as_dict() as JSON; states that are not JSON values are written with str()."""
+        return json.dumps(self.as_dict(), default=str, **kwargs)
+
+
+class Tracers(Tracer):
+    """Forwards every event to several tracers, e.g. a Stats and a VerboseTracer."""
+
+    def __init__(self, tracers: Iterable[Tracer]):
+        self.tracers = list(tracers)
+
+    def visit(self, state: Hashable) -> None:
+        for tracer in self.tracers:
+            tracer.visit(state)
+
+    def transition(self, state: Hashable, symbol: Hashable, next_state: Hashable) -> None:
+        for tracer in self.tracers:
+            tracer.transition(state, symbol, next_state)
+
+    def message(self, text: str) -> None:
+        for tracer in self.tracers:
+            tracer.message(text)
+
+    @contextmanager
+    def phase(self, name: str):
+        with ExitStack() as stack:
+            for tracer in self.tracers:
+                stack.enter_context(tracer.phase(name))
+            yield